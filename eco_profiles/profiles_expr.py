@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from codegen.abstract_rep import TimeExpr, PeriodExpr, Import, CodeFragment, QuantifierExpr
-from validator2solver.python.python_generator import PythonFunctionNameTranslator, PythonVisitor
+from itertools import chain
+
+from codegen.abstract_rep import TimeExpr, PeriodExpr, Import, CodeFragment, QuantifierExpr, SetExpr, NumberExpr, \
+    StringExpr, BooleanExpr, LogicalExpr, CodeElement, Expression, parenthesize, ComprehensionContainerCode, \
+    PredicateApplExpr, VariableAccess, AttributeAccess, ComparisonExpr, SetMembershipExpr, NegatedExpr, BetweenExpr, \
+    FunctionApplExpr, AggregateExpr, ComprehensionConditionCode, StreamExpr, SubscriptedExpr
+from math_rep.constants import AND_SYMBOL, FOR_ALL_SYMBOL, EXISTS_SYMBOL
+from validator2solver.python.python_generator import PythonFunctionNameTranslator, PythonVisitor, PYTHON_PRIMITIVES, \
+    PYTHON_COMP_OPS, FUNCTION_TRANSLATIONS, PYTHON_FUNCTION_TRANSLATIONS
 from codegen.utils import disown
 from math_rep.expr import intern_expr, Term, TEMPORAL_BEFORE, TEMPORAL_AFTER, TEMPORAL_MEETS, TEMPORAL_MEETS_INV, \
     TEMPORAL_DISJOINT, TEMPORAL_OVERLAPS
-from math_rep.expression_types import MClassType, QualifiedName
+from math_rep.expression_types import MClassType, QualifiedName, is_math_name
 from validator2solver.python.python_builtins import is_profile_name
 from eco_profiles.profile_frame_constants import profile_name
 
@@ -60,6 +67,7 @@ M_PERIOD = MClassType(profile_name('Period'))
 ECO_ABST_MODULE = 'optimistic_rt'
 ECO_TEMPORAL_MODULE = f'{ECO_ABST_MODULE}.temporal'
 ECO_UTIL_MODULE = f'{ECO_ABST_MODULE}.util'
+ECO_COLUMNAR_MODULE = f'{ECO_ABST_MODULE}.columnar'
 ECO_FUNCTIONS = {TEMPORAL_BEFORE: Import('t_before', ECO_TEMPORAL_MODULE),
                  TEMPORAL_AFTER: Import('t_after', ECO_TEMPORAL_MODULE),
                  TEMPORAL_MEETS: Import('t_meets', ECO_TEMPORAL_MODULE),
@@ -81,7 +89,182 @@ class PythonFunctionNameTranslatorForProfiles(PythonFunctionNameTranslator):
             return name
 
 
+def conjuncts(formula: Expression):
+    """
+    Return the conjuncts of the given formula, flattening nested conjunctions
+    """
+    if isinstance(formula, LogicalExpr) and getattr(formula.op, 'name', formula.op) == AND_SYMBOL:
+        return list(chain.from_iterable(conjuncts(e) for e in formula.elements))
+    return [formula]
+
+
+def single_binding(quantifier: QuantifierExpr):
+    """
+    Return the variable and container of a non-unique quantifier over a single variable without conditions, or None
+    """
+    compr = quantifier.container
+    if (not quantifier.unique and isinstance(compr, ComprehensionContainerCode) and len(compr.vars) == 1
+            and compr.rest is None):
+        return compr.vars[0], compr.container
+    return None
+
+
+def is_different(formula: Expression, names) -> bool:
+    """
+    Return true if the formula states that the variables with the given names are all different
+    """
+    return (isinstance(formula, PredicateApplExpr) and formula.pred.name.name == '*different*'
+            and all(isinstance(arg, VariableAccess) for arg in formula.args)
+            and sorted(arg.name.to_c_identifier() for arg in formula.args) == sorted(names))
+
+
+def is_universal_over(formula: Expression, names) -> bool:
+    """
+    Return true if the formula is a universal quantifier over the set of the variables with the given names
+    """
+    if not (isinstance(formula, QuantifierExpr) and formula.kind == FOR_ALL_SYMBOL and formula.formula
+            and (binding := single_binding(formula))):
+        return False
+    container = binding[1]
+    return (isinstance(container, SetExpr) and all(isinstance(e, VariableAccess) for e in container.set)
+            and sorted(e.name.to_c_identifier() for e in container.set) == sorted(names))
+
+
 class PythonVisitorForProfiles(PythonVisitor):
+    def __init__(self, base_name, *args, optimize=False, **kwargs):
+        """
+        If `optimize` is true, conjuncts that do not depend on the bound variables of a quantifier are hoisted out of
+        it, nested existentials over independent variables are evaluated in linear time (see
+        `_independent_existentials`), and sets of constants are generated once as module-level frozensets.
+        """
+        super().__init__(base_name, *args, **kwargs)
+        self.optimize = optimize
+        self.constant_prefix = base_name.upper()
+        self.constant_sets = {}
+
+    def full_code(self, abs_rep: CodeElement, paraphrase, encapsulate=True):
+        code = super().full_code(abs_rep, paraphrase, encapsulate=encapsulate)
+        if not self.constant_sets:
+            return code
+        constants = '\n'.join(f'{name} = {value}' for value, name in self.constant_sets.items())
+        if self.imports:
+            imports, _, rest = code.partition('\n\n\n')
+            return f'{imports}\n\n{constants}\n\n\n{rest}'
+        return f'{constants}\n\n\n{code}'
+
+    def visit_set_expr(self, s: SetExpr):
+        code = super().visit_set_expr(s)
+        if not (self.optimize and s.set and all(isinstance(e, (NumberExpr, StringExpr, BooleanExpr)) for e in s.set)):
+            return code
+        value = f'frozenset({code.value})'
+        name = self.constant_sets.get(value)
+        if name is None:
+            name = self.constant_sets[value] = f'{self.constant_prefix}_SET{len(self.constant_sets) + 1}'
+        return CodeFragment(name)
+
+    def visit_quantifier(self, quantifier: QuantifierExpr):
+        if not self.optimize or quantifier.unique or not quantifier.formula:
+            return super().visit_quantifier(quantifier)
+        if quantifier.kind == EXISTS_SYMBOL and (code := self._independent_existentials(quantifier)) is not None:
+            return code
+        function = 'all' if quantifier.kind == FOR_ALL_SYMBOL else 'any'
+        checkpoint = self.helper_checkpoint()
+        formula_codes = [c.accept(self) for c in conjuncts(quantifier.formula)]
+        container_code = quantifier.container.accept(self)
+        bound_vars = container_code.bound_vars
+        free_vars = (frozenset(chain.from_iterable(c.free_vars for c in formula_codes))
+                     | container_code.free_vars) - bound_vars
+        and_precedence = PYTHON_PRIMITIVES['and']
+        invariant = [c for c in formula_codes if c.free_vars and not c.free_vars & bound_vars]
+        variant = [c for c in formula_codes if not c.free_vars or c.free_vars & bound_vars]
+        binding = single_binding(quantifier)
+        if not invariant or binding is None:
+            self.clear_helpers(checkpoint)
+            return super().visit_quantifier(quantifier)
+        # The original quantifier never evaluates the invariant condition if the container is empty, and the condition
+        # may fail in that case; the container is therefore materialized once, and the condition is only evaluated if
+        # it is not empty
+        var_name = binding[0].to_c_identifier()
+        elements = f'{var_name}_values'
+        condition = ' and '.join(parenthesize(and_precedence, c) for c in invariant)
+        if variant:
+            formula = ' and '.join(parenthesize(and_precedence, c) for c in variant)
+            condition = f'{condition} and {function}({formula} for {var_name} in {elements})'
+        return CodeFragment(f'{function}({condition} for {elements} in [list({container_code.container_code.value})] '
+                            f'if {elements})', free_vars=free_vars)
+
+    def _independent_existentials(self, quantifier: QuantifierExpr) -> CodeFragment | None:
+        """
+        Translate nested existentials over the same container whose variables do not depend on each other into code
+        that is linear in the size of the container, instead of nested loops:
+
+        - ∃x1 ∈ C. ... ∃xk ∈ C. ∀y ∈ {x1, ..., xk}. ψ(y) becomes a single pass over C; if the variables are required to
+          be different, this counts the distinct values in C that satisfy ψ;
+        - ∃x1 ∈ C. ... ∃xk ∈ C. ψ1(x1) ∧ ... ∧ ψk(xk) becomes ∃x1 ∈ C. ψ1(x1) ∧ ... ∧ ∃xk ∈ C. ψk(xk).
+
+        Return None if the quantifier does not have one of these forms.
+        """
+        bindings = []
+        formula = quantifier
+        while (isinstance(formula, QuantifierExpr) and formula.kind == EXISTS_SYMBOL
+               and (binding := single_binding(formula))):
+            bindings.append(binding)
+            formula = formula.formula
+        if len(bindings) < 2 or not formula:
+            return None
+        checkpoint = self.helper_checkpoint()
+        names = [var.to_c_identifier() for var, _ in bindings]
+        container_codes = [container.accept(self) for _, container in bindings]
+        container_code = container_codes[0]
+        if (any(c.value != container_code.value for c in container_codes)
+                or {v.to_c_identifier() for v in container_code.free_vars} & set(names)):
+            self.clear_helpers(checkpoint)
+            return None
+
+        different = False
+        universals = []
+        others = []
+        for c in conjuncts(formula):
+            if is_different(c, names):
+                different = True
+            elif is_universal_over(c, names):
+                universals.append(c)
+            else:
+                others.append(c)
+
+        if len(universals) == 1 and not others:
+            universal = universals[0]
+            var_name = universal.container.vars[0].to_c_identifier()
+            formula_code = universal.formula.accept(self)
+            free_vars = (frozenset(v for v in formula_code.free_vars if v.to_c_identifier() != var_name)
+                         | container_code.free_vars)
+            loop = f'for {var_name} in {container_code.value}'
+            if different:
+                # The variables must have different values, so duplicate elements of C are only counted once
+                return CodeFragment(f'len({{{var_name} {loop} if {formula_code.value}}}) >= {len(names)}',
+                                    precedence=PYTHON_PRIMITIVES['>='], free_vars=free_vars)
+            return CodeFragment(f'any({formula_code.value} {loop})', free_vars=free_vars)
+
+        if universals or different:
+            self.clear_helpers(checkpoint)
+            return None
+        invariant = []
+        by_var = {name: [] for name in names}
+        for code in (c.accept(self) for c in others):
+            mentioned = {v.to_c_identifier() for v in code.free_vars} & set(names)
+            if len(mentioned) > 1:
+                self.clear_helpers(checkpoint)
+                return None
+            (by_var[mentioned.pop()] if mentioned else invariant).append(code)
+        and_precedence = PYTHON_PRIMITIVES['and']
+        parts = [parenthesize(and_precedence, c) for c in invariant]
+        free_vars = set(chain.from_iterable(c.free_vars for c in invariant)) | container_code.free_vars
+        for name in names:
+            formula = ' and '.join(parenthesize(and_precedence, c) for c in by_var[name]) or 'True'
+            parts.append(f'any({formula} for {name} in {container_code.value})')
+            free_vars |= {v for c in by_var[name] for v in c.free_vars if v.to_c_identifier() != name}
+        return CodeFragment(' and '.join(parts), precedence=and_precedence, free_vars=frozenset(free_vars))
+
     def visit_time(self, time):
         self.add_import(Import('Time', ECO_ABST_MODULE))
         return CodeFragment(f'Time({repr(time.time)})')
@@ -113,3 +296,228 @@ class PythonVisitorForProfiles(PythonVisitor):
                                              doc_string=quantifier.doc_string),
                                 checkpoint=checkpoint)
 
+
+
+class ColumnarModeUnsupported(Exception):
+    pass
+
+
+COLUMNAR_LOGICAL_FUNCTIONS = {'and': 'all_of', 'or': 'any_of', 'not': 'negate'}
+COLUMNAR_INFIX_OPERATORS = {'+', '-', '*', '/', '==', '!=', '<', '<=', '>', '>='}
+
+
+class ColumnarVisitorForProfiles(PythonVisitorForProfiles):
+    """
+    Generates profile checkers that evaluate a profile for all entities at once (see ``optimistic_rt.columnar``).
+
+    Each free variable of the profile is a frame of entities, and the result has one element for each of its rows.
+    Quantifiers and sums over the elements of an entity ``x`` use an additional parameter ``x_elements``, which is the
+    frame of these elements.  Profiles that cannot be evaluated in columnar form (for example, those that relate
+    different elements of the same entity) raise ``ColumnarModeUnsupported``; use ``PythonVisitorForProfiles`` for
+    these.
+    """
+
+    def __init__(self, base_name, *args, **kwargs):
+        super().__init__(base_name, *args, **kwargs)
+        # Map each bound variable to the variable holding its container, and to the frame of its elements
+        self.owners = {}
+        self.element_frames = {}
+
+    def _runtime(self, name):
+        self.add_import(Import(name, ECO_COLUMNAR_MODULE))
+        return name
+
+    def _frame(self, var) -> QualifiedName:
+        return self.element_frames.get(var, var)
+
+    def _is_ancestor(self, var, level) -> bool:
+        while level is not None:
+            if level == var:
+                return True
+            level = self.owners.get(level)
+        return False
+
+    def _broadcast(self, code: CodeFragment, level):
+        """
+        Return the code of the given fragment, broadcast to the given level (a variable whose rows the values
+        correspond to)
+        """
+        value = code.value
+        code_level = getattr(code, 'level', None)
+        if code_level is None or code_level == level:
+            return value
+        path = []
+        while level != code_level:
+            path.append(level)
+            level = self.owners[level]
+        for var in reversed(path):
+            value = f'{self._runtime("broadcast")}({value}, {self._frame(var).to_c_identifier()})'
+        return value
+
+    def _aligned(self, codes, level=None):
+        """
+        Return the code of all the given fragments, broadcast to their deepest level (or to the given level), and
+        that level
+        """
+        levels = {code_level for code in codes if (code_level := getattr(code, 'level', None)) is not None}
+        if level is not None:
+            levels.add(level)
+        for candidate in levels:
+            if level is None or self._is_ancestor(level, candidate):
+                level = candidate
+        if any(not self._is_ancestor(code_level, level) for code_level in levels):
+            raise ColumnarModeUnsupported('Profile relates entities that do not contain each other')
+        return [self._broadcast(code, level) for code in codes], level
+
+    def _fragment(self, value, codes, level, precedence=None, frames=()):
+        free_vars = frozenset(chain.from_iterable(code.free_vars for code in codes)) | frozenset(frames)
+        result = CodeFragment(value, precedence=precedence, free_vars=free_vars)
+        result.level = level
+        return result
+
+    def visit_variable_access(self, variable: VariableAccess):
+        var = variable.name
+        frame = self._frame(var)
+        return self._fragment(f'{self._runtime("rows")}({frame.to_c_identifier()})', [], var, frames=[frame])
+
+    def visit_attribute_access(self, attr: AttributeAccess):
+        if self.attribute_mappings.get_mapping(attr.attribute.name.to_c_identifier()):
+            return super().visit_attribute_access(attr)
+        path = []
+        while isinstance(attr, AttributeAccess):
+            path.append(attr.attribute.name.to_c_identifier())
+            attr = attr.container
+        if not isinstance(attr, VariableAccess):
+            raise ColumnarModeUnsupported('Attributes are only supported on variables')
+        var = attr.name
+        frame = self._frame(var)
+        path_code = ', '.join(repr(name) for name in reversed(path))
+        return self._fragment(f'{self._runtime("column")}({frame.to_c_identifier()}, {path_code})', [], var,
+                              frames=[frame])
+
+    def visit_comparison_expr(self, comp: ComparisonExpr):
+        return self._operator_code(PYTHON_COMP_OPS[comp.op.name], [comp.lhs.accept(self), comp.rhs.accept(self)])
+
+    def visit_set_membership(self, expr: SetMembershipExpr):
+        return self._operator_code('in', [expr.element.accept(self), expr.container.accept(self)])
+
+    def visit_negation(self, expr: NegatedExpr):
+        return self._operator_code('not', [expr.expr.accept(self)])
+
+    def visit_between(self, between: BetweenExpr):
+        codes = [between.lb.accept(self), between.expr.accept(self), between.ub.accept(self)]
+        values, level = self._aligned(codes)
+        return self._fragment(f'{self._runtime("between")}({", ".join(values)})', codes, level)
+
+    def visit_function_appl_expr(self, appl: FunctionApplExpr):
+        if appl.method_target:
+            raise ColumnarModeUnsupported('Method calls are not supported in columnar mode')
+        return super().visit_function_appl_expr(appl)
+
+    def _operator_code(self, operator, codes):
+        values, level = self._aligned(codes)
+        if operator in COLUMNAR_LOGICAL_FUNCTIONS:
+            return self._fragment(f'{self._runtime(COLUMNAR_LOGICAL_FUNCTIONS[operator])}({", ".join(values)})',
+                                  codes, level)
+        if operator in ('in', 'not in'):
+            if getattr(codes[1], 'level', None) is not None:
+                raise ColumnarModeUnsupported('Only membership in constant sets is supported in columnar mode')
+            value = f'{self._runtime("is_in")}({", ".join(values)})'
+            if operator == 'not in':
+                value = f'{self._runtime("negate")}({value})'
+            return self._fragment(value, codes, level)
+        if operator in COLUMNAR_INFIX_OPERATORS:
+            precedence = PYTHON_PRIMITIVES.get(operator)
+            if len(values) == 1:
+                return self._fragment(f'{operator}({values[0]})', codes, level, precedence=precedence)
+            return self._fragment(f' {operator} '.join(f'({value})' for value in values), codes, level,
+                                  precedence=precedence)
+        raise ColumnarModeUnsupported(f'Operator {operator} is not supported in columnar mode')
+
+    def _application_to_code(self, function_name, doc_string, args, named_args=None):
+        if named_args:
+            raise ColumnarModeUnsupported('Named arguments are not supported in columnar mode')
+        name = function_name.name if isinstance(function_name, QualifiedName) else function_name
+        template = FUNCTION_TRANSLATIONS.get(name)
+        if template is not None and not isinstance(template, str):
+            if isinstance(template, dict):
+                raise ColumnarModeUnsupported(f'Function {name} is not supported in columnar mode')
+            # Transformed into other functions, which are translated by this method
+            return super()._application_to_code(function_name, doc_string, args)
+        if template is None and isinstance(function_name, QualifiedName) and is_math_name(function_name):
+            template = PYTHON_FUNCTION_TRANSLATIONS[name.lower()]
+        codes = [a.accept(self) for a in args]
+        if template is not None:
+            return self._operator_code(template, codes)
+        external = self._get_import(function_name)
+        if external:
+            if external.module != '':
+                self.add_import(external)
+            function = external.name
+        else:
+            function = self.function_name_translator.translate(function_name).name
+        values, level = self._aligned(codes)
+        return self._fragment(f'{self._runtime("apply")}({", ".join([function, *values])})', codes, level)
+
+    def _bind(self, container):
+        """
+        Bind the variable of a comprehension over the elements of an entity, and return the variable, the variable
+        holding the entity, and the conditions of the comprehension
+        """
+        if not (isinstance(container, ComprehensionContainerCode) and len(container.vars) == 1
+                and isinstance(container.container, VariableAccess)):
+            raise ColumnarModeUnsupported('Only comprehensions over the elements of a variable are supported')
+        var = container.vars[0]
+        owner = container.container.name
+        self.owners[var] = owner
+        self.element_frames[var] = QualifiedName(f'{self._frame(owner).to_c_identifier()}_elements',
+                                                 lexical_path=())
+        conditions = []
+        rest = container.rest
+        while rest is not None:
+            if not isinstance(rest, ComprehensionConditionCode):
+                raise ColumnarModeUnsupported('Only comprehensions over a single variable are supported')
+            conditions.append(rest.condition)
+            rest = rest.rest
+        return var, owner, conditions
+
+    def _group(self, function, term, container):
+        var, owner, conditions = self._bind(container)
+        codes = [term.accept(self) if term is not None else None,
+                 *(condition.accept(self) for condition in conditions)]
+        term_code = codes[0]
+        codes = [code for code in codes if code is not None]
+        values, level = self._aligned(codes, var)
+        if level != var:
+            raise ColumnarModeUnsupported('Profile relates elements of different entities')
+        elements = self._frame(var)
+        owner_frame = self._frame(owner)
+        args = [values[0] if term_code is not None else 'True', elements.to_c_identifier(),
+                owner_frame.to_c_identifier()]
+        condition_values = values[1:] if term_code is not None else values
+        if len(condition_values) > 1:
+            args.append(f'where={self._runtime("all_of")}({", ".join(condition_values)})')
+        elif condition_values:
+            args.append(f'where={condition_values[0]}')
+        return self._fragment(f'{self._runtime(function)}({", ".join(args)})', codes, owner,
+                              frames=[elements, owner_frame])
+
+    def visit_quantifier(self, quantifier: QuantifierExpr):
+        if quantifier.unique:
+            raise ColumnarModeUnsupported('Unique existentials are not supported in columnar mode')
+        function = 'group_all' if quantifier.kind == FOR_ALL_SYMBOL else 'group_any'
+        return self._group(function, quantifier.formula, quantifier.container)
+
+    def visit_aggregate_expr(self, aggregate: AggregateExpr):
+        if aggregate.operator != '+':
+            raise ColumnarModeUnsupported(f'Aggregate {aggregate.operator} is not supported in columnar mode')
+        return self._group('group_sum', aggregate.term, aggregate.container)
+
+    def visit_stream_expr(self, stream: StreamExpr):
+        raise ColumnarModeUnsupported('Streams are not supported in columnar mode')
+
+    def visit_subscripted_expr(self, sub: SubscriptedExpr):
+        raise ColumnarModeUnsupported('Subscripts are not supported in columnar mode')
+
+    def visit_conditional_expr(self, ifte):
+        raise ColumnarModeUnsupported('Conditional expressions are not supported in columnar mode')
@@ -1,6 +1,8 @@
 import itertools
+import math
+from collections import Counter
 from dataclasses import fields, is_dataclass, Field, astuple
-from typing import get_args
+from typing import get_args, Iterable, Iterator, Tuple
 
 from optimistic_client.load.knoweldge_class_generator import DataGenerator
 from optimistic_client.load.load_utils import is_solution, is_data_class, is_function, is_tuple, is_set, is_mapping, \
@@ -18,17 +20,73 @@ class AnalyzeInfo:
         self.discarded_field_keys = {}
         self.missing_domain_keys = {}
         self.extra_domain_keys = {}
+        self.missing_domain_counts = {}
+        self.extra_domain_counts = {}
 
     def is_active(self):
         return len(self.discarded_field_keys) > 0 or len(self.unique_required_types) > 0
 
 
+class ProductDomain:
+    """
+    The cartesian product of the sources of a domain, represented by its dimensions rather than by its elements.
+
+    Elements are tuples with one value from each dimension, and are iterated in sorted order.
+    """
+
+    def __init__(self, dimensions: Iterable[Iterable]):
+        self.dimensions = tuple(sorted(set(dimension)) for dimension in dimensions)
+        self._members = tuple(set(dimension) for dimension in self.dimensions)
+
+    def __len__(self):
+        return math.prod(len(dimension) for dimension in self.dimensions)
+
+    def __iter__(self):
+        return itertools.product(*self.dimensions)
+
+    def __contains__(self, key):
+        return len(key) == len(self._members) and all(value in members
+                                                      for value, members in zip(key, self._members))
+
+    def __repr__(self):
+        return f'ProductDomain({" x ".join(str(len(dimension)) for dimension in self.dimensions)} = {len(self)} keys)'
+
+    def missing(self, keys: set) -> Iterator[Tuple]:
+        """
+        Lazily generate, in sorted order, the elements of the domain that are not in `keys`, which must be a subset of
+        the domain.  Sub-products whose elements are all in `keys` are skipped without being enumerated.
+        """
+        depth = len(self.dimensions)
+        prefix_counts = Counter(key[:i] for key in keys for i in range(1, depth))
+        suffix_sizes = [math.prod(len(dimension) for dimension in self.dimensions[i:]) for i in range(depth + 1)]
+
+        def walk(prefix, index):
+            if index == depth - 1:
+                for value in self.dimensions[index]:
+                    key = (*prefix, value)
+                    if key not in keys:
+                        yield key
+            else:
+                for value in self.dimensions[index]:
+                    key = (*prefix, value)
+                    if prefix_counts[key] < suffix_sizes[index + 1]:
+                        yield from walk(key, index + 1)
+
+        return walk((), 0)
+
+
 class AnalyzeTotalMapping:
-    def __init__(self, cls, input_files, column_mappings, verbose=False):
+    def __init__(self, cls, input_files, column_mappings, verbose=False, lazy=False, max_report_keys=20):
+        """
+        If `lazy` is true, domains are not materialized: totality is checked by counting the distinct instance keys
+        that are in the domain, and only the first `max_report_keys` missing and extra keys are reported.
+        """
         self._cls = cls
         self._input_files = input_files
         self._column_mappings = column_mappings
         self._verbose = verbose
+        self._lazy = lazy
+        self._max_report_keys = max_report_keys
         self._gen = DataGenerator()
         self._sources = {}
         self._domain = {}
@@ -263,7 +321,9 @@ class AnalyzeTotalMapping:
                     ordered_domain_sources = []
                     for source in values:
                         ordered_domain_sources.append(self._sources[source.__name__])
-                    if len(ordered_domain_sources) > 1:
+                    if self._lazy:
+                        self._domain[field.name] = ProductDomain(ordered_domain_sources)
+                    elif len(ordered_domain_sources) > 1:
                         self._domain[field.name] = sorted(set(itertools.product(*ordered_domain_sources)))
                     else:
                         self._domain[field.name] = sorted(set(ordered_domain_sources[0]))
@@ -285,6 +345,9 @@ class AnalyzeTotalMapping:
                     missing_domain, extra_domain = [], []
                     instance_data = getattr(_problem, field.name)
                     domain_keys = get_args(field.type)[0]
+                    if self._lazy:
+                        self._verify_lazily(info, field, instance_data, domain_keys)
+                        continue
                     if is_function(domain_keys) or is_tuple(domain_keys):
                         missing_domain = sorted(self._domain[field.name] - instance_data.keys())
                         extra_domain = sorted(instance_data.keys() - self._domain[field.name])
@@ -303,6 +366,26 @@ class AnalyzeTotalMapping:
                     info.missing_domain_keys[field.name] = missing_domain
                     info.extra_domain_keys[field.name] = extra_domain
 
+    def _verify_lazily(self, info, field, instance_data, domain_keys):
+        domain = self._domain[field.name]
+        if is_data_class(domain_keys):
+            instance_keys = {astuple(instance) for instance in instance_data}
+        elif is_tuple(domain_keys):
+            instance_keys = set(instance_data)
+        else:
+            instance_keys = {(key,) for key in instance_data}
+        valid_keys = {key for key in instance_keys if key in domain}
+        extra_keys = sorted(instance_keys - valid_keys)
+
+        def as_reported(keys):
+            return [key[0] for key in keys] if len(domain.dimensions) == 1 else list(keys)
+
+        info.missing_domain_counts[field.name] = len(domain) - len(valid_keys)
+        info.missing_domain_keys[field.name] = as_reported(itertools.islice(domain.missing(valid_keys),
+                                                                            self._max_report_keys))
+        info.extra_domain_counts[field.name] = len(extra_keys)
+        info.extra_domain_keys[field.name] = as_reported(extra_keys[:self._max_report_keys])
+
     def report(self):
         sl = '\"'
         if not self._analyze_complete:
@@ -329,7 +412,8 @@ class AnalyzeTotalMapping:
                             _fields_names.append(field.name)
                         for field in sorted(_fields_names):
                             _domains.update(
-                                {key: sorted(value) for key, value in self._domain.items() if key == field})
+                                {key: value if self._lazy else sorted(value)
+                                 for key, value in self._domain.items() if key == field})
 
                         print(f' Sources:             {_sources}')
                         print(f' Domain:              {_domains}')
@@ -340,17 +424,21 @@ class AnalyzeTotalMapping:
                         key_names = ", ".join(iter(key.__name__ for key in key_values))
                         missing_domain = info.missing_domain_keys[field.name]
                         extra_domain = info.extra_domain_keys[field.name]
+                        missing_count = info.missing_domain_counts.get(field.name, len(missing_domain))
+                        extra_count = info.extra_domain_counts.get(field.name, len(extra_domain))
+                        missing_shown = f' (first {len(missing_domain)})' if missing_count > len(missing_domain) else ''
+                        extra_shown = f' (first {len(extra_domain)})' if extra_count > len(extra_domain) else ''
                         msg = f'  Domain of {sl}{field.name}{sl} field is '
-                        if missing_domain:
+                        if missing_count:
                             msg += f'{"missing mandatory" if "TotalMapping" == name else "missing (optional)"}'
                         else:
                             msg += 'complete'
-                        msg += f'{" and without extra keys" if not missing_domain and not extra_domain else ""}'
-                        msg += f'{f" {len(missing_domain)} keys {sl}{key_names}{sl} with values: {missing_domain}" if missing_domain else ""}'
+                        msg += f'{" and without extra keys" if not missing_count and not extra_count else ""}'
+                        msg += f'{f" {missing_count} keys {sl}{key_names}{sl} with values{missing_shown}: {missing_domain}" if missing_count else ""}'
                         print(msg)
-                        if extra_domain:
+                        if extra_count:
                             print(
-                                f'  Domain of \"{field.name}\" field has {len(extra_domain)} extra keys \"{key_names}\" with values: {extra_domain}')
+                                f'  Domain of \"{field.name}\" field has {extra_count} extra keys \"{key_names}\" with values{extra_shown}: {extra_domain}')
 
                     print()
                     if info.discarded_field_keys:
@@ -5,10 +5,10 @@ import json
 import math
 import numbers
 from dataclasses import fields, is_dataclass
-from functools import partial
-from functools import reduce
+from functools import lru_cache
+from itertools import islice, chain
 from types import FunctionType
-from typing import NewType, get_origin
+from typing import NewType, get_origin, Callable, Any, Sequence, Tuple, Iterator, Iterable
 
 from optimistic_client.load.load_utils import prepare_column_mapping, column_mapping
 
@@ -95,7 +95,24 @@ def typeit_csv_to_obj(val, field):
     # return field.type(val)
 
 
-def typeit_new_type_or_primitive_to_obj(val, field_type):
+def _to_bool(val):
+    the_val = val.strip().strip('"')
+    if is_number(the_val):
+        return int(the_val) != 0
+    else:
+        return True if the_val.lower() == 'true' else False
+
+
+def _to_str(val):
+    return str(val).strip().strip('"')
+
+
+@lru_cache(maxsize=None)
+def value_converter(field_type) -> Callable[[str], Any]:
+    """
+    Return a function that converts a CSV value into the given type (see ``typeit_new_type_or_primitive_to_obj``);
+    the type is analyzed only once
+    """
     _field_type = field_type
     #
     #  Handles typing.NewType
@@ -120,16 +137,88 @@ def typeit_new_type_or_primitive_to_obj(val, field_type):
     #  Handles primitives
     #
     if _field_type is bool:
-        the_val = val.strip().strip('"')
-        if is_number(the_val):
-            return int(the_val) != 0
-        else:
-            return True if the_val.lower() == 'true' else False
+        return _to_bool
 
     if _field_type is str:
-        return _field_type(val).strip().strip('"')
+        return _to_str
+
+    return _field_type
+
+
+def typeit_new_type_or_primitive_to_obj(val, field_type):
+    return value_converter(field_type)(val)
+
+
+class RowConverter:
+    """
+    Converts CSV rows (lists of strings) into tuples of values of the given types.
+
+    The converter is compiled once for each file: the index of each column in the header and the converter for each
+    type are resolved up front, instead of for each row.
+    """
+
+    def __init__(self, header: Sequence[str], columns: Sequence[str], types: Sequence):
+        index = {name: i for i, name in enumerate(header)}
+        for column in columns:
+            if column not in index:
+                raise KeyError(column)
+        self.columns = tuple(columns)
+        self._items = tuple((index[column], value_converter(t)) for column, t in zip(columns, types))
+
+    def __call__(self, row: Sequence[str]) -> tuple:
+        return tuple(convert(row[i]) for i, convert in self._items)
+
+
+class DataclassConverter(RowConverter):
+    """
+    Converts CSV rows into objects of a dataclass, using the given column mapping for its fields
+    """
+
+    def __init__(self, cls, header: Sequence[str], mapping=None):
+        the_fields = fields(cls)
+        prepared_mapping = prepare_column_mapping(mapping)
+        super().__init__(header,
+                         [column_mapping(field.name, prepared_mapping) for field in the_fields],
+                         [field.type for field in the_fields])
+        self.cls = cls
+        self.names = tuple(field.name for field in the_fields)
+
+    def make(self, values: tuple):
+        return self.cls(**dict(zip(self.names, values)))
+
+
+class KeysConverter(RowConverter):
+    """
+    Converts CSV rows into a value of the given key type, or a tuple of values if there are several key types; the
+    columns are named after the types, subject to the given column mapping
+    """
+
+    def __init__(self, keys: Sequence, header: Sequence[str], mapping=None, columns: Sequence[str] = None):
+        if columns is None:
+            prepared_mapping = prepare_column_mapping(mapping)
+            columns = [column_mapping(key.__name__, prepared_mapping) for key in keys]
+        super().__init__(header, columns, keys)
+        self.single = len(keys) == 1
+
+    def make(self, values: tuple):
+        return values[0] if self.single else values
 
-    return _field_type(val)
+
+CHUNK_SIZE = 10_000
+
+
+def csv_rows(csv_file) -> Tuple[Sequence[str], Iterator[Sequence[str]]]:
+    """
+    Return the header of an open CSV file and an iterator over its remaining non-empty rows
+    """
+    header = [h.strip() for h in csv_file.readline().split(',')]
+    return header, (row for row in csv.reader(csv_file) if row)
+
+
+def chunks(rows: Iterable, chunk_size: int = CHUNK_SIZE) -> Iterator[list]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
 
 
 class Verify:
@@ -200,23 +289,29 @@ class DataGenerator:
         return msg
 
     def create_objects(self, cls, file_name, key_mapping=None, verify=None):
+        return tuple(chain.from_iterable(self.iter_objects(cls, file_name, key_mapping, verify)))
+
+    def iter_objects(self, cls, file_name, key_mapping=None, verify=None, chunk_size=CHUNK_SIZE):
+        """
+        Read objects of the dataclass ``cls`` from a CSV file, yielding them in lists of at most ``chunk_size``
+        objects, so that large files need not be held in memory all at once
+        """
         if verify:
             the_keys = (field.name for field in fields(cls))
             verify._keys = the_keys
 
         with file_name.open(mode='r') as csv_file:
-            header = [h.strip() for h in csv_file.readline().split(',')]
-            trans = partial(self._transform, cls=cls, key_mapping=key_mapping, verify=verify)
-            return tuple(map(trans, enumerate(csv.DictReader(csv_file, fieldnames=header))))
-
-    def _transform(self, dict_, cls, key_mapping=None, verify=None):
-        domain_mapping = self._prepare_mapping(key_mapping)
-        the_dict = {field.name: typeit_csv_to_obj(dict_[1][self._column_mapping(field.name, domain_mapping)], field)
-                    for field in fields(cls)}
-        rs = cls(**the_dict)
-        if verify:
-            verify.check_unique([item for key, item in the_dict.items()], dict_[0])
-        return rs
+            header, rows = csv_rows(csv_file)
+            converter = DataclassConverter(cls, header, key_mapping)
+            index = 0
+            for chunk in chunks(rows, chunk_size):
+                objects = []
+                for values in map(converter, chunk):
+                    objects.append(converter.make(values))
+                    if verify:
+                        verify.check_unique(values, index)
+                    index += 1
+                yield objects
 
     def load_new_type_data(self, key: FunctionType, file_name, domain_mapping, verify=None):
         the_keys = (key,)
@@ -387,29 +482,11 @@ class DataGenerator:
         if verify:
             the_keys = (field.name for field in fields(keys_cls))
             verify._keys = the_keys
-        domain_dataclass_trans = partial(self._transform,
-                                         cls=keys_cls,
-                                         key_mapping=key_mapping)
-        range_dataclass_trans = partial(self._transform,
-                                        cls=value_cls,
-                                        key_mapping=value_mapping)
         with file_name.open(mode='r') as csv_file:
-            header = [h.strip() for h in csv_file.readline().split(',')]
-            trans = partial(self._transform_dataclass_to_dataclass,
-                            domain_dataclass_trans=domain_dataclass_trans,
-                            range_dataclass_trans=range_dataclass_trans,
-                            verify=verify)
-            return reduce(lambda a, b: {**a, **b}, map(trans, enumerate(csv.DictReader(csv_file, fieldnames=header))))
-
-    @staticmethod
-    def _transform_dataclass_to_dataclass(dict_,
-                                          domain_dataclass_trans,
-                                          range_dataclass_trans,
-                                          verify=None):
-        the_dict = {domain_dataclass_trans(dict_): range_dataclass_trans(dict_)}
-        if verify:
-            verify.check_unique(the_dict, dict_[0])
-        return the_dict
+            header, rows = csv_rows(csv_file)
+            domain_converter = DataclassConverter(keys_cls, header, key_mapping)
+            range_converter = DataclassConverter(value_cls, header, value_mapping)
+            return self._load_mapping(rows, domain_converter, range_converter, verify)
 
     def _create_domain_dataclass_to_range_value(self,
                                                 keys_cls,
@@ -421,39 +498,11 @@ class DataGenerator:
         if verify:
             the_keys = (field.name for field in fields(keys_cls))
             verify._keys = the_keys
-        domain_dataclass_trans = partial(self._transform,
-                                         cls=keys_cls,
-                                         key_mapping=key_mapping)
         with file_name.open(mode='r') as csv_file:
-            header = [h.strip() for h in csv_file.readline().split(',')]
-            trans = partial(self._transform_dataclass_to_key,
-                            values=map_value,
-                            domain_dataclass_trans=domain_dataclass_trans,
-                            value_mapping=value_mapping,
-                            verify=verify)
-            return reduce(lambda a, b: {**a, **b}, map(trans, enumerate(csv.DictReader(csv_file, fieldnames=header))))
-
-    def _transform_dataclass_to_key(self,
-                                    dict_,
-                                    values,
-                                    domain_dataclass_trans,
-                                    value_mapping=None,
-                                    verify=None):
-        range_mapping = self._prepare_mapping(value_mapping)
-
-        if len(values) > 1:
-            dict_values = tuple(
-                typeit_new_type_or_primitive_to_obj(dict_[1][self._column_mapping(value.__name__, range_mapping)],
-                                                    value)
-                for value in values)
-        else:
-            dict_values = typeit_new_type_or_primitive_to_obj(
-                dict_[1][self._column_mapping(values[0].__name__, range_mapping)], values[0])
-
-        the_dict = {domain_dataclass_trans(dict_): dict_values}
-        if verify:
-            verify.check_unique(the_dict, dict_[0])
-        return the_dict
+            header, rows = csv_rows(csv_file)
+            domain_converter = DataclassConverter(keys_cls, header, key_mapping)
+            range_converter = KeysConverter(map_value, header, value_mapping)
+            return self._load_mapping(rows, domain_converter, range_converter, verify)
 
     def _create_total_domain_key_mapping_to_range_dataclass(self, keys, map_value, file_name, key_mapping=None,
                                                             value_mapping=None,
@@ -462,31 +511,11 @@ class DataGenerator:
             verify_mapping = self._prepare_mapping(key_mapping)
             the_keys = (self._column_mapping(key.__name__, verify_mapping) for key in keys)
             verify._keys = the_keys
-        dataclass_trans = partial(self._transform,
-                                  cls=map_value,
-                                  key_mapping=value_mapping)
         with file_name.open(mode='r') as csv_file:
-            header = [h.strip() for h in csv_file.readline().split(',')]
-            trans = partial(self._transform_key_to_dataclass,
-                            keys=keys,
-                            dataclass_trans=dataclass_trans,
-                            key_mapping=key_mapping,
-                            verify=verify)
-            return reduce(lambda a, b: {**a, **b}, map(trans, enumerate(csv.DictReader(csv_file, fieldnames=header))))
-
-    def _transform_key_to_dataclass(self, dict_, keys, dataclass_trans, key_mapping=None, verify=None):
-        domain_mapping = self._prepare_mapping(key_mapping)
-        if len(keys) > 1:
-            dict_key = tuple(
-                typeit_new_type_or_primitive_to_obj(dict_[1][self._column_mapping(key.__name__, domain_mapping)], key)
-                for key in keys)
-        else:
-            dict_key = typeit_new_type_or_primitive_to_obj(
-                dict_[1][self._column_mapping(keys[0].__name__, domain_mapping)], keys[0])
-        the_dict = {dict_key: dataclass_trans(dict_)}
-        if verify:
-            verify.check_unique(the_dict, dict_[0])
-        return the_dict
+            header, rows = csv_rows(csv_file)
+            domain_converter = KeysConverter(keys, header, key_mapping)
+            range_converter = DataclassConverter(map_value, header, value_mapping)
+            return self._load_mapping(rows, domain_converter, range_converter, verify)
 
     def _create_domain_key_mapping(self, keys, file_name, key_mapping=None, verify=None):
         if verify:
@@ -494,43 +523,24 @@ class DataGenerator:
             the_keys = (self._column_mapping(key.__name__, verify_mapping) for key in keys)
             verify._keys = the_keys
         with file_name.open(mode='r') as csv_file:
-            header = [h.strip() for h in csv_file.readline().split(',')]
-            trans = partial(self._transform_domain,
-                            keys=keys,
-                            key_mapping=key_mapping,
-                            verify=verify)
-            return tuple(map(trans, enumerate(csv.DictReader(csv_file, fieldnames=header))))
-
-    def _transform_domain(self, dict_, keys, key_mapping=None, verify=None):
-        domain_mapping = self._prepare_mapping(key_mapping)
-        if len(keys) > 1:
-            rs = tuple(
-                typeit_new_type_or_primitive_to_obj(dict_[1][self._column_mapping(key.__name__, domain_mapping)], key)
-                for key in keys)
-        else:
-            num_of_columns = len(list(dict_[1].keys()))
-            if num_of_columns == 1:
-                requested_key = self._column_mapping(keys[0].__name__, domain_mapping)
-                if requested_key in dict_[1]:
-                    rs = typeit_new_type_or_primitive_to_obj(dict_[1][requested_key], keys[0])
-                else:
+            header, rows = csv_rows(csv_file)
+            columns = None
+            if len(keys) == 1 and len(set(header)) == 1:
+                requested_key = self._column_mapping(keys[0].__name__, self._prepare_mapping(key_mapping))
+                if requested_key not in header:
                     # Assume the header does not match the key, but
                     # since this is single column file, we take the values as is,
                     # relaxing the demand from user to provide mapping from the field to the CSV column
-                    for existing_key in dict_[1].keys():
-                        verify.single_csv_column_fix(requested_key, existing_key)
-                        rs = typeit_new_type_or_primitive_to_obj(dict_[1][existing_key], keys[0])
-
-            else:
-                rs = typeit_new_type_or_primitive_to_obj(
-                    dict_[1][self._column_mapping(keys[0].__name__, domain_mapping)], keys[0])
-
-        if verify:
-            if len(keys) > 1:
-                verify.check_unique(rs, dict_[0])
-            else:
-                verify.check_unique((rs,), dict_[0])
-        return rs
+                    columns = header[-1:]
+            converter = KeysConverter(keys, header, key_mapping, columns=columns)
+            result = []
+            for index, values in enumerate(map(converter, rows)):
+                if columns is not None and verify:
+                    verify.single_csv_column_fix(requested_key, columns[0])
+                result.append(converter.make(values))
+                if verify:
+                    verify.check_unique(values, index)
+            return tuple(result)
 
     def _create_total_domain_key_mapping_to_range_value(self, keys, map_value, file_name, key_mapping=None,
                                                         value_mapping=None, verify=None):
@@ -539,43 +549,20 @@ class DataGenerator:
             the_keys = (self._column_mapping(key.__name__, verify_mapping) for key in keys)
             verify._keys = the_keys
         with file_name.open(mode='r') as csv_file:
-            header = [h.strip() for h in csv_file.readline().split(',')]
-            trans = partial(self._transform_key_to_key,
-                            keys=keys,
-                            values=map_value,
-                            key_mapping=key_mapping,
-                            value_mapping=value_mapping,
-                            verify=verify)
-            return reduce(lambda a, b: {**a, **b}, map(trans, enumerate(csv.DictReader(csv_file, fieldnames=header))))
-
-    def _transform_key_to_key(self, dict_, keys, values, key_mapping=None, value_mapping=None, verify=None):
-        domain_mapping = self._prepare_mapping(key_mapping)
-        range_mapping = self._prepare_mapping(value_mapping)
-        if len(keys) > 1:
-            dict_key = \
-                tuple(
-                    typeit_new_type_or_primitive_to_obj(dict_[1][self._column_mapping(key.__name__, domain_mapping)],
-                                                        key)
-                    for key in keys)
-        else:
-            dict_key = typeit_new_type_or_primitive_to_obj(
-                dict_[1][self._column_mapping(keys[0].__name__, domain_mapping)], keys[0])
-
-        if len(values) > 1:
-            dict_values = tuple(
-                typeit_new_type_or_primitive_to_obj(dict_[1][self._column_mapping(value.__name__, range_mapping)],
-                                                    value)
-                for value in values)
-        else:
-            dict_values = typeit_new_type_or_primitive_to_obj(
-                dict_[1][self._column_mapping(values[0].__name__, range_mapping)], values[0])
+            header, rows = csv_rows(csv_file)
+            domain_converter = KeysConverter(keys, header, key_mapping)
+            range_converter = KeysConverter(map_value, header, value_mapping)
+            return self._load_mapping(rows, domain_converter, range_converter, verify)
 
-        # the_dict = {
-        #     dict_key: typeit_new_type_or_primitive_to_obj(dict_[1][self._column_mapping(values.__name__, range_mapping)], values)}
-        the_dict = {dict_key: dict_values}
-        if verify:
-            verify.check_unique(the_dict, dict_[0])
-        return the_dict
+    @staticmethod
+    def _load_mapping(rows, domain_converter, range_converter, verify=None):
+        result = {}
+        for index, row in enumerate(rows):
+            key = domain_converter.make(domain_converter(row))
+            result[key] = range_converter.make(range_converter(row))
+            if verify:
+                verify.check_unique((key,), index)
+        return result
 
     @staticmethod
     def _prepare_mapping(the_mapping):
@@ -1,4 +1,5 @@
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 from dataclasses import fields
 
@@ -28,21 +29,43 @@ def loadCsvAsTypeDict(fileName, cls):
         return tuple(map(trans, csv.DictReader(file)))
 
 
+def _load_field(cls, name, file_name, column_mapping=None):
+    generator = DataGenerator()
+    return generator.load_data(cls, name, file_name, column_mapping=column_mapping), generator.report()
+
+
 def create_problem_instance(cls,
                             input_files,
-                            column_mappings=None):
+                            column_mappings=None,
+                            workers=None):
+    """
+    Create an instance of the problem class `cls` from CSV input files, one for each field.
+
+    If `workers` is greater than 1, the files are loaded in parallel by that many processes.
+    """
     _constructor = {}
-    _generator = DataGenerator()
 
     if is_data_class(cls):
-        for field in fields(cls):
-            _constructor[field.name] = _generator.load_data(cls,
-                                                            field.name,
-                                                            input_files.get(field.name),
-                                                            column_mapping=column_mappings.get(field.name))
+        if workers and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {field.name: executor.submit(_load_field,
+                                                       cls,
+                                                       field.name,
+                                                       input_files.get(field.name),
+                                                       column_mappings.get(field.name))
+                           for field in fields(cls)}
+                results = {name: future.result() for name, future in futures.items()}
+        else:
+            results = {field.name: _load_field(cls,
+                                               field.name,
+                                               input_files.get(field.name),
+                                               column_mappings.get(field.name))
+                       for field in fields(cls)}
+        _constructor = {name: data for name, (data, report) in results.items()}
+        _report = '\n'.join(report for data, report in results.values() if report)
 
         print(
-            f'Create Problem Instance \"{cls.__name__}\":\n Data Loader Report:\n{_generator.report() or " Data is Ok"}\n')
+            f'Create Problem Instance \"{cls.__name__}\":\n Data Loader Report:\n{_report or " Data is Ok"}\n')
         _problem = cls(**_constructor)
     else:
         _problem = cls()
@@ -1,6 +1,9 @@
 import functools
+import operator
+from collections import OrderedDict, Counter
 from dataclasses import field, dataclass
 from functools import wraps
+from typing import NamedTuple, Optional, Callable, Any, Iterator
 
 from typing_extensions import dataclass_transform
 
@@ -45,20 +48,156 @@ def builtin(func):
     return func
 
 
-def memoize_method(func):
+GROUPED_COUNTS_ATTR = '**grouped-counts**'
+GROUPED_COUNTS_MAXSIZE = 64
+
+
+class AttributeKey(NamedTuple):
+    """
+    A key of ``grouped_count`` or ``grouped_sum`` whose value for an element is the given function applied to the
+    given attribute of the element; for example, ``AttributeKey(self.unique_assignment, 'number')``
+    """
+    function: Callable[[Any], Any]
+    attribute: str
+
+    def __call__(self, element):
+        return self.function(getattr(element, self.attribute))
+
+
+def _key_getter(key):
+    return operator.attrgetter(key) if isinstance(key, str) else key
+
+
+def _grouped_totals(obj, elements, by, term) -> Counter:
+    """
+    Return the totals of the term (or the counts, if the term is None) of the elements, grouped by the values of their
+    keys; see ``grouped_count``
+    """
+    keys = by if isinstance(by, tuple) else (by,)
+
+    def totals():
+        getters = [_key_getter(key) for key in keys]
+        group = (lambda e: tuple(getter(e) for getter in getters)) if isinstance(by, tuple) else getters[0]
+        if term is None:
+            return Counter(map(group, elements))
+        value = _key_getter(term)
+        result = Counter()
+        for e in elements:
+            result[group(e)] += value(e)
+        return result
+
+    # Iterators can only be used once, so their totals are not memoized
+    if isinstance(elements, Iterator):
+        return totals()
+    try:
+        store = obj.__dict__.setdefault(GROUPED_COUNTS_ATTR, _MemoStore())
+    except AttributeError:
+        return totals()
+    cache_key = (id(elements), keys, term)
+    cached = store.pop(cache_key, None)
+    if cached is None or cached[0] is not elements:
+        cached = (elements, totals())
+    # The most recently used entries are last, and the least recently used ones are removed
+    store[cache_key] = cached
+    if len(store) > GROUPED_COUNTS_MAXSIZE:
+        del store[next(iter(store))]
+    return cached[1]
+
+
+@builtin
+def grouped_count(obj, elements, by, values) -> int:
     """
-    Decorator to memoize previous results of func
+    Return the number of elements whose keys are equal to the given values.
+
+    Each key is either the name of an attribute of the elements, an ``AttributeKey``, or a function (usually a method
+    of the optimization problem) that takes an element; if ``by`` is a tuple of keys, ``values`` must be a tuple of the
+    same length.  For example, ``grouped_count(self, self.employees, ('type', self.floor_of), (t1, f1))`` is equivalent
+    to ``count(e for e in self.employees if e.type == t1 and self.floor_of(e) == f1)``.
+
+    The counts for all values are computed in a single pass over the elements, and the counts for the
+    ``GROUPED_COUNTS_MAXSIZE`` most recently used collections and keys are kept in the instance dictionary of ``obj``
+    (usually the optimization problem), so that later calls reuse them; the collection must not be modified in place
+    between calls.  Counts over iterators, or for objects without an instance dictionary, are not memoized.
     """
-    memory = {}
+    return _grouped_totals(obj, elements, by, None)[values]
+
+
+@builtin
+def grouped_sum(obj, elements, term, by, values):
+    """
+    Return the sum of the term over the elements whose keys are equal to the given values; the term is the name of an
+    attribute of the elements, an ``AttributeKey``, or a function that takes an element.
+
+    For example, ``grouped_sum(self, self.employees, 'salary', 'type', t1)`` is equivalent to
+    ``sum(e.salary for e in self.employees if e.type == t1)``; the sums are computed and memoized as the counts of
+    ``grouped_count``.
+    """
+    return _grouped_totals(obj, elements, by, term)[values]
+
+
+MEMO_ATTR = '**memo**'
+
+_MISSING = object()
+
+
+class MemoInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+
+
+class _MemoStore(dict):
+    """
+    Memoized results of an instance, keyed by memoized function; copies made by pickling start empty
+    """
+
+    def __reduce__(self):
+        return _MemoStore, ()
+
+
+def memoize_method(func=None, *, maxsize: int = None):
+    """
+    Decorator to memoize previous results of func, which is a method or a function whose first argument is an object.
+
+    Results (including ``None``) are kept in the instance dictionary of the first argument, so they are released
+    together with the instance.  Objects without an instance dictionary are not memoized.
+
+    The decorated function has a ``cache_info()`` method that returns the hit and miss counts over all instances, and
+    a ``cache_clear(obj)`` method that removes the results for the given instance.
+
+    :param maxsize: if given, only the ``maxsize`` most recently used results are kept for each instance
+    """
+    if func is None:
+        return functools.partial(memoize_method, maxsize=maxsize)
+    counts = [0, 0]
 
     @wraps(func)
     def memoized(*args, **kwargs):
-        if (result := memory.get((id(args[0]), *args[1:], imkw := tuple(sorted(kwargs.items()))))) is not None:
+        try:
+            memo = args[0].__dict__.setdefault(MEMO_ATTR, _MemoStore())
+        except AttributeError:
+            return func(*args, **kwargs)
+        if (results := memo.get(memoized)) is None:
+            results = memo[memoized] = {} if maxsize is None else OrderedDict()
+        key = (*args[1:], tuple(sorted(kwargs.items())))
+        if (result := results.get(key, _MISSING)) is not _MISSING:
+            counts[0] += 1
+            if maxsize is not None:
+                results.move_to_end(key)
             return result
+        counts[1] += 1
         result = func(*args, **kwargs)
-        memory[(id(args[0]), *args[1:], imkw)] = result
+        results[key] = result
+        if maxsize is not None and len(results) > maxsize:
+            results.popitem(last=False)
         return result
 
+    def cache_clear(obj):
+        getattr(obj, '__dict__', {}).get(MEMO_ATTR, {}).pop(memoized, None)
+
+    memoized.cache_info = lambda: MemoInfo(*counts, maxsize)
+    memoized.cache_clear = cache_clear
+    setattr(memoized, '**memoized**', True)
     return memoized
 
 
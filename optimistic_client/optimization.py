@@ -1,10 +1,13 @@
 import collections
+import operator
 import sys
 import typing
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, is_dataclass
 from numbers import Real
-from typing import Sequence, Set
+from typing import Sequence, Set, Iterable, NamedTuple, Tuple, Mapping, Any, Optional, Dict
 
+import numpy as np
 from typing_extensions import dataclass_transform
 
 from optimistic_client.meta.utils import memoize_method
@@ -43,31 +46,139 @@ def equals(a: Real, b: Real, epsilon: float = 1e-14):
     return abs(a - b) <= epsilon
 
 
+PRIMARY_KEY_INDEX_ATTR = '**primary-key-index**'
+
+
+def collection_primary_keys(cls) -> Optional[Dict[str, Tuple[str, ...]]]:
+    """
+    Return a mapping from the names of the ``Collection[...]`` fields of the given class whose elements are
+    dataclasses with primary-key fields (see ``metadata``) to the names of these primary-key fields.
+
+    :return: the mapping, or None if the type annotations of the class can't be resolved yet
+    """
+    try:
+        hints = typing.get_type_hints(cls)
+    except NameError:
+        return None
+    result = {}
+    for name, hint in hints.items():
+        args = typing.get_args(hint)
+        if (len(args) == 1 and isinstance(origin := typing.get_origin(hint), type)
+                and issubclass(origin, collections.abc.Collection) and is_dataclass(args[0])):
+            keys = tuple(f.name for f in fields(args[0]) if f.metadata.get('primary_key'))
+            if keys:
+                result[name] = keys
+    return result
+
+
 @dataclass_transform()
 class OptimizationProblem:
-    def __init_subclass__(cls, **kwargs):
+    def __init_subclass__(cls, memo_maxsize: int = None, **kwargs):
+        """
+        :param memo_maxsize: if given, the maximal number of results memoized by each method for each instance
+        """
         super().__init_subclass__(**kwargs)
         for name in dir(cls):
             if not name.startswith('__'):
                 m = getattr(cls, name)
-                if callable(m) and not hasattr(m, '**constraint**') and not hasattr(m, '**objective**'):
-                    setattr(cls, name, memoize_method(m))
+                if (callable(m) and not hasattr(m, '**constraint**') and not hasattr(m, '**objective**')
+                        and not hasattr(m, '**memoized**')):
+                    setattr(cls, name, memoize_method(m, maxsize=memo_maxsize))
+        # The constraint and objective methods are fixed once the class is defined
+        methods = [(name, m) for name in dir(cls) if not name.startswith('__') and callable(m := getattr(cls, name))]
+        cls._constraint_methods = tuple(name for name, m in methods if getattr(m, '**constraint**', False))
+        cls._objective_methods = tuple((name, w) for name, m in methods if (w := getattr(m, '**objective**', False)))
         dataclass(frozen=True)(
             cls)  # modifies cls, see https://docs.python.org/3/library/dataclasses.html#module-contents
+        # Computed on first lookup if some annotations refer to classes that are not defined yet
+        cls._primary_keys = collection_primary_keys(cls)
+
+    def primary_key_index(self, collection: str) -> Mapping[Any, Any]:
+        """
+        Return a mapping from primary keys to the elements of the given collection field; the key of an element is the
+        value of its primary-key field, or the tuple of values if it has several primary-key fields.
+
+        The index is computed on first use and kept in the instance dictionary; it is recomputed if the collection
+        attribute is replaced, but not if the collection is modified in place.
+        """
+        cls = type(self)
+        if cls._primary_keys is None:
+            cls._primary_keys = collection_primary_keys(cls)
+        try:
+            key_attrs = cls._primary_keys[collection]
+        except KeyError:
+            raise KeyError(f'Field {collection} of {cls.__name__} is not a collection with a primary key') from None
+        elements = getattr(self, collection)
+        indexes = self.__dict__.setdefault(PRIMARY_KEY_INDEX_ATTR, {})
+        cached = indexes.get(collection)
+        if cached is None or cached[0] is not elements:
+            key = operator.attrgetter(*key_attrs)
+            index = {}
+            for element in elements:
+                index.setdefault(key(element), element)
+            cached = indexes[collection] = (elements, index)
+        return cached[1]
+
+    def lookup(self, collection: str, *key):
+        """
+        Return the element of the given collection field with the given primary key; for example,
+        ``self.lookup('employees', number)`` instead of ``next(e for e in self.employees if e.number == number)``.
+
+        If the elements have several primary-key fields, the values of all of them must be given, in field order.
+
+        :raise KeyError: if there is no such element
+        """
+        return self.primary_key_index(collection)[key[0] if len(key) == 1 else key]
 
     def check_constraints(self, check_only: Sequence[str] = None) -> Sequence[str]:
         """
         Call all methods marked with `@constraint`, return list of failures
         :return: sequence of names of methods that didn't return True
         """
-        return [c for c in dir(self)
-                if callable(m := getattr(self, c)) and getattr(m, '**constraint**', False)
-                and (check_only is None or c in check_only)
-                and not m()]
+        return [c for c in self._constraint_methods
+                if (check_only is None or c in check_only)
+                and not getattr(self, c)()]
 
     def compute_objective(self, include_only: Sequence[str] = None) -> float:
-        return sum(m() * w
-                   for c in dir(self)
-                   if callable(m := getattr(self, c))
-                   and (include_only is None or c in include_only)
-                   and (w := getattr(m, '**objective**', False)))
+        return sum(getattr(self, c)() * w
+                   for c, w in self._objective_methods
+                   if include_only is None or c in include_only)
+
+
+class Evaluations(NamedTuple):
+    """
+    The results of ``evaluate_many``; the i'th element of each sequence corresponds to the i'th problem
+    """
+    violations: Sequence[Sequence[str]]
+    objectives: np.ndarray
+
+    @property
+    def feasible(self) -> np.ndarray:
+        """
+        Boolean array that is true for the problems that satisfy all their constraints
+        """
+        return np.fromiter((not v for v in self.violations), dtype=bool, count=len(self.violations))
+
+
+def _evaluate(problem: OptimizationProblem) -> Tuple[Sequence[str], float]:
+    return problem.check_constraints(), problem.compute_objective()
+
+
+def evaluate_many(problems: Iterable[OptimizationProblem], workers: int = None) -> Evaluations:
+    """
+    Check the constraints and compute the objective of each of the given problems (e.g., candidate solutions).
+
+    :param problems: the problems to evaluate
+    :param workers: if given and greater than 1, the problems are evaluated by a pool of this many processes; the
+        problems must then be picklable
+    :return: the names of the violated constraints of each problem, and an array of their objective values, in the
+        order given
+    """
+    problems = list(problems)
+    if workers is None or workers <= 1 or len(problems) <= 1:
+        results = [_evaluate(problem) for problem in problems]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_evaluate, problems, chunksize=max(1, len(problems) // (4 * workers))))
+    return Evaluations([violations for violations, _ in results],
+                       np.fromiter((objective for _, objective in results), dtype=float, count=len(results)))
@@ -10,7 +10,8 @@ def run_solution(name,
                  cls,
                  input_files_dict,
                  column_mapping=None,
-                 verbose=False):
+                 verbose=False,
+                 lazy_domains=False):
     verify_field_types = VerifyModelFieldTypes(cls)
     verify_field_types.verify()
     verify_field_types.report()
@@ -33,7 +34,8 @@ def run_solution(name,
     analyze = AnalyzeTotalMapping(cls,
                                   input_files_dict,
                                   column_mapping,
-                                  verbose=True)
+                                  verbose=True,
+                                  lazy=lazy_domains)
     analyze.analyze(_problem)
     analyze.report()
 
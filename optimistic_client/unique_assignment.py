@@ -1,5 +1,5 @@
 import operator
-from typing import Set, Tuple, Any
+from typing import Set, Tuple, Any, Mapping, Sequence
 from dataclasses import dataclass
 from optimistic_client.meta.utils import constraint, memoize_method, builtin, rename_attr
 
@@ -21,6 +21,32 @@ def assignment(resource='resource', activity='activity', as_data_class=False):
     return deco
 
 
+ASSIGNMENT_INDEX_ATTR = '**assignment-index**'
+
+
+@builtin
+def assignment_index(obj, key_attrs: Tuple[str, ...]) -> Mapping[Tuple[Any, ...], Sequence[Any]]:
+    """
+    Return a mapping from the values of the given attributes of the assignments in the solution of ``obj`` to the
+    assignments having these values, in solution order.
+
+    The index is computed once for each solution object and set of attributes, and is kept in the instance dictionary
+    of ``obj``; it is recomputed if the solution attribute is replaced, but not if the solution is modified in place.
+    """
+    solution = getattr(obj, 'solution')
+    instance_dict = getattr(obj, '__dict__', {})
+    cached = instance_dict.get(ASSIGNMENT_INDEX_ATTR)
+    if cached is None or cached[0] is not solution:
+        cached = instance_dict[ASSIGNMENT_INDEX_ATTR] = (solution, {})
+    indexes = cached[1]
+    if (index := indexes.get(key_attrs)) is None:
+        getters = [operator.attrgetter(attr) for attr in key_attrs]
+        index = indexes[key_attrs] = {}
+        for a in solution:
+            index.setdefault(tuple(getter(a) for getter in getters), []).append(a)
+    return index
+
+
 @builtin
 def has_unique_assignment(obj, wrt=('resource',)) -> bool:
     """"
@@ -28,23 +54,23 @@ def has_unique_assignment(obj, wrt=('resource',)) -> bool:
 
     :param wrt: attributes of `Assignment` for which the activity should be unique
     """
-    args = operator.attrgetter(*wrt)
-    return all(args(a1) != args(a2) or a1.activity == a2.activity
-               for a1 in getattr(obj, 'solution')
-               for a2 in getattr(obj, 'solution'))
+    if isinstance(wrt, str):
+        wrt = (wrt,)
+    return all(a.activity == group[0].activity
+               for group in assignment_index(obj, tuple(wrt)).values()
+               for a in group)
 
 
 @builtin
 def non_unique_assignment(obj, wrt=('resource',)) -> Set[Tuple[Any, ...]]:
-    args = operator.attrgetter(*wrt)
-    # return tuple((a1, a2)
-    #              for a1 in getattr(obj, 'solution')
-    #              for a2 in getattr(obj, 'solution')
-    #              if not (args(a1) != args(a2) or a1.activity == a2.activity))
+    if isinstance(wrt, str):
+        wrt = (wrt,)
     return set(tuple(sorted(sorted((a1, a2), key=lambda sol: sol.resource), key=lambda sol: sol.activity))
-               for a1 in getattr(obj, 'solution')
-               for a2 in getattr(obj, 'solution')
-               if not (args(a1) != args(a2) or a1.activity == a2.activity))
+               for group in assignment_index(obj, tuple(wrt)).values()
+               if len(group) > 1
+               for a1 in group
+               for a2 in group
+               if a1.activity != a2.activity)
 
 
 @builtin
@@ -55,12 +81,8 @@ def unique_assignment(objs, resource: Any, *args, wrt: Tuple = tuple()) -> Any:
     # defend against string wrt
     if isinstance(wrt, str):
         wrt = (wrt,)
-    # get_wrt = lambda obj: () if len(wrt) == 0 else tuple(operator.attrgetter(a)(obj) for a in wrt)
-    get_wrt = (lambda obj: tuple()) if len(wrt) == 0 else (operator.attrgetter(*wrt) if len(wrt) > 1 else
-                                                           lambda obj: (operator.attrgetter(*wrt)(obj),))
     # assert self.has_unique_assignment()
-    return next(a.activity for a in getattr(objs, 'solution')
-                if a.resource == resource and get_wrt(a) == args)
+    return next(a.activity for a in assignment_index(objs, ('resource', *wrt)).get((resource, *args), ()))
 
 
 class UniqueAssignment:
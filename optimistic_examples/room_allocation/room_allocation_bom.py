@@ -5,7 +5,7 @@ from typing import Collection, Set, Mapping
 from optimistic_examples.room_allocation import facilities_bom
 from optimistic_examples.room_allocation.facilities_bom import RoomType
 from optimistic_examples.room_allocation.resource_allocation_bom import Resource, ResourceAllocationProblem, Assignment
-from optimistic_client.meta.utils import count
+from optimistic_client.meta.utils import count, grouped_count, AttributeKey
 from optimistic_client.meta.infrastructure import KeepMembersMixin
 
 
@@ -128,9 +128,9 @@ class RoomAllocationProblem(ResourceAllocationProblem):
     # aux definition
     # @memoize_method
     def occupancy(self, f1, o1):
-        return count(e1 for e1 in self.employees
-                     if self.office_type_by_employee_type(e1.type) == o1
-                     and self.unique_assignment(e1) == f1)
+        return grouped_count(self, self.employees,
+                             (AttributeKey(self.office_type_by_employee_type, 'type'), self.unique_assignment),
+                             (o1, f1))
 
     def constraint3(self) -> bool:
         return all(self.occupancy(f1, o1) <= o1.max_occupancy * f1.rooms[o1]
@@ -7,7 +7,8 @@ from optimistic_examples.room_allocation.resource_allocation_bom import Resource
 
 from optimistic_client.optimization import OptimizationProblem
 from optimistic_client.unique_assignment import UniqueAssignment
-from optimistic_client.meta.utils import count, memoize_method, metadata, constraint, minimize
+from optimistic_client.meta.utils import count, grouped_count, AttributeKey, \
+    memoize_method, metadata, constraint, minimize
 from optimistic_examples.room_allocation.room_allocation_bom_2 import EmployeeType, OfficeType
 
 
@@ -99,9 +100,9 @@ class RoomAllocationProblem4(OptimizationProblem, UniqueAssignment):
 
     # aux definition
     def occupancy(self, f1, o1):
-        return count(e1 for e1 in self.employees
-                     if self.office_type_by_employee_type(e1.type) == o1
-                     and self.unique_assignment(e1) == f1)
+        return grouped_count(self, self.employees,
+                             (AttributeKey(self.office_type_by_employee_type, 'type'), self.unique_assignment),
+                             (o1, f1))
 
     # TODO: should be auto-generated based on key
     def get_office_availability(self, f1, o1):
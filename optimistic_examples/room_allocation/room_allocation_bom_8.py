@@ -2,7 +2,7 @@ import math
 from dataclasses import dataclass
 from typing import Collection, Set, NewType
 
-from optimistic_client.meta.utils import count, metadata, constraint, minimize
+from optimistic_client.meta.utils import count, grouped_count, AttributeKey, metadata, constraint, minimize
 from optimistic_client.optimization import OptimizationProblem
 from optimistic_client.unique_assignment import UniqueAssignment
 from optimistic_examples.room_allocation.resource_allocation_bom_2 import Resource, Assignment
@@ -76,16 +76,15 @@ class RoomAllocationProblem8(OptimizationProblem, UniqueAssignment):
         return {ofc.office_type for ofc in self.office_type_by_employee_type_table}
 
     def get_office_info(self, ot: OfficeType):
-        return next(oti for oti in self.office_info if oti.type_name == ot)
+        return self.lookup('office_info', ot)
 
     def office_type_by_employee_type(self, t_emp):
         return next(entry.office_type
                     for entry in self.office_type_by_employee_type_table
                     if entry.employee_type == t_emp)
 
-    # TODO: should be auto-generated based on key
     def get_office_availability(self, f1, o1):
-        return next(a.rooms for a in self.building if a.floor == f1 and a.office_type == o1)
+        return self.lookup('building', f1, o1).rooms
 
     # @constraint
     # def legal_assignment(self):
@@ -99,18 +98,18 @@ class RoomAllocationProblem8(OptimizationProblem, UniqueAssignment):
         return all(self.unique_assignment(e1.number) == self.unique_assignment(e1.team_lead)
                    for e1 in self.employees if not self.get_employee(e1.team_lead).is_independent)
 
-    # TODO: should be auto-generated based on key
     def get_employee(self, number):
-        return next(m for m in self.employees if m.number == number)
+        return self.lookup('employees', number)
 
     # aux definition
     def occupancy(self, f1: Floor, o1):
         """
         How many employees who need to be in offices of type o1 are placed on floor f1
         """
-        return count(e1 for e1 in self.employees
-                     if self.office_type_by_employee_type(e1.type) == o1
-                     and self.unique_assignment(e1.number) == f1)
+        return grouped_count(self, self.employees,
+                             (AttributeKey(self.office_type_by_employee_type, 'type'),
+                              AttributeKey(self.unique_assignment, 'number')),
+                             (o1, f1))
 
     @constraint
     def availability_constraint(self):
@@ -2,7 +2,8 @@ import math
 from dataclasses import dataclass
 from typing import Collection, Set, NewType
 
-from optimistic_client.meta.utils import count, metadata, constraint, minimize, record, solution_variable
+from optimistic_client.meta.utils import count, grouped_count, AttributeKey, \
+    metadata, constraint, minimize, record, solution_variable
 from optimistic_client.optimization import OptimizationProblem
 from optimistic_client.unique_assignment import UniqueAssignment
 from optimistic_examples.room_allocation.resource_allocation_bom_2 import Resource, Assignment
@@ -109,9 +110,10 @@ class RoomAllocationProblem8(OptimizationProblem, UniqueAssignment):
         """
         How many employees who need to be in offices of type o1 are placed on floor f1
         """
-        return count(e1 for e1 in self.employees
-                     if self.office_type_by_employee_type(e1.type) == o1
-                     and self.unique_assignment(e1.number) == f1)
+        return grouped_count(self, self.employees,
+                             (AttributeKey(self.office_type_by_employee_type, 'type'),
+                              AttributeKey(self.unique_assignment, 'number')),
+                             (o1, f1))
 
     @constraint
     def availability_constraint(self):
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any, Sequence, Optional
+from typing import Dict, Any, Sequence, Optional, TextIO
 from jinja2 import Environment, FileSystemLoader, Template, BaseLoader, PackageLoader
 
 from optimistic_process.config import OptimizationConfigFS
@@ -38,6 +38,10 @@ class ArtifactsOPL(ABC):
     def store_opl_dat(self, prepared: Sequence[str]):
         pass
 
+    @abstractmethod
+    def open_opl_dat(self) -> TextIO:
+        pass
+
     @abstractmethod
     def load_opl_dat(self):
         pass
@@ -121,6 +125,10 @@ class OptimizationModelOPLArtifactsFileSystem(ArtifactsOPL):
     def store_opl_dat(self, prepared: Sequence[str]):
         self._store(self.id_opl_dat(), prepared)
 
+    def open_opl_dat(self) -> TextIO:
+        self._create_file_system()
+        return self.id_opl_dat().open(mode='w', encoding='utf-8')
+
     def load_opl_dat(self):
         return self._load(self.id_opl_dat())
 
@@ -1,4 +1,5 @@
-from typing import Sequence, Mapping, Any
+from io import StringIO
+from typing import Sequence, Mapping, Any, TextIO
 
 import pandas as pd
 
@@ -61,33 +62,30 @@ class KnowledgeDrivenOptimizationModel(OptimizationModel):
         return self._solver
 
     def transform_input(self, input: OptimizationInput) -> str:
+        with StringIO() as buffer:
+            self.write_input(input, buffer)
+            return buffer.getvalue()
+
+    def write_input(self, input: OptimizationInput, file: TextIO, chunk_size: int = 100_000):
+        """
+        Write the given input as an OPL tuple set to the given stream.
+
+        Each column is formatted as a whole according to its type, and the table is processed in chunks of
+        ``chunk_size`` rows, so that the memory used doesn't depend on the size of the table.
+        """
         data_types = self._opl_model.get_input_fields_types(input.name)
         if self._debug:
             print(f'Transform Input {input.name}:\n {data_types}')
 
-        def _typeit(column_name, value):
-            if data_types[column_name] in ('int', 'integer'):
-                return f'{val}'
-
-            if data_types[column_name] in ('str', 'string'):
-                v = str(value).strip()
-                if v.startswith('"') and v.endswith('"'):
-                    return f'{v}'
-                return f'"{v}"'
-
-            return f'{val}'
-
-        results = f'{input.name} = {{ \n'
-
-        for index, row in input.table.iterrows():
-            s = []
-            for col, val in row.items():
-                s.append(_typeit(col, val))
-            results += f'\t<{" ".join(s)}>\n'
-
-        results += f'}};\n'
-
-        return results
+        file.write(f'{input.name} = {{ \n')
+        table = input.table
+        for start in range(0, len(table), chunk_size):
+            # Like iterrows(), take the values of each row with the common type of all columns
+            values = table.iloc[start:start + chunk_size].values
+            columns = [_format_column(values[:, i].tolist(), data_types[column])
+                       for i, column in enumerate(table.columns)]
+            file.writelines(f'\t<{" ".join(fields)}>\n' for fields in zip(*columns))
+        file.write(f'}};\n')
 
     def transform_solution(self, solution) -> Sequence[OptimizationOutput]:
         df = pd.read_csv(self._artifacts.id_optimization_solution())
@@ -95,3 +93,16 @@ class KnowledgeDrivenOptimizationModel(OptimizationModel):
 
     def transform_violated_constraints(self, solution) -> ViolatedConstraints:
         raise NotImplementedError
+
+
+def _format_string(value) -> str:
+    v = str(value).strip()
+    if v.startswith('"') and v.endswith('"'):
+        return v
+    return f'"{v}"'
+
+
+def _format_column(values: Sequence[Any], data_type: str) -> Sequence[str]:
+    if data_type in ('str', 'string'):
+        return [_format_string(v) for v in values]
+    return list(map('{}'.format, values))
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, Sequence
+from typing import Dict, Any, Optional, Sequence, TextIO
 
 from optimistic_process.artifacts import ArtifactsOPL
 from optimistic_process.models import OptimizationModel
@@ -21,6 +21,12 @@ class KnowledgeOptimizationModelSolver(OPLOptimizationModelSolver):
 
         return prepared_input
 
+    def write_input(self, file: TextIO):
+        # Same output as prepare_input(), without holding the formatted tables in memory
+        for data in self.inputs:
+            self.optimization_model.write_input(data, file)
+            file.write('\n')
+
     def template_properties(self, user_properties: Optional[Dict[str, Any]] = None):
         solution_fields_str = '\"\\"\" +'
         is_first = True
@@ -2,7 +2,7 @@ import re
 import time
 import subprocess
 from abc import ABC, abstractmethod
-from typing import Tuple, Collection, Dict, Any, Sequence, Optional
+from typing import Tuple, Collection, Dict, Any, Sequence, Optional, TextIO
 
 from optimistic_process.models import OptimizationModel, OptimizationModelSolver, OptimizationInput, OptimizationOutput, \
     OptimizationObjective, OptimizationMissingObjectiveException, SingleObjective, ViolatedConstraints, \
@@ -31,6 +31,14 @@ class OPLOptimizationModelSolver(OptimizationModelSolver, ABC):
     def prepare_input(self) -> Sequence[str]:
         raise NotImplementedError()
 
+    def write_input(self, file: TextIO):
+        """
+        Write the prepared input to the given stream; subclasses can override this to avoid preparing all the input in
+        memory
+        """
+        for data in self.prepare_input():
+            file.write(f'{data}\n')
+
     @abstractmethod
     def template_properties(self, user_properties: Optional[Dict[str, Any]] = None):
         raise NotImplementedError()
@@ -51,8 +59,8 @@ class OPLOptimizationModelSolver(OptimizationModelSolver, ABC):
 
     def _prepare_to_solve(self):
         self._prepare_opl_mod()
-        input_results = self.prepare_input()
-        self.artifacts.store_opl_dat(input_results)
+        with self.artifacts.open_opl_dat() as file:
+            self.write_input(file)
 
     def set_input(self, *inputs: OptimizationInput):
         for data in inputs:
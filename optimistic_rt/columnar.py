@@ -0,0 +1,116 @@
+"""
+Runtime support for profile checkers generated by ``ColumnarVisitorForProfiles``.
+
+Entities (legs, duties or pairings) are given as pandas data frames, with one row per entity and one column per
+attribute; nested attributes (such as the type of the aircraft of a leg) are columns whose names are the attribute
+names joined by dots (``aircraft.type``).  The elements of entities (such as the legs of duties) are given as a
+separate frame, whose ``owner`` column holds the position of the entity containing each element in the frame of the
+entities.
+
+Values are NumPy arrays with one element per row of the corresponding frame, or scalars for constants.
+"""
+
+from functools import reduce
+from numbers import Number
+
+import numpy as np
+
+OWNER_COLUMN = 'owner'
+
+
+def column(frame, *path):
+    return frame['.'.join(path)].to_numpy()
+
+
+def rows(frame):
+    return list(frame.itertuples(index=False))
+
+
+def as_array(values):
+    values = list(values)
+    if all(isinstance(v, (bool, np.bool_, Number, str)) for v in values):
+        return np.asarray(values)
+    result = np.empty(len(values), dtype=object)
+    result[:] = values
+    return result
+
+
+def apply(function, *args):
+    """
+    Apply a scalar function element-wise; scalar arguments are used for all elements
+    """
+    sizes = {len(arg) for arg in args if isinstance(arg, (np.ndarray, list))}
+    if not sizes:
+        return function(*args)
+    if len(sizes) > 1:
+        raise Exception(f'Cannot apply {function.__name__} to arguments of different lengths')
+    size = sizes.pop()
+    columns = [arg if isinstance(arg, (np.ndarray, list)) else [arg] * size for arg in args]
+    return as_array(function(*values) for values in zip(*columns))
+
+
+def is_in(values, constants):
+    if isinstance(values, np.ndarray):
+        return np.isin(values, list(constants))
+    return values in constants
+
+
+def negate(mask):
+    return np.logical_not(mask)
+
+
+def all_of(*masks):
+    return reduce(np.logical_and, masks)
+
+
+def any_of(*masks):
+    return reduce(np.logical_or, masks)
+
+
+def between(lb, values, ub):
+    return np.logical_and(lb <= values, values <= ub)
+
+
+def broadcast(values, elements):
+    """
+    Return the values of the entities containing each of the given elements
+    """
+    if not isinstance(values, np.ndarray):
+        return values
+    return values[elements[OWNER_COLUMN].to_numpy()]
+
+
+def _owners_where(mask, elements, where=None):
+    owners = elements[OWNER_COLUMN].to_numpy()
+    mask = np.broadcast_to(np.asarray(mask, dtype=bool), owners.shape)
+    if where is not None:
+        mask = mask & np.broadcast_to(np.asarray(where, dtype=bool), owners.shape)
+    return owners[mask]
+
+
+def group_all(mask, elements, entities, where=None):
+    """
+    Return, for each entity, whether the mask is true for all its elements that satisfy the `where` condition
+    """
+    failed = _owners_where(np.logical_not(mask), elements, where)
+    return np.bincount(failed, minlength=len(entities)) == 0
+
+
+def group_any(mask, elements, entities, where=None):
+    """
+    Return, for each entity, whether the mask is true for some element that satisfies the `where` condition
+    """
+    satisfied = _owners_where(mask, elements, where)
+    return np.bincount(satisfied, minlength=len(entities)) > 0
+
+
+def group_sum(values, elements, entities, where=None):
+    """
+    Return, for each entity, the sum of the values of its elements that satisfy the `where` condition
+    """
+    owners = elements[OWNER_COLUMN].to_numpy()
+    values = np.broadcast_to(np.asarray(values), owners.shape)
+    if where is not None:
+        selected = np.broadcast_to(np.asarray(where, dtype=bool), owners.shape)
+        owners, values = owners[selected], values[selected]
+    return np.bincount(owners, weights=values, minlength=len(entities))
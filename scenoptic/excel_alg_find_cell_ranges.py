@@ -1,6 +1,7 @@
 from typing import Sequence, TypedDict, Tuple, Set, Callable, Any
 
 import more_itertools
+import numpy as np
 
 from scenoptic.excel_to_math import CellSpec
 
@@ -153,6 +154,69 @@ class FindCellRangesByTuples(FindCellRanges):
         return (row, col) in self.data
 
 
+class FindCellRangesArray(FindCellRanges):
+    """
+    The same algorithm as ``FindCellRanges``, implemented over a boolean NumPy array of the active cells.
+
+    Since cells are never re-activated, the top-left corner of the next range is always found at or after that of the
+    previous one (in row-major order); a cursor over the active cells makes the search for all corners linear in the
+    number of active cells.  Rows are checked and ranges are marked using array slices.
+
+    Use ``from_tuples`` to create an instance from the sparse representation used by ``FindCellRangesByTuples``.
+    """
+
+    def __init__(self,
+                 sheet: str,
+                 matrix: Sequence[Sequence[int]] = None,
+                 n_columns: int = None,
+                 n_rows: int = None):
+        super().__init__(sheet=sheet, matrix=matrix, n_columns=n_columns, n_rows=n_rows)
+        self.active = np.asarray(matrix) == 1
+        self.corners = None
+        self.cursor = 0
+
+    @classmethod
+    def from_tuples(cls, sheet: str, data: Set[Tuple[int, int]]):
+        rows, cols = np.array(list(data)).T
+        matrix = np.zeros((rows.max() + 1, cols.max() + 1), dtype=np.int8)
+        matrix[rows, cols] = 1
+        return cls(sheet=sheet, matrix=matrix)
+
+    def _build(self):
+        # Row-major flat indexes of all active cells, in increasing order
+        self.corners = np.flatnonzero(self.active)
+        self.total_expected_cells_area = len(self.corners)
+
+    def _mark_range_as_found(self, start_col: int, start_row: int, end_col: int, end_row: int):
+        self.active[start_row:end_row + 1, start_col:end_col + 1] = False
+
+    def _is_cell_active(self, row: int, col: int) -> bool:
+        return bool(self.active[row, col])
+
+    def _find_next_range(self) -> RangeSpec:
+        flat_active = self.active.ravel()
+        while not flat_active[self.corners[self.cursor]]:
+            self.cursor += 1
+        start_row, start_col = divmod(int(self.corners[self.cursor]), self.number_of_columns)
+        end_col = self.number_of_columns - 1
+        candidate = dict(sheet=self.sheet,
+                         start_row=start_row,
+                         start_col=start_col,
+                         end_row=self.number_of_rows - 1,
+                         end_col=end_col)
+        for i in range(start_row, self.number_of_rows):
+            row = self.active[i, start_col:end_col + 1]
+            if not row[0]:
+                candidate['end_row'] = i - 1
+                if row.any():
+                    candidate['end_col'] = start_col + int(row.argmax()) - 1
+                return candidate
+            if not row.all():
+                end_col = start_col + int(row.argmin()) - 1
+                candidate['end_col'] = end_col
+        return candidate
+
+
 class AnalyzeCellRanges:
     """
     Wrapper handler for analyzing cell ranges,
@@ -196,8 +260,7 @@ class AnalyzeCellRanges:
                 if not sheet_candidates:
                     continue
 
-                find = FindCellRangesByTuples(sheet=u_sheet,
-                                              data=sheet_candidates)
+                find = FindCellRangesArray.from_tuples(sheet=u_sheet, data=sheet_candidates)
                 result = find.analyze()
                 only_ranges, only_cells = more_itertools.partition(
                     lambda r: r['start_row'] == r['end_row'] and r['start_col'] == r['end_col'],
@@ -219,8 +282,9 @@ class AnalyzeCellRanges:
         for u_sheet in unique_sheets:
             sheet_candidates = {cell[1:3] for cell in candidates if
                                 self.is_same_sheet(cell, u_sheet) and self._is_ok(cell)}
-            find = FindCellRangesByTuples(sheet=u_sheet,
-                                          data=sheet_candidates)
+            if not sheet_candidates:
+                continue
+            find = FindCellRangesArray.from_tuples(sheet=u_sheet, data=sheet_candidates)
             result = find.analyze()
             only_ranges, only_cells = more_itertools.partition(
                 lambda r: r['start_row'] == r['end_row'] and r['start_col'] == r['end_col'],
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import sys
 from io import StringIO
 from typing import Tuple, Dict, Union, Literal, Sequence
 
@@ -10,7 +11,7 @@ from ExcelParser import ExcelParser
 from scenoptic.excel_analyze_variability import VariabilityTree, bind_cell_variability_by_tree
 from scenoptic.excel_data import CellReference
 from scenoptic.excel_to_math import Scenario, CellSpec
-from scenoptic.parse_excel import get_excel_parser
+from scenoptic.parse_excel import get_excel_parser, formula_parse_tree
 from scenoptic.xl_utils import range_to_cells, cell_to_coords, column_to_index, get_cell_re_dict
 
 
@@ -162,9 +163,18 @@ def compute_distance(origin_cell_spec, candidate_cell_spec) -> Tuple[int, int]:
 
 
 def cell_parse_tree(spec: CellSpec, scenario: Scenario, verbose=False) -> Union[ParserRuleContext, None]:
-    parse = get_parser(spec, scenario, verbose)
-    if parse:
-        parse_tree = parse.start()
+    """
+    Return the parse tree of the formula in the given cell, or None if the cell doesn't contain a formula.
+
+    Parse trees are cached in the scenario, so that each formula is parsed only once even when it is compared with
+    many candidate cells.
+    """
+    content = get_content(spec, scenario)
+    if isinstance(content, str) and (content := content.strip()).startswith('='):
+        if verbose:
+            print(f'Cell{spec}  {content}')
+        parse_tree = formula_parse_tree(content, scenario, spec['sheet'] or scenario.specification_sheet_name(),
+                                        spec['row'], spec['col'])
         # TODO fetch forumula instead
         if not any(isinstance(e, ExcelParser.FormulaContext) for e in parse_tree.getChildren()):
             print(f'Cell "{spec}" does not contain a formula')
@@ -173,6 +183,69 @@ def cell_parse_tree(spec: CellSpec, scenario: Scenario, verbose=False) -> Union[
     return None
 
 
+def r1c1_cell(cell_name: str, row: int, col: int) -> str:
+    """
+    Return the R1C1 representation of a cell reference relative to the cell (row, col) that contains it; for example,
+    B3 in D2 is R[1]C[-2], and $B$3 is R3C2.
+    """
+    info = get_cell_re_dict(cell_name)
+    cell_row = int(info['row'])
+    cell_col = column_to_index(info['col'])
+    row_part = f'R{cell_row}' if info['row_fix'] else f'R[{cell_row - row}]'
+    col_part = f'C{cell_col}' if info['col_fix'] else f'C[{cell_col - col}]'
+    return row_part + col_part
+
+
+def _collect_shape(node: Union[TerminalNodeImpl, RuleContext], row: int, col: int, parts: list) -> None:
+    if isinstance(node, TerminalNodeImpl):
+        if node.getSymbol().type == ExcelParser.CELL:
+            parts.append(r1c1_cell(node.getText(), row, col))
+        else:
+            parts.append(repr(node.getText()))
+    else:
+        parts.append(f'{type(node).__name__}(')
+        for i in range(node.getChildCount()):
+            _collect_shape(node.getChild(i), row, col, parts)
+        parts.append(')')
+
+
+def formula_shape(parse_tree: ParserRuleContext, row: int, col: int) -> str:
+    """
+    Return a canonical representation of the given formula parse tree, where cell references that are not fixed are
+    written in R1C1 style relative to the cell (row, col) containing the formula.
+
+    Two formulas with equal shapes are compatible according to ``check_compatible_formula``.  The result is interned,
+    so that shapes can be compared by identity.
+    """
+    parts = []
+    _collect_shape(parse_tree, row, col, parts)
+    return sys.intern(' '.join(parts))
+
+
+def cell_formula_shape(spec: CellSpec, scenario: Scenario) -> Union[str, None]:
+    """
+    Return the shape of the formula in the given cell (see ``formula_shape``), or None if the cell doesn't contain a
+    formula.  Shapes are computed only once for each parse tree.
+    """
+    parse_tree = cell_parse_tree(spec, scenario)
+    if parse_tree is None:
+        return None
+    shapes = scenario.parse_tree_cache.shapes
+    shape = shapes.get(parse_tree)
+    if shape is None:
+        shape = shapes[parse_tree] = formula_shape(parse_tree, spec['row'], spec['col'])
+    return shape
+
+
+def same_formula_shape(origin_cell: str, candidate_cell: str, scenario: Scenario) -> bool:
+    """
+    Fast sufficient test for compatibility of the formulas in the given cells.  If this returns False, the cells may
+    still be compatible when they differ only in fixed markers of references that don't move.
+    """
+    origin_shape = cell_formula_shape(get_cell(origin_cell), scenario)
+    return origin_shape is not None and origin_shape is cell_formula_shape(get_cell(candidate_cell), scenario)
+
+
 def extract_variability(child_path_to_cell_ref, verbose=False) -> Tuple[VariabilityTree, Sequence[CellReference]]:
     cell_references = []
     variability = set(child_path_to_cell_ref.keys())
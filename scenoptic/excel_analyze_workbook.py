@@ -1,9 +1,10 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 
-from typing import Sequence
+from typing import Sequence, Dict
 
 from math_rep.expression_types import QualifiedName
-from scenoptic.excel_analyze import check_compatible_formula
+from scenoptic.excel_analyze import check_compatible_formula, same_formula_shape
 from scenoptic.excel_analyze_variability import VariabilityTree
 from scenoptic.excel_data import CellReference
 from scenoptic.excel_to_math import Scenario
@@ -54,7 +55,15 @@ class AnalyzeWorkbook:
                       variability: VariabilityTree,
                       cell_references: Sequence[CellReference],
                       verbose=False):
-        if origin_cell_qn is None or variability is None:
+        if origin_cell_qn is None:
+            return
+        if variability is None and compatible_cells:
+            # All cells were matched by shape; compute the variability once for the whole group
+            variability, cell_references = check_compatible_formula(origin_cell_qn.name,
+                                                                    compatible_cells[0].name,
+                                                                    self.scenario,
+                                                                    verbose=verbose)
+        if variability is None:
             return
         if self.registry.get(origin_cell_qn) is not None:
             raise AttributeError(f"Origin element {origin_cell_qn} already exists")
@@ -68,49 +77,90 @@ class AnalyzeWorkbook:
         self.cell_references = None
         self.compatible_cells = []
 
-    def analyze(self, verbose=False):
-        for sheet_name in self.scenario.wb.sheetnames:
+    def analyze(self, verbose=False, workers: int = None):
+        """
+        Find the groups of compatible cells in all sheets of the workbook.
+
+        :param verbose: Set to True when logging is requested for testing or debugging purposes
+        :param workers: if given and greater than 1, sheets are analyzed in parallel by a pool of this many processes;
+            the resulting registry is identical to that of the serial analysis
+        """
+        sheet_names = self.scenario.wb.sheetnames
+        if workers is None or workers <= 1 or len(sheet_names) <= 1:
+            for sheet_name in sheet_names:
+                self.analyze_sheet(sheet_name, verbose=verbose)
+            return
+        with ProcessPoolExecutor(max_workers=min(workers, len(sheet_names)),
+                                 initializer=_init_worker, initargs=(self.scenario,)) as executor:
+            # map() returns the results in sheet order, so the merged registry has the same order as the serial one
+            for sheet_registry in executor.map(_analyze_sheet_in_worker, sheet_names, [verbose] * len(sheet_names)):
+                for origin, compatible_cells in sheet_registry.items():
+                    if self.registry.get(origin) is not None:
+                        raise AttributeError(f"Origin element {origin} already exists")
+                    self.registry[origin] = compatible_cells
+
+    def analyze_sheet(self, sheet_name: str, verbose=False):
+        """
+        Find the groups of compatible cells in the given sheet, and add them to the registry
+        """
+        if verbose:
+            print(f'Analyze sheet {sheet_name}')
+        ws = self.scenario.wb[sheet_name]
+        origin_qn = None
+        for row, col, cur_cell_qn in self._xl_column_range_elements(1, 1, ws.max_column, ws.max_row, sheet_name):
             if verbose:
-                print(f'Analyze sheet {sheet_name}')
-            ws = self.scenario.wb[sheet_name]
-            origin_qn = None
-            for row, col, cur_cell_qn in self._xl_column_range_elements(1, 1, ws.max_column, ws.max_row, sheet_name):
-                if verbose:
-                    print(f'Cur Cell {cur_cell_qn}  Origin {origin_qn}')
-                if self.scenario.get_type(cur_cell_qn) is None:
-                    # The current cell is not registered as valid typed cell
-                    self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
-                                       verbose=verbose)
-                    origin_qn = None
+                print(f'Cur Cell {cur_cell_qn}  Origin {origin_qn}')
+            if self.scenario.get_type(cur_cell_qn) is None:
+                # The current cell is not registered as valid typed cell
+                self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
+                                   verbose=verbose)
+                origin_qn = None
+                continue
+            cur_value = self.scenario.cell_value(row, col, sheet=sheet_name)
+            if cur_value is None:
+                # Empty cell, with no value is skipped.
+                self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
+                                   verbose=verbose)
+                origin_qn = None
+                continue
+            if origin_qn is None:
+                origin_qn = cur_cell_qn
+                continue
+            if self.scenario.get_type(cur_cell_qn).same_math_type(self.scenario.get_type(origin_qn)):
+                if same_formula_shape(origin_qn.name, cur_cell_qn.name, self.scenario):
+                    self.compatible_cells.append(cur_cell_qn)
                     continue
-                cur_value = self.scenario.cell_value(row, col, sheet=sheet_name)
-                if cur_value is None:
-                    # Empty cell, with no value is skipped.
+                result = check_compatible_formula(origin_qn.name,
+                                                  cur_cell_qn.name,
+                                                  self.scenario,
+                                                  verbose=verbose)
+                if result is False:
+                    # The formula are not compatible, set current cell as new origin
                     self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
                                        verbose=verbose)
-                    origin_qn = None
-                    continue
-                if origin_qn is None:
                     origin_qn = cur_cell_qn
                     continue
-                if self.scenario.get_type(cur_cell_qn).same_math_type(self.scenario.get_type(origin_qn)):
-                    result = check_compatible_formula(origin_qn.name,
-                                                      cur_cell_qn.name,
-                                                      self.scenario,
-                                                      verbose=verbose)
-                    if result is False:
-                        # The formula are not compatible, set current cell as new origin
-                        self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
-                                           verbose=verbose)
-                        origin_qn = cur_cell_qn
-                        continue
-
-                    self.variability, self.cell_references = result
-                    self.compatible_cells.append(cur_cell_qn)
-                else:
-                    self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
-                                       verbose=verbose)
-                    origin_qn = cur_cell_qn
 
-            self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
-                               verbose=verbose)
+                self.variability, self.cell_references = result
+                self.compatible_cells.append(cur_cell_qn)
+            else:
+                self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
+                                   verbose=verbose)
+                origin_qn = cur_cell_qn
+
+        self._store_origin(origin_qn, self.compatible_cells, self.variability, self.cell_references,
+                           verbose=verbose)
+
+
+_worker_scenario: Scenario = None
+
+
+def _init_worker(scenario: Scenario):
+    global _worker_scenario
+    _worker_scenario = scenario
+
+
+def _analyze_sheet_in_worker(sheet_name: str, verbose: bool) -> Dict[QualifiedName, CompatibleCells]:
+    analyzer = AnalyzeWorkbook(_worker_scenario)
+    analyzer.analyze_sheet(sheet_name, verbose=verbose)
+    return analyzer.registry
@@ -0,0 +1,108 @@
+import hashlib
+import pickle
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple, Union
+
+from math_rep.expression_types import QualifiedName
+from scenoptic.excel_data import CellType
+
+BUILD_STATE_VERSION = 1
+BUILD_STATE_SUFFIX = '.state'
+
+
+def type_signature(ctype: Optional[CellType]) -> Optional[Tuple]:
+    if ctype is None:
+        return None
+    return (type(ctype).__name__, *(f'{name}={value}' for name, value in sorted(vars(ctype).items())))
+
+
+def cell_signature(contents: Any, ctype: Optional[CellType], is_parameter: bool) -> str:
+    """
+    Return a hash of everything the translation of a cell and its dependents depends on.
+
+    Only the formulas of cells are included; for other cells only whether they are empty is included, since the
+    values of constants are read again on every build and don't affect the translation of other cells.
+    """
+    if isinstance(contents, str) and contents.strip().startswith('='):
+        kind = contents.strip()
+    else:
+        kind = '*constant*' if contents is not None and contents != '' else '*empty*'
+    return hashlib.sha1(repr((kind, type_signature(ctype), is_parameter)).encode('utf8')).hexdigest()
+
+
+@dataclass
+class CellEntry:
+    """
+    The translation of a cell formula from a previous build
+    """
+    text: str
+    uses_epsilon: bool
+    predecessors: Tuple[QualifiedName, ...]
+
+
+class BuildState:
+    """
+    The state of a previous build of a scenario, used to translate again only the cells whose formulas or types have
+    changed, and the cells that depend on them.
+
+    The state is valid only for builds with the same key, which must include all scenario-wide information that affects
+    the translation (such as the sheet, the parameters and the objectives).
+    """
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        # signatures of all cells analyzed in the build (see ``cell_signature``)
+        self.signatures: Dict[QualifiedName, str] = {}
+        # translations of the cells that contain formulas
+        self.entries: Dict[QualifiedName, CellEntry] = {}
+        self.reused = 0
+        self.translated = 0
+
+    @classmethod
+    def load(cls, path: Union[str, Path], key: Hashable) -> 'BuildState':
+        """
+        Load the build state from the given file; return an empty state if the file doesn't exist or is not compatible
+        """
+        try:
+            with open(path, 'rb') as f:
+                version, state = pickle.load(f)
+        except Exception:
+            # Stale or corrupt files can raise almost anything while unpickling
+            return cls(key)
+        if version != BUILD_STATE_VERSION or not isinstance(state, cls) or state.key != key:
+            return cls(key)
+        state.reused = 0
+        state.translated = 0
+        return state
+
+    def save(self, path: Union[str, Path]):
+        with open(path, 'wb') as f:
+            pickle.dump((BUILD_STATE_VERSION, self), f)
+
+    def invalid_cells(self, signature: Callable[[QualifiedName], str]) -> Set[QualifiedName]:
+        """
+        Return the cells whose formulas must be translated again: those whose signature has changed, and all cells
+        that depend on them, directly or indirectly
+        """
+        dependents = defaultdict(set)
+        for cell, entry in self.entries.items():
+            for pred in entry.predecessors:
+                dependents[pred].add(cell)
+        agenda = [cell for cell, previous in self.signatures.items() if signature(cell) != previous]
+        invalid = set()
+        while agenda:
+            cell = agenda.pop()
+            if cell not in invalid:
+                invalid.add(cell)
+                agenda.extend(dependents.get(cell, ()))
+        return invalid
+
+    def reusable(self, cell: QualifiedName, invalid: Set[QualifiedName]) -> Optional[CellEntry]:
+        if cell in invalid:
+            return None
+        return self.entries.get(cell)
+
+    def report(self) -> str:
+        return f'Build state: {self.reused} cells reused, {self.translated} cells translated'
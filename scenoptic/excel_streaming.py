@@ -0,0 +1,106 @@
+"""
+A read-only workbook that is streamed once into a compact in-memory store.
+
+``StreamingWorkbook`` and ``StoredSheet`` provide the subset of the openpyxl ``Workbook`` and ``Worksheet`` API used by
+``Scenario`` and ``AnalyzeWorkbook``, so they can be used in place of a fully-loaded openpyxl workbook.
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Sequence, NamedTuple, Any, Optional, Union
+
+from openpyxl import load_workbook
+
+from scenoptic.xl_utils import cell_to_coords
+
+
+class StoredCell(NamedTuple):
+    value: Any
+
+
+EMPTY_CELL = StoredCell(None)
+
+
+class StoredSheet:
+    """
+    The values (including formula strings) of the non-empty cells of a sheet, stored by column and then by row
+    """
+
+    def __init__(self, title: str):
+        self.title = title
+        self.columns: Dict[int, Dict[int, Any]] = {}
+        self.max_row = 0
+        self.max_column = 0
+
+    def set_value(self, row: int, col: int, value):
+        column = self.columns.get(col)
+        if column is None:
+            column = self.columns[col] = {}
+        column[row] = value
+        if row > self.max_row:
+            self.max_row = row
+        if col > self.max_column:
+            self.max_column = col
+
+    def value(self, row: int, col: int):
+        column = self.columns.get(col)
+        return None if column is None else column.get(row)
+
+    def cell(self, row: int, column: int) -> StoredCell:
+        value = self.value(row, column)
+        return EMPTY_CELL if value is None else StoredCell(value)
+
+    def __getitem__(self, cell: str) -> StoredCell:
+        return self.cell(*cell_to_coords(cell))
+
+
+class StreamingWorkbook:
+    """
+    A workbook loaded by streaming each sheet once in openpyxl's read-only mode.
+
+    After loading, ``load_time`` holds the loading time in seconds, and, if ``trace_memory`` was requested,
+    ``peak_memory`` holds the peak memory (in bytes) allocated while loading.
+    """
+
+    def __init__(self, excel_file: Union[str, Path], trace_memory: bool = False):
+        self.sheets: Dict[str, StoredSheet] = {}
+        self.peak_memory: Optional[int] = None
+        start = time.perf_counter()
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            wb = load_workbook(excel_file, read_only=True)
+            try:
+                self.defined_names = wb.defined_names
+                for ws in wb.worksheets:
+                    self.sheets[ws.title] = self._load_sheet(ws)
+                self.active = self.sheets[wb.active.title] if wb.active is not None else None
+            finally:
+                wb.close()
+        finally:
+            if trace_memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        self.load_time = time.perf_counter() - start
+
+    @staticmethod
+    def _load_sheet(ws) -> StoredSheet:
+        sheet = StoredSheet(ws.title)
+        for row_index, row in enumerate(ws.iter_rows(values_only=True), start=1):
+            for col_index, value in enumerate(row, start=1):
+                if value is not None:
+                    sheet.set_value(row_index, col_index, value)
+        return sheet
+
+    @property
+    def sheetnames(self) -> Sequence[str]:
+        return list(self.sheets.keys())
+
+    def __getitem__(self, sheet: str) -> StoredSheet:
+        return self.sheets[sheet]
+
+    def load_report(self) -> str:
+        cells = sum(len(column) for sheet in self.sheets.values() for column in sheet.columns.values())
+        memory = f', peak memory {self.peak_memory / 2 ** 20:.1f} MB' if self.peak_memory is not None else ''
+        return f'Loaded {len(self.sheets)} sheets ({cells} cells) in {self.load_time:.2f} s{memory}'
@@ -10,17 +10,18 @@ from more_itertools import split_before
 from openpyxl import load_workbook
 from pathlib import Path
 from typing import Optional, MutableMapping, Sequence, Mapping, Callable, Tuple, TypedDict, Literal, Union, \
-    Iterable, Iterator
+    Iterable, Iterator, Dict, Hashable
 
 from codegen.utils import visitor_for
 from math_rep.expr import FormalContent, Term
 from scenoptic.scenoptic_expr import Cell, Cells
 from math_rep.expression_types import M_NUMBER, QualifiedName
+from scenoptic.excel_streaming import StreamingWorkbook
 from scenoptic.excel_data import CellType, BooleanCell, IntegerCell, NonNegIntParser, FloatCell, NonNegFloatParser, \
     StringCell, INTEGER_CELL_TYPE, CellTypeFactory, ExcelData
-from scenoptic.parse_excel import parse_excel_cell_or_range
+from scenoptic.parse_excel import parse_excel_cell_or_range, ParseTreeCache
 from scenoptic.xl_utils import xl_range_elements, cell_to_coords, coords_to_cell, \
-    get_sheet_in_cell_qn_as_string, get_cell_qn_as_excel_string, xl_cell_or_range_elements_qn
+    get_sheet_in_cell_qn_as_string, get_cell_qn_as_excel_string, xl_cell_or_range_elements_qn, CellIds, range_to_cells
 
 
 class OptimizationDirection(Enum):
@@ -144,6 +145,50 @@ EXCEL_OPERATORS = {'+': ARITHMETIC_OPERATOR,
                    'COUNTIFS': ExcelOperator(True, range_operator, 'ignore',
                                              criteria_arguments=make_iterable(lambda: count(1, 2)))}
 
+class CellTypes(MutableMapping[QualifiedName, CellType]):
+    """
+    The types of cells, keyed by qualified name but stored by cell ID (see ``CellIds``); keys that don't denote single
+    cells are stored as is.
+    """
+
+    def __init__(self, cell_ids: CellIds):
+        self.cell_ids = cell_ids
+        self.by_id: Dict[int, CellType] = {}
+        self.others: Dict[Hashable, CellType] = {}
+
+    def set_range(self, start_row: int, start_col: int, end_row: int, end_col: int, sheet: Optional[str],
+                  ctype: CellType):
+        self.by_id.update(dict.fromkeys(self.cell_ids.range_ids(start_row, start_col, end_row, end_col, sheet).tolist(),
+                                        ctype))
+
+    def _id(self, key) -> Optional[int]:
+        return self.cell_ids.id_of(key) if isinstance(key, QualifiedName) else None
+
+    def __getitem__(self, key) -> CellType:
+        if (cell_id := self._id(key)) is not None:
+            return self.by_id[cell_id]
+        return self.others[key]
+
+    def __setitem__(self, key, ctype: CellType):
+        if (cell_id := self._id(key)) is not None:
+            self.by_id[cell_id] = ctype
+        else:
+            self.others[key] = ctype
+
+    def __delitem__(self, key):
+        if (cell_id := self._id(key)) is not None:
+            del self.by_id[cell_id]
+        else:
+            del self.others[key]
+
+    def __iter__(self):
+        yield from (self.cell_ids.qn(cell_id) for cell_id in self.by_id)
+        yield from self.others
+
+    def __len__(self):
+        return len(self.by_id) + len(self.others)
+
+
 EXTERNAL_LINK_PATTERN = r"""(^'\[\d+\].*)"""
 EXTERNAL_LINK_RE = re.compile(EXTERNAL_LINK_PATTERN)
 
@@ -152,8 +197,18 @@ class Scenario(ExcelData, ABC):
     # TODO: infer default type for constants from their values?
     # FIXME!!! remove default_type, not used, require types for all cells
     def __init__(self, excel_file, sheet: str = None, default_type=M_NUMBER,
-                 cell_type_parser_factory=DEFAULT_CELL_TYPE_PARSER_FACTORY):
-        self.wb = load_workbook(Path(excel_file).resolve())
+                 cell_type_parser_factory=DEFAULT_CELL_TYPE_PARSER_FACTORY, read_only=False, trace_memory=False):
+        """
+        :param read_only: if True, the workbook is streamed once into a compact read-only store (see
+            ``StreamingWorkbook``) instead of being fully loaded by openpyxl; this is much faster and uses much less
+            memory for large workbooks
+        :param trace_memory: if True (and ``read_only`` is True), the peak memory used while loading the workbook is
+            recorded (see ``load_report``)
+        """
+        if read_only:
+            self.wb = StreamingWorkbook(Path(excel_file).resolve(), trace_memory=trace_memory)
+        else:
+            self.wb = load_workbook(Path(excel_file).resolve())
         if sheet:
             try:
                 self.ws = self.wb[sheet]
@@ -166,11 +221,20 @@ class Scenario(ExcelData, ABC):
         self.parameters = []
         self.objectives = {}
         self.default_type = default_type
-        self.types: MutableMapping[str, CellType] = {}  # defaultdict(lambda: self.default_type)
+        self.cell_ids = CellIds()
+        self.types = CellTypes(self.cell_ids)
         self.warnings = []
         self.dummy_cells = {}
+        self.parse_tree_cache = ParseTreeCache()
         self._populate_named_ranges()
 
+    def load_report(self) -> Optional[str]:
+        """
+        Return a description of the time (and, if traced, the memory) used to load the workbook, or None if it wasn't
+        loaded in read-only mode
+        """
+        return self.wb.load_report() if isinstance(self.wb, StreamingWorkbook) else None
+
     @abstractmethod
     def convert_to_language(self, expression: FormalContent):
         """
@@ -288,8 +352,11 @@ class Scenario(ExcelData, ABC):
         if isinstance(cells, QualifiedName):
             self.types[cells] = ctype
         else:
-            for cell in xl_cell_or_range_elements_qn(cells, self.specification_sheet_name()):
-                self.types[cell] = ctype
+            cell1, cell2, sheet = range_to_cells(cells, self.specification_sheet_name())
+            if cell2:
+                self.types.set_range(*cell_to_coords(cell1), *cell_to_coords(cell2), sheet, ctype)
+            else:
+                self.types.by_id[self.cell_ids.cell_id(*cell_to_coords(cell1), sheet)] = ctype
 
     def warn(self, msg):
         self.warnings.append(msg)
@@ -1,59 +1,85 @@
 import json
 import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 from queue import SimpleQueue
-from typing import Sequence, Optional
+from typing import Sequence, Optional, Mapping, Tuple, Set, Callable, Dict
 
+import more_itertools
+
+from opl_repr.opl_frame_constants import OPL_USER_FRAME_NAME
 from validator2solver.codegen.opl.opl_generator import OplVisitor
 from validator2solver.domain_analysis import DomainTable
-from math_rep.expr import Comparison, Quantity, StringTerm, FormalContent
-from scenoptic.scenoptic_expr import Cell, DomainTableForScenoptic
-from math_rep.expression_types import QualifiedName
+from math_rep.expr import Comparison, Quantity, StringTerm, FormalContent, MathVariable, Subscripted, Term, \
+    Aggregate, ComprehensionContainer, RangeExpr, FunctionApplication
+from scenoptic.scenoptic_expr import Cell, Cells, DomainTableForScenoptic
+from math_rep.expression_types import QualifiedName, MArray, M_INT
+from math_rep.math_symbols import ZIP_QN
 from validator2solver.optimistic_rules import CountToSum, NotToEqZero, BooleanToIntEquationInLogicalExpression, \
     QuantifiedBooleanToIntEquation, EquatedCeil, MoveSumConditionToTerm, IfToImplications, \
     EliminateNegationOfComparison, LiftLeftImplicationOverComparison, LiftRightImplicationOverComparison, \
     LiftRightLogicalOperatorOverComparison, LiftLeftLogicalOperatorOverComparison, \
     LiftImplicationOverFunctionApplication, LiftLogicalOperatorOverFunctionApplication, ReplaceStrictInequality
-from rewriting.rules import RuleSet, OrderedRuleSets, exhaustively_apply_rules
+from rewriting.patterns import Bindings, MATCH_ANY, let
+from rewriting.rules import RuleSet, OrderedRuleSets, exhaustively_apply_rules, RewriteRule
 from scenoptic.excel_data import BooleanCell, IntegerCell, FloatCell, StringCell, CellTypeFactory
 from scenoptic.excel_rules import ExcelIfRule, ExcelCriteriaRule, ConvertExcelFunctions, ExpandExcelSumMultipleArgs, \
     AggregateCellsRule, TranslateExcelSumif, TranslateExcelCountif, AggregateZipCellsRule, ExpandExcelSumOneArg, \
     TranslateExcelSumifs, TranslateExcelCountifs
+from scenoptic.excel_analyze_workbook import AnalyzeWorkbook
+from scenoptic.excel_build_state import BuildState, CellEntry, cell_signature, BUILD_STATE_SUFFIX
+from scenoptic.excel_translation_cache import TranslationCache, same_cell_type
 from scenoptic.excel_to_math import Scenario, OptimizationDirection, Constant, CELL_COLLECTOR, Constraint, \
-    AbstractConstraint
+    AbstractConstraint, AbstractExprVisitor
 from scenoptic.parse_excel import parse_formula
-from scenoptic.xl_utils import get_sheet_in_cell_qn_as_string, xl_cell_or_range_elements_qn
-
-EXCEL_TO_OPL_RULES1 = OrderedRuleSets(RuleSet(ConvertExcelFunctions()),
-                                      RuleSet(ExcelIfRule()),
-                                      RuleSet(ExcelCriteriaRule()),
-                                      RuleSet(ExpandExcelSumMultipleArgs(),
-                                              ExpandExcelSumOneArg(),
-                                              TranslateExcelSumif(),
-                                              TranslateExcelSumifs(),
-                                              TranslateExcelCountif(),
-                                              TranslateExcelCountifs()),
-                                      RuleSet(AggregateCellsRule(),
-                                              AggregateZipCellsRule()),
-                                      RuleSet(CountToSum(),
-                                              # GlobalizeCeil(self.om),
-                                              NotToEqZero(),
-                                              BooleanToIntEquationInLogicalExpression(),
-                                              QuantifiedBooleanToIntEquation(),
-                                              EquatedCeil(),
-                                              MoveSumConditionToTerm(),
-                                              # ReduceDomainTautologies()  # circular!
-                                              ),
-                                      # RuleSet(GlobalizeCeil(self.om)),
-                                      RuleSet(IfToImplications()),
-                                      RuleSet(EliminateNegationOfComparison()),
-                                      RuleSet(LiftLeftImplicationOverComparison(),
-                                              LiftRightImplicationOverComparison(),
-                                              LiftRightLogicalOperatorOverComparison(),
-                                              LiftLeftLogicalOperatorOverComparison(),
-                                              LiftImplicationOverFunctionApplication(),
-                                              LiftLogicalOperatorOverFunctionApplication()),
-                                      RuleSet(ExpandExcelSumMultipleArgs()))
+from scenoptic.xl_utils import get_sheet_in_cell_qn_as_string, xl_cell_or_range_elements_qn, cell_qn_to_components, \
+    as_cell_qn, cell_as_str, coords_to_cell
+from scenoptic.excel_symbols import worksheet_path
+
+
+def excel_to_opl_rules(*symbolic_aggregate_rules: RewriteRule) -> OrderedRuleSets:
+    """
+    Return the main rule sets for translating Excel formulas to OPL.
+
+    :param symbolic_aggregate_rules: rules that are tried on aggregates over cell ranges before they are expanded into
+        their cells
+    """
+    return OrderedRuleSets(RuleSet(ConvertExcelFunctions()),
+                           RuleSet(ExcelIfRule()),
+                           RuleSet(ExcelCriteriaRule()),
+                           RuleSet(ExpandExcelSumMultipleArgs(),
+                                   ExpandExcelSumOneArg(),
+                                   TranslateExcelSumif(),
+                                   TranslateExcelSumifs(),
+                                   TranslateExcelCountif(),
+                                   TranslateExcelCountifs()),
+                           *([RuleSet(*symbolic_aggregate_rules)] if symbolic_aggregate_rules else []),
+                           RuleSet(AggregateCellsRule(),
+                                   AggregateZipCellsRule()),
+                           RuleSet(CountToSum(),
+                                   # GlobalizeCeil(self.om),
+                                   NotToEqZero(),
+                                   BooleanToIntEquationInLogicalExpression(),
+                                   QuantifiedBooleanToIntEquation(),
+                                   EquatedCeil(),
+                                   MoveSumConditionToTerm(),
+                                   # ReduceDomainTautologies()  # circular!
+                                   ),
+                           # RuleSet(GlobalizeCeil(self.om)),
+                           RuleSet(IfToImplications()),
+                           RuleSet(EliminateNegationOfComparison()),
+                           RuleSet(LiftLeftImplicationOverComparison(),
+                                   LiftRightImplicationOverComparison(),
+                                   LiftRightLogicalOperatorOverComparison(),
+                                   LiftLeftLogicalOperatorOverComparison(),
+                                   LiftImplicationOverFunctionApplication(),
+                                   LiftLogicalOperatorOverFunctionApplication()),
+                           RuleSet(ExpandExcelSumMultipleArgs()))
+
+
+EXCEL_TO_OPL_RULES1 = excel_to_opl_rules()
 EXCEL_TO_OPL_RULES2 = OrderedRuleSets(RuleSet(ReplaceStrictInequality()))
 
 
@@ -72,6 +98,9 @@ OPL_POS_TYPES = {'int': 'int+', 'float': 'float+'}
 
 CELL_TYPES_FOR_OPL = dict(int=IntegerCell, float=FloatCell, bool=BooleanCell, string=StringCell)
 
+# Index variable of the forall constraints generated for dragged blocks
+OPL_ROW_QN = QualifiedName('row', type=M_INT, lexical_path=(OPL_USER_FRAME_NAME,))
+
 
 def convert_excel_expr_to_opl(excel_expr):
     opl_visitor = OplVisitor(allow_undefined_vars=True)  # FIXME!!! should be False
@@ -80,20 +109,233 @@ def convert_excel_expr_to_opl(excel_expr):
     return code, opl_visitor
 
 
+def shift_cell(cell: QualifiedName, rows: int) -> Cell:
+    row, col, sheet = cell_qn_to_components(cell)
+    return Cell(row + rows, col, sheet, ctype=cell.type)
+
+
+def vertical_runs(cells: Sequence[QualifiedName]) -> Sequence[Tuple[QualifiedName, ...]]:
+    """
+    Split a sequence of cells into maximal runs of vertically-adjacent cells, in the order given.
+    """
+    runs = []
+    current = []
+    previous = None
+    for cell in cells:
+        components = cell_qn_to_components(cell)
+        if previous is None or components != (previous[0] + 1, *previous[1:]):
+            if current:
+                runs.append(tuple(current))
+            current = []
+        current.append(cell)
+        previous = components
+    if current:
+        runs.append(tuple(current))
+    return runs
+
+
+@dataclass
+class DraggedBlock:
+    """
+    A vertical run of cells whose formulas are compatible with that of the first cell (see ``AnalyzeWorkbook``).
+
+    The rewrite rules are only applied to the first (and, for verification, the last) cell of the block; the cells in
+    between are only checked to have the same types as the corresponding cells of the first row.  ``code`` is the
+    constraint for the first cell, and ``relative_cells`` contains the cells in ``code`` that move with the block row.
+    ``range_cells`` contains the cells of fixed ranges that were kept symbolic in ``code``.
+    """
+    sheet: str
+    col: int
+    start_row: int
+    end_row: int
+    code: FormalContent
+    relative_cells: Set[QualifiedName]
+    range_cells: Set[QualifiedName] = field(default_factory=set)
+
+    def __len__(self):
+        return self.end_row - self.start_row + 1
+
+    def cells(self) -> Sequence[QualifiedName]:
+        return [as_cell_qn(row, self.col, self.sheet) for row in range(self.start_row, self.end_row + 1)]
+
+    def code_for_row(self, row: int) -> FormalContent:
+        """
+        Return the constraint for the cell of this block in the given row
+        """
+        distance = row - self.start_row
+        if distance == 0:
+            return self.code
+        return self.code.substitute({cell: shift_cell(cell, distance) for cell in self.relative_cells})
+
+    def predecessors(self) -> Set[QualifiedName]:
+        """
+        Return all cells used in the constraints of this block
+        """
+        fixed = {cell.name for cell in CELL_COLLECTOR.collect(self.code)
+                 if cell is not None and cell.name not in self.relative_cells}
+        return fixed | self.range_cells | {shift_cell(cell, distance).name
+                                           for cell in self.relative_cells
+                                           for distance in range(len(self))}
+
+
+@dataclass
+class OplArray:
+    """
+    A vertical run of cells with the same type, declared as a single OPL array indexed by row
+    """
+    name: QualifiedName
+    cells: Sequence[QualifiedName]
+    start_row: int
+    end_row: int
+
+
+@dataclass(frozen=True)
+class SymbolicRange:
+    """
+    A single-column range of cells that is kept symbolic in the generated code
+    """
+    sheet: str
+    col: int
+    start_row: int
+    end_row: int
+
+
+class CollectVariables(AbstractExprVisitor):
+    def visit_math_variable(self, var: MathVariable):
+        return var.name
+
+    def visit_cell(self, cell: Cell):
+        return None
+
+    def collect(self, term: Term) -> Set[QualifiedName]:
+        return {name for name in more_itertools.collapse(self.visit(term)) if name is not None}
+
+
+VARIABLE_COLLECTOR = CollectVariables()
+
+
+class SymbolicAggregateCellsRule(RewriteRule):
+    """
+    Translate an aggregate over single-column ranges (or a zip of such ranges with the same length) into an aggregate
+    over the rows of the first range, instead of expanding it into one term per cell.
+
+    Each range is represented by a placeholder array variable indexed by absolute row; the placeholders (recorded in
+    ``ranges``) are replaced by the OPL arrays containing the range when the model is written.  Ranges that are shorter
+    than ``min_cells``, for which ``can_index`` returns False, or that are in ``expanded``, are left to
+    ``AggregateCellsRule`` and ``AggregateZipCellsRule``.
+    """
+    pattern = Aggregate[let(op=MATCH_ANY), 'term', let(container=ComprehensionContainer[let(cells=MATCH_ANY)])]
+
+    def __init__(self, can_index: Callable[[Cells], bool], min_cells: int = 10):
+        self.can_index = can_index
+        self.min_cells = min_cells
+        self.ranges: Dict[QualifiedName, SymbolicRange] = {}
+        self.expanded: Set[SymbolicRange] = set()
+
+    @staticmethod
+    def symbolic_range(cells: Cells) -> SymbolicRange:
+        return SymbolicRange(cells.sheet, cells.start_col, cells.start_row, cells.end_row)
+
+    def placeholders(self, code: FormalContent) -> Set[QualifiedName]:
+        """
+        Return the placeholders of the ranges kept symbolic in the given code
+        """
+        return {name for name in VARIABLE_COLLECTOR.collect(code) if name in self.ranges}
+
+    @staticmethod
+    def _ranges(cells) -> Optional[Sequence[Cells]]:
+        if isinstance(cells, Cells):
+            return [cells]
+        if isinstance(cells, FunctionApplication) and cells.function == ZIP_QN:
+            args = list(cells.args)
+            if args and all(isinstance(arg, Cells) for arg in args):
+                return args
+        return None
+
+    def condition(self, obj: Aggregate, bindings: Bindings) -> bool:
+        ranges = self._ranges(bindings['cells'])
+        if ranges is None or len(ranges) != len(bindings['container'].vars):
+            return False
+        length = ranges[0].end_row - ranges[0].start_row + 1
+        return (length >= self.min_cells
+                and all(r.start_col == r.end_col and r.end_row - r.start_row + 1 == length for r in ranges)
+                and all(self.symbolic_range(r) not in self.expanded for r in ranges)
+                and all(self.can_index(r) for r in ranges))
+
+    def range_variable(self, cells: Cells) -> QualifiedName:
+        name = QualifiedName(f'{cell_as_str(cells.start_row, cells.start_col, cells.sheet)}_'
+                             f'{coords_to_cell(cells.end_row, cells.start_col)}',
+                             type=MArray(cells.type.element_type, range(cells.start_row, cells.end_row + 1)),
+                             lexical_path=worksheet_path(cells.sheet))
+        self.ranges[name] = self.symbolic_range(cells)
+        return name
+
+    def transform_single(self, obj: Aggregate, bindings: Bindings):
+        container = bindings['container']
+        ranges = self._ranges(bindings['cells'])
+        first = ranges[0]
+        index_var = QualifiedName(f'row_{coords_to_cell(first.start_row, first.start_col)}_'
+                                  f'{coords_to_cell(first.end_row, first.start_col)}',
+                                  type=M_INT, lexical_path=(OPL_USER_FRAME_NAME,))
+        index = MathVariable(index_var)
+        substitutions = {}
+        for var, cells in zip(container.vars, ranges):
+            offset = cells.start_row - first.start_row
+            row = index if offset == 0 else index + Quantity(offset) if offset > 0 else index - Quantity(-offset)
+            substitutions[var] = Subscripted(MathVariable(self.range_variable(cells)), (row,))
+        rest = container.rest
+        return Aggregate(obj.op,
+                         obj.term.substitute(substitutions),
+                         ComprehensionContainer([index_var],
+                                                RangeExpr(first.start_row, first.end_row + 1),
+                                                rest.substitute(substitutions) if rest is not None else None))
+
+
 class ScenarioForOPL(Scenario):
-    def __init__(self, excel_file, sheet: str = None, default_type=FloatCell()):
-        super().__init__(excel_file, sheet, default_type, CellTypeFactory(CELL_TYPES_FOR_OPL))
+    def __init__(self, excel_file, sheet: str = None, default_type=FloatCell(), vectorize=False,
+                 min_symbolic_range=10, cache_translations=False, read_only=False, trace_memory=False):
+        """
+        :param vectorize: if True, blocks of dragged formulas are translated once and emitted as indexed dvar arrays
+            with a single ``forall`` constraint, instead of one scalar dvar and one constraint per cell; also,
+            aggregates over single-column ranges of at least ``min_symbolic_range`` cells of the same type are emitted
+            as OPL aggregates over the rows of an array (e.g., ``sum (i in 2..1000) A[i]``) instead of being expanded
+        :param cache_translations: if True, cells with the same formula shape are translated by instantiating the
+            translation of a previous cell (see ``TranslationCache``)
+        :param read_only: if True, the workbook is loaded in read-only mode (see ``Scenario``)
+        :param trace_memory: if True, the peak memory used to load a read-only workbook is recorded
+        """
+        super().__init__(excel_file, sheet, default_type, CellTypeFactory(CELL_TYPES_FOR_OPL), read_only=read_only,
+                         trace_memory=trace_memory)
+        self.vectorize = vectorize
+        self.symbolic_aggregates = SymbolicAggregateCellsRule(self._can_index_range, min_symbolic_range)
+        self.rules1 = excel_to_opl_rules(self.symbolic_aggregates) if vectorize else EXCEL_TO_OPL_RULES1
         self.use_epsilon = False
         self.epsilon = 1e-10
         self.constants = None
         self.initialized = None
         self.dvars = None
         self.constraints = None
+        self.blocks: Dict[QualifiedName, DraggedBlock] = {}
+        # arrays declared in the vectorized model (see ``to_opl``)
+        self.opl_arrays: Sequence[OplArray] = ()
+        self.domain_table: Optional[DomainTable] = None
+        self._constant_cells: Dict[QualifiedName, bool] = {}
+        self.translation_cache = TranslationCache('OPL', self.get_type) if cache_translations else None
+        self.build_state: Optional[BuildState] = None
+        self.build_state_file = None
+        self.constraint_predecessors: Dict[QualifiedName, Tuple[QualifiedName, ...]] = {}
 
     def cell_to_constraint(self, cell: QualifiedName, contents, domain_table: DomainTable = None
                            ) -> Optional[AbstractConstraint]:
         if not contents:
             return None
+        cache = self.translation_cache
+        key = None
+        cached = None
+        get_role = None
+        if cache is not None and (key := cache.shape_key(self, cell)) is not None:
+            get_role = partial(self._cell_role, parameters=set(self.parameters), domain_table=domain_table)
+            cached = cache.lookup(key, cell, get_role)
         current_sheet = get_sheet_in_cell_qn_as_string(cell)
         expr = parse_formula(contents, self, current_sheet)
         if domain_table is not None:
@@ -103,14 +345,141 @@ class ScenarioForOPL(Scenario):
         constraint_term = Comparison(Cell.from_name_qn(cell), '=', expr)
         if domain_table is not None:
             domain_table.build(constraint_term)
-        cell_map = {cell.name: cell for cell in CELL_COLLECTOR.collect(constraint_term) if
-                    cell is not None}
+        if cached is not None:
+            # The domain table is built as for a full translation, so that it is the same with or without the cache
+            code, term_cells = cached
+            cell_map = {term_cell.name: term_cell for term_cell in term_cells}
+            return Constraint(code, [cell_map[name] for name in sorted(cell_map.keys())])
+        term_cells = [cell for cell in CELL_COLLECTOR.collect(constraint_term) if cell is not None]
+        cell_map = {cell.name: cell for cell in term_cells}
         cells = [cell_map[name] for name in (sorted(cell_map.keys()))]
-        abs_rep1 = exhaustively_apply_rules(EXCEL_TO_OPL_RULES1, constraint_term, domain_table)
+        abs_rep1 = exhaustively_apply_rules(self.rules1, constraint_term, domain_table)
         code = exhaustively_apply_rules(EXCEL_TO_OPL_RULES2, abs_rep1, domain_table)
+        if key is not None:
+            code_cells = [cell.name for cell in CELL_COLLECTOR.collect(code) if cell is not None]
+            cache.add(key, cell, code, [term_cell.name for term_cell in term_cells], code_cells, get_role)
         result = Constraint(code, cells)
         return result
 
+    def block_to_constraint(self, cells: Sequence[QualifiedName], domain_table: DomainTable = None
+                            ) -> Optional[DraggedBlock]:
+        """
+        Translate a vertical run of cells with compatible formulas.
+
+        The first and last cells are translated, and the block is accepted only if the code of the last cell is the
+        code of the first cell with some of its cells shifted by the length of the block; these are the relative cells.
+
+        :return: a ``DraggedBlock``, or None if the cells can't be translated as a block
+        """
+        first, last = cells[0], cells[-1]
+        parameters = set(self.parameters)
+        if any(cell in parameters for cell in cells):
+            return None
+        first_constraint = self.cell_to_constraint(first, self.cell_qn_value(first), domain_table)
+        last_constraint = self.cell_to_constraint(last, self.cell_qn_value(last), domain_table)
+        if not (isinstance(first_constraint, Constraint) and isinstance(last_constraint, Constraint)):
+            return None
+        aggregates = self.symbolic_aggregates
+        if moving := aggregates.placeholders(first_constraint.code) ^ aggregates.placeholders(last_constraint.code):
+            # Ranges that move with the row can't be kept symbolic in the constraint for the whole block
+            aggregates.expanded.update(aggregates.ranges[name] for name in moving)
+            first_constraint = self.cell_to_constraint(first, self.cell_qn_value(first), domain_table)
+            last_constraint = self.cell_to_constraint(last, self.cell_qn_value(last), domain_table)
+        first_cells = [cell.name for cell in CELL_COLLECTOR.collect(first_constraint.code) if cell is not None]
+        last_cells = [cell.name for cell in CELL_COLLECTOR.collect(last_constraint.code) if cell is not None]
+        if len(first_cells) != len(last_cells):
+            return None
+        distance = len(cells) - 1
+        relative = set()
+        fixed = set()
+        for first_cell, last_cell in zip(first_cells, last_cells):
+            first_row, first_col, first_sheet = cell_qn_to_components(first_cell)
+            last_row, last_col, last_sheet = cell_qn_to_components(last_cell)
+            if (first_col, first_sheet) != (last_col, last_sheet):
+                return None
+            if last_row == first_row:
+                fixed.add(first_cell)
+            elif last_row - first_row == distance:
+                relative.add(first_cell)
+            else:
+                return None
+        if relative & fixed:
+            return None
+        shifted = first_constraint.code.substitute({cell: shift_cell(cell, distance) for cell in relative})
+        if shifted.describe() != last_constraint.code.describe():
+            return None
+        first_type = self.get_type(first)
+
+        def role(cell: QualifiedName) -> Tuple[bool, bool]:
+            return cell in parameters, self._is_constant_cell(cell, parameters)
+
+        # The code of the block is that of the first cell, so the relative cells of the middle rows must have the same
+        # types as those of the first row, and be parameters or constants exactly when those are
+        roles = {cell: role(cell) for cell in relative}
+        for offset in range(1, distance):
+            for cell in relative:
+                moved = shift_cell(cell, offset).name
+                if not (same_cell_type(self.get_type(moved), self.get_type(cell)) and role(moved) == roles[cell]):
+                    return None
+            if not same_cell_type(self.get_type(cells[offset]), first_type):
+                return None
+        row, col, sheet = cell_qn_to_components(first)
+        range_cells = {cell.name for cell in first_constraint.predecessors} - set(first_cells)
+        return DraggedBlock(sheet, col, row, row + distance, first_constraint.code, relative, range_cells)
+
+    def _cell_role(self, cell: QualifiedName, parameters: Set[QualifiedName], domain_table: DomainTable = None
+                   ) -> Tuple[bool, bool, bool]:
+        """
+        Return whether the given cell is a parameter, whether it is a constant, and whether it is known to be a decision
+        variable; the translation of formulas that refer to the cell may depend on these (see ``TranslationCache``)
+        """
+        info = domain_table.var_table.get(cell) if domain_table is not None else None
+        return cell in parameters, self._is_constant_cell(cell, parameters), info is not None and info.is_dvar()
+
+    def _is_constant_cell(self, cell: QualifiedName, parameters: Set[QualifiedName]) -> bool:
+        """
+        Return True if the given cell will be translated into a constant (see ``cell_to_constraint``)
+        """
+        if cell in parameters:
+            return False
+        if (result := self._constant_cells.get(cell)) is None:
+            contents = self.cell_qn_value(cell)
+            if isinstance(contents, str) and contents.strip().startswith('='):
+                # Formulas such as =5 are also translated into constants
+                result = isinstance(parse_formula(contents, self, get_sheet_in_cell_qn_as_string(cell)),
+                                    (Quantity, StringTerm))
+            else:
+                result = bool(contents)
+            self._constant_cells[cell] = result
+        return result
+
+    def _can_index_range(self, cells: Cells) -> bool:
+        """
+        Return True if all cells in the range have the same type and are all constants or all dvars, so that they will
+        be declared in a single OPL array
+        """
+        names = [cell.name for cell in cells]
+        parameters = set(self.parameters)
+        cell_type = self.types.get(names[0])
+        is_constant = self._is_constant_cell(names[0], parameters)
+        return cell_type is not None and all(self.types.get(cell) == cell_type
+                                             and self._is_constant_cell(cell, parameters) == is_constant
+                                             for cell in names[1:])
+
+    def _find_dragged_blocks(self) -> Mapping[QualifiedName, Tuple[QualifiedName, ...]]:
+        """
+        Return a mapping from each cell that belongs to a block of dragged formulas to the cells of its block
+        """
+        analyzer = AnalyzeWorkbook(self)
+        analyzer.analyze()
+        blocks = {}
+        for origin, compatible in analyzer.registry.items():
+            for run in vertical_runs([origin, *compatible.compatible_cells]):
+                if len(run) > 1:
+                    for cell in run:
+                        blocks[cell] = run
+        return blocks
+
     def convert_to_language(self, expression: FormalContent):
         code, visitor = convert_excel_expr_to_opl(expression)
         self.use_epsilon = 'epsilon' in visitor.named_constants or self.use_epsilon
@@ -121,27 +490,82 @@ class ScenarioForOPL(Scenario):
                 or self.objectives is None):
             raise Exception(f'Scenario not initialized properly')
 
-    def build(self):
+    def _build_state_key(self):
+        return ('OPL', self.ws.title, tuple(sorted(str(p) for p in self.parameters)),
+                tuple(sorted((spec, repr(data)) for spec, data in self.objectives.items())))
+
+    def build(self, state_file=None):
+        """
+        Translate all cells that the objectives depend on.
+
+        :param state_file: if given, the state of the build is kept in this file, and the next build with the same file
+            translates again only the cells whose formulas or types have changed and the cells that depend on them; the
+            state is saved by ``to_opl``.  This is not supported for vectorized scenarios.
+        """
         # TODO: support named ranges
         self.find_translation_arguments()
         self.validate_initialization()
+        if self.translation_cache is not None:
+            self.translation_cache.clear()
+        self._constant_cells.clear()
         domain_table = DomainTableForScenoptic()
         constraints = {}
         constants = {}
-        analyzed_names = set(cell
-                             for o in self.objectives.keys()
-                             for cell in xl_cell_or_range_elements_qn(o, self.specification_sheet_name()))
+        constraint_predecessors = {}
+        cell_ids = self.cell_ids
+        # analyzed cells by cell ID
+        analyzed = {cell_ids.id_of(cell): cell
+                    for o in self.objectives.keys()
+                    for cell in xl_cell_or_range_elements_qn(o, self.specification_sheet_name())}
         parameters = frozenset(self.parameters)
+
+        def signature(cell: QualifiedName) -> str:
+            return cell_signature(self.cell_qn_value(cell), self.get_type(cell), cell in parameters)
+
+        state = None
+        invalid = set()
+        if state_file is not None and not self.vectorize:
+            state = BuildState.load(state_file, self._build_state_key())
+            invalid = state.invalid_cells(signature)
+        parameter_ids = frozenset(cell_ids.id_of(p) for p in parameters)
         for p in parameters:
             pcell = Cell.from_name_qn(p, self.ws.title)
             domain_table.build(pcell)
             pcell.appl_info.set_dvar(domain_table)
         domain_table.propagate()
+        dragged = self._find_dragged_blocks() if self.vectorize else {}
+        blocks = {}
         agenda = SimpleQueue()
-        for cell in sorted(analyzed_names):
+        for cell in sorted(analyzed.values()):
             agenda.put(cell)
+
+        def add_to_agenda(cells: Set[QualifiedName]):
+            new_cells = []
+            for new_cell in cells:
+                if (cell_id := cell_ids.id_of(new_cell)) not in analyzed:
+                    analyzed[cell_id] = new_cell
+                    if cell_id not in parameter_ids:
+                        new_cells.append(new_cell)
+            for free in sorted(new_cells):
+                agenda.put(free)
         while not agenda.empty():
             cell = agenda.get()
+            if cell in blocks:
+                continue
+            if (block_cells := dragged.pop(cell, None)) is not None:
+                for block_cell in block_cells:
+                    dragged.pop(block_cell, None)
+                block = self.block_to_constraint(block_cells, domain_table)
+                if block is not None:
+                    for block_cell in block_cells:
+                        blocks[block_cell] = block
+                    add_to_agenda(block.predecessors() | set(block_cells))
+                    continue
+            if state is not None and (entry := state.reusable(cell, invalid)) is not None:
+                state.reused += 1
+                constraints[cell] = entry
+                add_to_agenda(set(entry.predecessors))
+                continue
             contents = self.cell_qn_value(cell)
             # print(f'Cell {cell}: {contents}')
             constraint = self.cell_to_constraint(cell, contents, domain_table)
@@ -153,15 +577,21 @@ class ScenarioForOPL(Scenario):
             else:
                 assert isinstance(constraint, Constraint)
                 constraints[cell] = constraint.code
-                analyzed_cells = constraint.predecessors
-                set_of_analyzed_cells_qn = set(cell.name for cell in analyzed_cells)
-                for free in sorted(set_of_analyzed_cells_qn - analyzed_names - parameters):
-                    agenda.put(free)
-                analyzed_names |= set_of_analyzed_cells_qn
-        dvars = sorted((analyzed_names | set(self.parameters)) - set(constants.keys()))
+                constraint_predecessors[cell] = tuple(cell.name for cell in constraint.predecessors)
+                add_to_agenda(set(constraint_predecessors[cell]))
+                if state is not None:
+                    state.translated += 1
+        dvars = sorted((set(analyzed.values()) | parameters) - set(constants.keys()))
         self.constants = constants
         self.constraints = constraints
+        self.constraint_predecessors = constraint_predecessors
+        self.blocks = blocks
         self.dvars = dvars
+        self.domain_table = domain_table
+        if state is not None:
+            state.signatures = {cell: signature(cell) for cell in set(analyzed.values()) | parameters}
+        self.build_state = state
+        self.build_state_file = state_file
 
     def _handle_objectives(self) -> Sequence[FormalContent]:
         """
@@ -170,9 +600,22 @@ class ScenarioForOPL(Scenario):
         pass
 
     def to_opl(self, opl_file: str):
+        if self.vectorize:
+            self._to_vectorized_opl(opl_file)
+            return
         constraints = []
+        entries = {}
         for cell, c in self.constraints.items():
-            constraints.append(self.convert_to_language(c))
+            if isinstance(c, CellEntry):
+                # translated in a previous build (see ``build``)
+                entry = c
+            else:
+                code, visitor = convert_excel_expr_to_opl(c)
+                entry = CellEntry(code.value, 'epsilon' in visitor.named_constants,
+                                  self.constraint_predecessors.get(cell, ()))
+            self.use_epsilon = entry.uses_epsilon or self.use_epsilon
+            constraints.append(entry.text)
+            entries[cell] = entry
 
         with open(opl_file, 'w') as f:
             if self.use_epsilon:
@@ -181,36 +624,199 @@ class ScenarioForOPL(Scenario):
                 t = self.types[var]
                 print(f'{t.mtype.for_opl()} {var.to_c_identifier()} = {const_to_opl(self.constants[var])};', file=f)
             for var in self.dvars:
-                t = self.types[var]
-                stype = t.mtype.for_opl()
-                range = ""
-                if isinstance(t, (IntegerCell, FloatCell)):
-                    if not t.upper_bound and t.lower_bound == 0:
-                        # range = f'{t.lower_bound}..{OPL_POS_RANGE_TYPES.get(stype)}'
-                        stype = OPL_POS_TYPES.get(stype)
-                    elif t.upper_bound:
-                        range = f'{t.lower_bound}..{t.upper_bound}'
+                stype, range = self._opl_dvar_type(self.types[var])
                 print(f'dvar {stype} {var.to_c_identifier()}{f" in {range}" if range else ""};', file=f)
+            self._print_objective(f, lambda cell: cell.to_c_identifier())
+
+            print('', file=f)
+            print('subject to {', file=f)
+            for c in constraints:
+                # print('  ' + c + ';', file=f)
+                print(f'  {c};', file=f)
+            print('}', file=f)
+        if self.build_state is not None:
+            self.build_state.entries = entries
+            self.build_state.save(self.build_state_file)
+
+    @staticmethod
+    def _opl_dvar_type(t) -> Tuple[str, str]:
+        """
+        Return the OPL type of a dvar of the given cell type, and its range (empty if unbounded)
+        """
+        stype = t.mtype.for_opl()
+        range = ""
+        if isinstance(t, (IntegerCell, FloatCell)):
+            if not t.upper_bound and t.lower_bound == 0:
+                # range = f'{t.lower_bound}..{OPL_POS_RANGE_TYPES.get(stype)}'
+                stype = OPL_POS_TYPES.get(stype)
+            elif t.upper_bound:
+                range = f'{t.lower_bound}..{t.upper_bound}'
+        return stype, range
 
-            # FIXME!!!!!! cells here are strings, not QNs, fix!
-            final_objectives = {cell: data
-                                for cells_spec, data in self.objectives.items()
-                                for cell in xl_cell_or_range_elements_qn(cells_spec, self.specification_sheet_name())}
-            pos_objective = (f'{cell.to_c_identifier()}'
+    def _print_objective(self, f, reference: Callable[[QualifiedName], str]):
+        # FIXME!!!!!! cells here are strings, not QNs, fix!
+        final_objectives = {cell: data
+                            for cells_spec, data in self.objectives.items()
+                            for cell in xl_cell_or_range_elements_qn(cells_spec, self.specification_sheet_name())}
+        pos_objective = (f'{reference(cell)}'
+                         for cell, (level, direction) in final_objectives.items() if
+                         direction == OptimizationDirection.MINIMIZE and level < 1)
+        neg_objective = list(f'{reference(cell)}'
                              for cell, (level, direction) in final_objectives.items() if
-                             direction == OptimizationDirection.MINIMIZE and level < 1)
-            neg_objective = list(f'{cell.to_c_identifier()}'
-                                 for cell, (level, direction) in final_objectives.items() if
-                                 direction == OptimizationDirection.MAXIMIZE and level < 1)
-            print(
-                f'\nminimize {" + ".join(pos_objective)}{" - " if len(neg_objective) > 0 else ""}{" - ".join(neg_objective)};',
-                file=f)
+                             direction == OptimizationDirection.MAXIMIZE and level < 1)
+        print(
+            f'\nminimize {" + ".join(pos_objective)}{" - " if len(neg_objective) > 0 else ""}{" - ".join(neg_objective)};',
+            file=f)
+
+    def _opl_arrays(self, cells, key: Callable[[QualifiedName], object]) -> Sequence[OplArray]:
+        """
+        Group the given cells into vertical runs of cells having the same key, and return a sequence of arrays, one for
+        each run that has more than one cell
+        """
+        by_column = defaultdict(list)
+        for cell in cells:
+            row, col, sheet = cell_qn_to_components(cell)
+            by_column[sheet, col, key(cell)].append((row, cell))
+        arrays = []
+        for (sheet, col, _), column_cells in by_column.items():
+            for run in vertical_runs([cell for _, cell in sorted(column_cells)]):
+                if len(run) < 2:
+                    continue
+                start_row = cell_qn_to_components(run[0])[0]
+                end_row = start_row + len(run) - 1
+                name = QualifiedName(f'{cell_as_str(start_row, col, sheet)}_{coords_to_cell(end_row, col)}',
+                                     type=MArray(self.types[run[0]].mtype, range(start_row, end_row + 1)),
+                                     lexical_path=worksheet_path(sheet))
+                arrays.append(OplArray(name, run, start_row, end_row))
+        return sorted(arrays, key=lambda a: a.name.to_c_identifier())
+
+    def _vectorized_block_code(self, block: DraggedBlock, array_of: Mapping[QualifiedName, OplArray]
+                               ) -> Optional[FormalContent]:
+        """
+        Return the body of a forall constraint over the rows of the block, or None if some relative cell doesn't move
+        inside a single array
+        """
+        row_var = MathVariable(OPL_ROW_QN)
+        substitutions = {}
+        for cell in {cell.name for cell in CELL_COLLECTOR.collect(block.code) if cell is not None}:
+            row, col, sheet = cell_qn_to_components(cell)
+            array = array_of.get(cell)
+            if cell in block.relative_cells:
+                if array is None or array_of.get(as_cell_qn(row + len(block) - 1, col, sheet)) is not array:
+                    return None
+                offset = row - block.start_row
+                index = row_var if offset == 0 else row_var + Quantity(offset) if offset > 0 else row_var - Quantity(
+                    -offset)
+                substitutions[cell] = Subscripted(MathVariable(array.name), (index,))
+            elif array is not None:
+                substitutions[cell] = Subscripted(MathVariable(array.name), (Quantity(row),))
+        return block.code.substitute(substitutions)
+
+    @staticmethod
+    def _array_for_range(symbolic_range: SymbolicRange, array_of: Mapping[QualifiedName, OplArray]
+                         ) -> Optional[OplArray]:
+        """
+        Return the array that contains all cells of a range that was kept symbolic, or None if there is no such array
+        """
+        array = array_of.get(as_cell_qn(symbolic_range.start_row, symbolic_range.col, symbolic_range.sheet))
+        if array is None or array_of.get(
+                as_cell_qn(symbolic_range.end_row, symbolic_range.col, symbolic_range.sheet)) is not array:
+            return None
+        return array
+
+    def _expand_symbolic_ranges(self, placeholders: Set[QualifiedName]):
+        """
+        Translate again, expanding the given ranges, all constraints in which these ranges were kept symbolic
+        """
+        aggregates = self.symbolic_aggregates
+        aggregates.expanded.update(aggregates.ranges.pop(name) for name in placeholders)
+        if self.translation_cache is not None:
+            # Cached translations may contain the placeholders
+            self.translation_cache.clear()
+        for cell, code in self.constraints.items():
+            if aggregates.placeholders(code) & placeholders:
+                self.constraints[cell] = self.cell_to_constraint(cell, self.cell_qn_value(cell), self.domain_table).code
+        for block in {id(b): b for b in self.blocks.values()}.values():
+            if not aggregates.placeholders(block.code) & placeholders:
+                continue
+            cells = block.cells()
+            new_block = self.block_to_constraint(cells, self.domain_table)
+            for cell in cells:
+                if new_block is not None:
+                    self.blocks[cell] = new_block
+                else:
+                    del self.blocks[cell]
+                    self.constraints[cell] = self.cell_to_constraint(cell, self.cell_qn_value(cell),
+                                                                     self.domain_table).code
+
+    def _to_vectorized_opl(self, opl_file: str):
+        """
+        Write the model, declaring vertical runs of cells with the same type as arrays indexed by row, and writing
+        one forall constraint for each dragged block whose relative cells move inside arrays
+        """
+        constant_arrays = self._opl_arrays(self.constants.keys(), lambda cell: self.types[cell])
+        dvar_arrays = self._opl_arrays(self.dvars, lambda cell: self.types[cell])
+        self.opl_arrays = (*constant_arrays, *dvar_arrays)
+        array_of = {cell: array for array in self.opl_arrays for cell in array.cells}
+
+        # Ranges whose cells are not all in the same array (which can happen if ``_can_index_range`` was wrong about
+        # which cells are constants) are expanded
+        while outside := {name for name, r in self.symbolic_aggregates.ranges.items()
+                          if self._array_for_range(r, array_of) is None}:
+            self._expand_symbolic_ranges(outside)
+        range_arrays = {name: MathVariable(self._array_for_range(r, array_of).name)
+                        for name, r in self.symbolic_aggregates.ranges.items()}
+
+        def subscripted(cell: QualifiedName) -> Term:
+            return Subscripted(MathVariable(array_of[cell].name), (Quantity(cell_qn_to_components(cell)[0]),))
+
+        def scalar_code(code: FormalContent) -> FormalContent:
+            return code.substitute({**{cell.name: subscripted(cell.name)
+                                       for cell in CELL_COLLECTOR.collect(code)
+                                       if cell is not None and cell.name in array_of},
+                                    **range_arrays})
+
+        def reference(cell: QualifiedName) -> str:
+            if (array := array_of.get(cell)) is not None:
+                return f'{array.name.to_c_identifier()}[{cell_qn_to_components(cell)[0]}]'
+            return cell.to_c_identifier()
+
+        constraints = [self.convert_to_language(scalar_code(c)).value for c in self.constraints.values()]
+        for block in sorted({id(b): b for b in self.blocks.values()}.values(),
+                            key=lambda b: (b.sheet, b.col, b.start_row)):
+            if (code := self._vectorized_block_code(block, array_of)) is not None:
+                constraints.append(f'forall ({OPL_ROW_QN.to_c_identifier()} in {block.start_row}..{block.end_row}) '
+                                   f'{self.convert_to_language(code.substitute(range_arrays)).value}')
+            else:
+                constraints.extend(self.convert_to_language(scalar_code(block.code_for_row(row))).value
+                                   for row in range(block.start_row, block.end_row + 1))
+
+        with open(opl_file, 'w') as f:
+            if self.use_epsilon:
+                print(f'float epsilon = {self.epsilon};\n', file=f)
+            for array in constant_arrays:
+                values = ', '.join(const_to_opl(self.constants[cell]) for cell in array.cells)
+                print(f'{self.types[array.cells[0]].mtype.for_opl()} {array.name.to_c_identifier()}'
+                      f'[{array.start_row}..{array.end_row}] = [{values}];', file=f)
+            for var in sorted(self.constants.keys()):
+                if var not in array_of:
+                    t = self.types[var]
+                    print(f'{t.mtype.for_opl()} {var.to_c_identifier()} = {const_to_opl(self.constants[var])};',
+                          file=f)
+            for array in dvar_arrays:
+                stype, range = self._opl_dvar_type(self.types[array.cells[0]])
+                print(f'dvar {stype} {array.name.to_c_identifier()}[{array.start_row}..{array.end_row}]'
+                      f'{f" in {range}" if range else ""};', file=f)
+            for var in self.dvars:
+                if var not in array_of:
+                    stype, range = self._opl_dvar_type(self.types[var])
+                    print(f'dvar {stype} {var.to_c_identifier()}{f" in {range}" if range else ""};', file=f)
+            self._print_objective(f, reference)
 
             print('', file=f)
             print('subject to {', file=f)
             for c in constraints:
-                # print('  ' + c + ';', file=f)
-                print(f'  {c.value};', file=f)
+                print(f'  {c};', file=f)
             print('}', file=f)
 
 
@@ -223,9 +829,23 @@ default_sheet = 'S>s bool self-contained V2'
 default_ref_file = Path(__file__).parent.parent / 'test-output/scenoptic/expected/gen-opl.mod'
 
 
-def run_excel_test(excel_file, mod_file, sheet=default_sheet):
-    s = ScenarioForOPL(excel_file, sheet=sheet)
-    s.build()
+def run_excel_test(excel_file, mod_file, sheet=default_sheet, vectorize=False, cache_translations=False,
+                   incremental=False, read_only=False, trace_memory=False):
+    """
+    :param incremental: if True, the build state is kept next to the output file, and only cells that changed since
+        the previous run (and the cells that depend on them) are translated
+    :param read_only: if True, the workbook is loaded in read-only mode, and the load time (and, if ``trace_memory``
+        is True, the peak memory) is printed
+    """
+    s = ScenarioForOPL(excel_file, sheet=sheet, vectorize=vectorize, cache_translations=cache_translations,
+                       read_only=read_only, trace_memory=trace_memory)
+    if (load_report := s.load_report()) is not None:
+        print(load_report)
+    s.build(state_file=f'{mod_file}{BUILD_STATE_SUFFIX}' if incremental else None)
+    if cache_translations:
+        print(s.translation_cache.report())
+    if s.build_state is not None:
+        print(s.build_state.report())
     s.to_opl(mod_file)
 
 
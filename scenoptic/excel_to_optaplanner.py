@@ -6,11 +6,12 @@ import re
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import partial, cached_property
 from inspect import isfunction
 from operator import itemgetter
 from pathlib import Path
 from queue import SimpleQueue
-from typing import Tuple, Mapping, Sequence, Set, Callable, Optional, Any, MutableMapping, Union
+from typing import Tuple, Mapping, Sequence, Set, Callable, Optional, Any, MutableMapping, Union, Iterator
 
 import inflection
 from jinja2 import Environment, PackageLoader, select_autoescape
@@ -36,6 +37,7 @@ from scenoptic.excel_rules import ExcelIfRule, to_math, ConvertExcelFunctions, E
     ExcelCriteriaRule, AggregateZipCellsRule, TranslateExcelSumif, TranslateExcelSumifs, TranslateExcelCountif, \
     TranslateExcelCountifs, ExpandExcelSumOneArg, ExcelConditionalSummingRule
 from scenoptic.excel_symbols import as_excel_name, worksheet_path
+from scenoptic.excel_translation_cache import TranslationCache
 from scenoptic.excel_to_math import Scenario, OptimizationDirection, Constraint, Constant, CELL_COLLECTOR, \
     extract_cell_components_to_dict, ExcelOperator, EXCEL_OPERATORS, EXCEL_AGGREGATE_OPERATORS, EXCEL_SUM_OPERATORS, \
     EXCEL_COUNT_OPERATORS, AbstractConstraint, extract_cell_components, CellSpec
@@ -425,6 +427,129 @@ class OptaPhase01Constraint(Phase01Constraint):
                                      self.original_cell)
 
 
+@dataclass(frozen=True)
+class PredecessorsDescriptor:
+    """
+    The predecessors shared by a block of cells, relative to each cell in the block.
+
+    The predecessors of a cell are ordered as the fixed cells, then the single cells, then the cells of each range
+    (row by row).
+    """
+    # sheet, row, col
+    fixed_cells: Tuple[Tuple[str, int, int], ...]
+    # sheet, row_distance, col_distance
+    cells_category: Tuple[Tuple[str, int, int], ...]
+    # sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dist
+    range_category: Tuple[Tuple[str, int, int, int, int], ...]
+
+    def __len__(self):
+        return self._size
+
+    @cached_property
+    def _size(self) -> int:
+        return (len(self.fixed_cells) + len(self.cells_category) +
+                sum((end_row - first_row + 1) * (end_col - first_col + 1)
+                    for _, first_row, end_row, first_col, end_col in self.range_category))
+
+    @cached_property
+    def _indices(self) -> Tuple[Mapping[Tuple[str, int, int], int], Mapping[Tuple[str, int, int], int]]:
+        # The last index of each fixed cell, and of each single cell by its distance
+        return ({cell: index for index, cell in enumerate(self.fixed_cells)},
+                {cell: index for index, cell in enumerate(self.cells_category, len(self.fixed_cells))})
+
+    def cells(self, row: int, col: int) -> Iterator[Tuple[str, int, int]]:
+        """
+        Return the predecessors (sheet, row, col) of the cell at the given coordinates
+        """
+        yield from self.fixed_cells
+        for sheet, row_dist, col_dist in self.cells_category:
+            yield sheet, row + row_dist, col + col_dist
+        for sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dist in self.range_category:
+            for pred_row in range(row + first_row_dist, row + end_row_dist + 1):
+                for pred_col in range(col + first_col_dist, col + end_col_dist + 1):
+                    yield sheet, pred_row, pred_col
+
+    def cell_at(self, index: int, row: int, col: int) -> Tuple[str, int, int]:
+        if index < 0:
+            index += len(self)
+        if index < 0:
+            raise IndexError(index)
+        if index < len(self.fixed_cells):
+            return self.fixed_cells[index]
+        index -= len(self.fixed_cells)
+        if index < len(self.cells_category):
+            sheet, row_dist, col_dist = self.cells_category[index]
+            return sheet, row + row_dist, col + col_dist
+        index -= len(self.cells_category)
+        for sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dist in self.range_category:
+            n_cols = end_col_dist - first_col_dist + 1
+            size = (end_row_dist - first_row_dist + 1) * n_cols
+            if index < size:
+                return sheet, row + first_row_dist + index // n_cols, col + first_col_dist + index % n_cols
+            index -= size
+        raise IndexError(index)
+
+    def index_of(self, sheet: str, pred_row: int, pred_col: int, row: int, col: int) -> Optional[int]:
+        """
+        Return the last index of the given predecessor of the cell at the given coordinates, or None if it is not a
+        predecessor of that cell
+        """
+        row_dist = pred_row - row
+        col_dist = pred_col - col
+        start = len(self)
+        for range_sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dist in reversed(self.range_category):
+            n_cols = end_col_dist - first_col_dist + 1
+            start -= (end_row_dist - first_row_dist + 1) * n_cols
+            if (range_sheet == sheet and first_row_dist <= row_dist <= end_row_dist
+                    and first_col_dist <= col_dist <= end_col_dist):
+                return start + (row_dist - first_row_dist) * n_cols + col_dist - first_col_dist
+        fixed_indices, cell_indices = self._indices
+        if (index := cell_indices.get((sheet, row_dist, col_dist))) is not None:
+            return index
+        return fixed_indices.get((sheet, pred_row, pred_col))
+
+
+class RelativePredecessors(Sequence):
+    """
+    The predecessors of a single cell, given by the descriptor of its block; qualified names are only created when the
+    predecessors are accessed.
+    """
+
+    def __init__(self, descriptor: PredecessorsDescriptor, row: int, col: int,
+                 to_qn: Callable[[int, int, str], QualifiedName]):
+        self.descriptor = descriptor
+        self.row = row
+        self.col = col
+        self.to_qn = to_qn
+
+    def __len__(self):
+        return len(self.descriptor)
+
+    def __iter__(self):
+        return (self.to_qn(row, col, sheet) for sheet, row, col in self.descriptor.cells(self.row, self.col))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        sheet, row, col = self.descriptor.cell_at(index, self.row, self.col)
+        return self.to_qn(row, col, sheet)
+
+    def index_of(self, cell: QualifiedName) -> Optional[int]:
+        """
+        Return the last index of the given cell in these predecessors, or None if it is not one of them
+        """
+        sheet, row, col = extract_cell_components(cell.name)
+        return self.descriptor.index_of(sheet, row, col, self.row, self.col)
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and len(self) == len(other) and tuple(self) == tuple(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'RelativePredecessors({self.descriptor}, row={self.row}, col={self.col})'
+
+
 class IncrementalsSplitter(RewriteRule):
     """
     This rule replaces incremental operators by new Cell variables.  It collects the new variables and the corresponding
@@ -570,7 +695,11 @@ def summing_cell_info(term: Term) -> Optional[CRITERIA_INFO]:
 
 class ScenarioForOptaPlanner(Scenario):
     def __init__(self, name: Optional[str], base_package, excel_file, sheet: str = None, default_type=FloatCell(),
-                 incremental=True):
+                 incremental=True, cache_translations=False):
+        """
+        :param cache_translations: if True, cells with the same formula shape are translated by instantiating the
+            translation of a previous cell (see ``TranslationCache``)
+        """
         super().__init__(excel_file, sheet, default_type, CellTypeFactory(CELL_TYPES_FOR_OPTAPLANNER))
         self.name = name_to_identifier(name) if name is not None else None
         self.base_package = base_package
@@ -592,6 +721,10 @@ class ScenarioForOptaPlanner(Scenario):
         self.domain_table = DomainTableForScenoptic()
         self.fresh_column_counter = defaultdict(int)
         self.this = MathVariable(THIS)
+        self.phase01_cache = TranslationCache('Phase 1', self.get_type) if cache_translations else None
+        self.phase02_cache = TranslationCache('Phase 2', self.get_type) if cache_translations else None
+        # names of the values parameter of the lambda expressions of phase 2, shared by cells with the same cache key
+        self.values_names: MutableMapping[Any, QualifiedName] = {}
 
     def _fresh_name_by_col(self, sheet: str, col: Union[int, str]) -> QualifiedName:
         if isinstance(col, int):
@@ -616,6 +749,10 @@ class ScenarioForOptaPlanner(Scenario):
         return tuple(self._get_or_create_var(prefix, constraint)
                      for prefix, constraint in zip(prefixes, constraints))
 
+    def _typed_cell_qn(self, row: int, col: int, sheet: str) -> QualifiedName:
+        cell_qn = as_cell_qn(row, col, sheet)
+        return cell_qn.with_type(self.get_type(cell_qn))
+
     def _value_var_reference_for_cell(self, cell, values_var, index):
         ctype = self.get_type(cell)
         return self.value_var_reference_by_type(ctype, index, values_var)
@@ -823,11 +960,22 @@ class ScenarioForOptaPlanner(Scenario):
             # FIXME!!!!!! incompatible use of code (not FormalContent), fix classes
             return OptaPhase01Constraint(code=Constant(None), predecessors=[], subexpression_cells=set(),
                                          original_cell=cell), ()
+        cache = self.phase01_cache
+        key = None
+        cached = None
+        get_role = partial(self._cell_role, domain_table=domain_table)
+        if cache is not None and isinstance(contents, str) and cell not in self.dummy_cells:
+            key = cache.shape_key(self, cell)
+            cached = cache.lookup(key, cell, get_role)
         # contents can be an expression (FormalContent) for dummy cells
         expr0 = (contents if isinstance(contents, FormalContent)
                  else parse_formula(contents, self, get_sheet_in_cell_qn_as_string(cell)))
         if domain_table is not None:
             domain_table.build(expr0)
+        if cached is not None:
+            # The domain table is built as for a full translation, so that it is the same with or without the cache
+            code, predecessors = cached
+            return OptaPhase01Constraint(code, {pred.name for pred in predecessors}, set(), cell), ()
         # FIXME!!!!!! return code=expr0
         if isinstance(expr0, (Quantity, StringTerm)):
             return OptaPhase01Constraint(code=Constant(expr0.to_code_rep().value), predecessors=[],
@@ -854,9 +1002,10 @@ class ScenarioForOptaPlanner(Scenario):
                              for cell in CELL_COLLECTOR.collect(expr3.container.container)
                              if cell is not None}
             return IncrementalPhase01Constraint(expr3, non_inc_preds, subexpression_cells, cell, all_inc_preds), ()
-        cells = {cell.name for cell in CELL_COLLECTOR.collect(expr3)
-                 if cell is not None}
-        return OptaPhase01Constraint(expr3, cells, subexpression_cells, cell), ()
+        cell_list = [cell.name for cell in CELL_COLLECTOR.collect(expr3) if cell is not None]
+        if key is not None and not subexpression_cells:
+            cache.add(key, cell, expr3, cell_list, get_role=get_role)
+        return OptaPhase01Constraint(expr3, set(cell_list), subexpression_cells, cell), ()
 
     def cell_to_constraint_phase02(self, cell: QualifiedName, contents: Phase01Constraint,
                                    domain_table: DomainTable = None
@@ -882,22 +1031,52 @@ class ScenarioForOptaPlanner(Scenario):
                                          expr3.term.appl_info.type, all_inc_preds, non_inc_preds,
                                          subexpression_cells), ()
         cells = contents.predecessors
-        values_qn = FormalContent.fresh_name(VALUES_QN, 'lambda-')
+        cache = self.phase02_cache
+        key = None
+        cached = None
+        get_role = partial(self._cell_role, domain_table=domain_table)
+        if (cache is not None and isinstance(cells, RelativePredecessors)
+                and contents.original_cell not in self.dummy_cells):
+            key = cache.shape_key(self, contents.original_cell, cells.descriptor)
+            cached = cache.lookup(key, contents.original_cell, get_role)
+        if key is None:
+            values_qn = FormalContent.fresh_name(VALUES_QN, 'lambda-')
+        elif (values_qn := self.values_names.get(key)) is None:
+            values_qn = self.values_names[key] = FormalContent.fresh_name(VALUES_QN, 'lambda-')
         values_var = MathVariable(values_qn)
         func0 = LambdaExpression((values_qn,), expr3)
         if domain_table is not None:
             domain_table.build(func0)
+        if cached is not None:
+            return OptaPlannerConstraint(cached[0], cells, subexpression_cells), ()
         func1 = exhaustively_apply_rules(EXCEL_TO_JAVA_RULES1, func0, domain_table)
-        values_refs = [self._value_var_reference_for_cell(cell, values_var, index)
-                       for index, cell in enumerate(cells)]
-        substitutions = dict(zip(cells, values_refs))
+        if isinstance(cells, RelativePredecessors):
+            # Only the predecessors that occur in the formula are substituted, at their indices in the block descriptor
+            indices = {cells.index_of(pred.name) for pred in CELL_COLLECTOR.collect(expr3) if pred is not None}
+            indices.discard(None)
+            substitutions = {(pred := cells[index]): self._value_var_reference_for_cell(pred, values_var, index)
+                             for index in indices}
+        else:
+            values_refs = [self._value_var_reference_for_cell(cell, values_var, index)
+                           for index, cell in enumerate(cells)]
+            substitutions = dict(zip(cells, values_refs))
         func2 = func1.substitute(substitutions)
         if domain_table is not None:
             domain_table.build(func2)
         code = exhaustively_apply_rules(EXCEL_TO_JAVA_RULES2, func2, domain_table)
+        if key is not None:
+            cache.add(key, contents.original_cell, code, cells, get_role=get_role)
         result = OptaPlannerConstraint(code, cells, subexpression_cells)
         return result, ()
 
+    def _cell_role(self, cell: QualifiedName, domain_table: DomainTable = None) -> Tuple[bool, bool]:
+        """
+        Return whether the given cell is a parameter, and whether it is known to be a decision variable; the
+        translation of formulas that refer to the cell may depend on these (see ``TranslationCache``)
+        """
+        info = domain_table.var_table.get(cell) if domain_table is not None else None
+        return cell in self.parameters, info is not None and info.is_dvar()
+
     def convert_to_language(self, expression: FormalContent):
         return convert_excel_expr_to_java(expression)
 
@@ -961,6 +1140,9 @@ class ScenarioForOptaPlanner(Scenario):
     def build(self):
         self.find_translation_arguments()
         self.validate_initialization()
+        for cache in (self.phase01_cache, self.phase02_cache):
+            if cache is not None:
+                cache.clear()
         domain_table = self.domain_table
         all_predecessors = {}
         constraints = {}
@@ -1183,67 +1365,39 @@ class ScenarioForOptaPlanner(Scenario):
             verbose=verbose)
 
         #
-        # Step 3: We expand,extract the above ordered predecessors, into ordered qualified names
+        # Step 3: Attach to each cell constraint its predecessors, as given by the descriptor of its block;
         #         the order is:
         #          (fixed_columns_qn,  regular_cells_qn, cells_in_range_qn) each sub set ordered by column
+        #         The qualified names of the predecessors are only created when they are needed.
         #
-        def cell_spec_to_qn(row: int, col: int, sheet: str) -> QualifiedName:
-            cell_qn = as_cell_qn(row, col, sheet)
-            return cell_qn.with_type(self.get_type(cell_qn))
-
-        def expand_cell_info(cell_key: CellSpec,
-                             # sheet, row, col
-                             fixed_cells: Tuple[Tuple[str, int, int], ...],
-                             # sheet, row_distance, col_distance
-                             cells_category: Tuple[Tuple[str, int, int], ...],
-                             # sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dis
-                             range_category: Tuple[Tuple[str, int, int, int, int], ...]):
-            cell_qn = cell_spec_to_qn(cell_key['row'], cell_key['col'], cell_key['sheet'])
-
-            fixed_cells_qn = [cell_spec_to_qn(row, col, sheet)
-                              for sheet, row, col in fixed_cells]
-
-            cells_by_distance_qn = [
-                cell_spec_to_qn(cell_key['row'] + distance[1],
-                                cell_key['col'] + distance[2],
-                                distance[0])
-                for distance in cells_category]
-
-            range_by_distance_qn = \
-                [cell_spec_to_qn(row, col, sheet)
-                 for sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dist in range_category
-                 for row in range(cell_key['row'] + first_row_dist, cell_key['row'] + end_row_dist + 1)
-                 for col in range(cell_key['col'] + first_col_dist, cell_key['col'] + end_col_dist + 1)]
-            return dict(cell=cell_qn, predecessors=[*fixed_cells_qn, *cells_by_distance_qn, *range_by_distance_qn])
-
-        cells_predecessors_by_cell = [expand_cell_info(cell['cell'],
-                                                       cell['fixed_cells'],
-                                                       cell['cells_category'],
-                                                       cell['range_category'])
-                                      for cell in sorted(cells, key=lambda c: (c['key']))]
-
-        cells_predecessors_by_range = [
-            expand_cell_info(dict(sheet=arange['range']['sheet'], row=row, col=col),
-                             arange['fixed_cells'],
-                             arange['cells_category'],
-                             arange['range_category'])
-            for arange in sorted(ranges, key=lambda c: (c['key']))
-            for col in range(arange['range']['start_col'], arange['range']['end_col'] + 1)
-            for row in range(arange['range']['start_row'], arange['range']['end_row'] + 1)]
+        descriptors = {}
+
+        def descriptor_of(info) -> PredecessorsDescriptor:
+            key = (info['fixed_cells'], info['cells_category'], info['range_category'])
+            if (descriptor := descriptors.get(key)) is None:
+                descriptor = descriptors[key] = PredecessorsDescriptor(*key)
+            return descriptor
+
+        def set_predecessors(sheet: str, row: int, col: int, descriptor: PredecessorsDescriptor):
+            cell_qn = self._typed_cell_qn(row, col, sheet)
+            if verbose:
+                print(f'{cell_qn.name}: {descriptor}')
+            self.phase01_constraints[cell_qn] = self.phase01_constraints[cell_qn].with_predecessors(
+                RelativePredecessors(descriptor, row, col, self._typed_cell_qn))
 
-        #
-        # Step 4: update the cell constraints with the updated ordered predecessors
-        #
         if verbose:
             print('Ordered Predecessors:')
-        for cell in itertools.chain(cells_predecessors_by_cell, cells_predecessors_by_range):
-            if verbose:
-                print(f'{cell}')
-            self.phase01_constraints[cell['cell']] = \
-                self.phase01_constraints[cell['cell']].with_predecessors(cell['predecessors'])
+        for info in sorted(cells, key=lambda c: (c['key'])):
+            info['descriptor'] = descriptor_of(info)
+            set_predecessors(info['cell']['sheet'], info['cell']['row'], info['cell']['col'], info['descriptor'])
+        for arange in sorted(ranges, key=lambda c: (c['key'])):
+            arange['descriptor'] = descriptor_of(arange)
+            for col in range(arange['range']['start_col'], arange['range']['end_col'] + 1):
+                for row in range(arange['range']['start_row'], arange['range']['end_row'] + 1):
+                    set_predecessors(arange['range']['sheet'], row, col, arange['descriptor'])
 
         #
-        # Step 5: Keep the predecessors compression to ranges for java synthesis
+        # Step 4: Keep the predecessors compression to ranges for java synthesis
         #
         self.predecessors_cells = cells
         self.predecessors_ranges = ranges
@@ -1564,7 +1718,12 @@ def normalize_java_vars(var_name: str):
     return convert_to_java_string(var_name)
 
 
-def run_excel_test(excel_file, java_base_path, sheet, base_name, base_package, incremental=True):
-    s = ScenarioForOptaPlanner(base_name, base_package, excel_file, sheet=sheet, incremental=incremental)
+def run_excel_test(excel_file, java_base_path, sheet, base_name, base_package, incremental=True,
+                   cache_translations=False):
+    s = ScenarioForOptaPlanner(base_name, base_package, excel_file, sheet=sheet, incremental=incremental,
+                               cache_translations=cache_translations)
     s.build()
+    if cache_translations:
+        print(s.phase01_cache.report())
+        print(s.phase02_cache.report())
     s.to_java(java_base_path)
@@ -0,0 +1,186 @@
+from typing import Optional, Sequence, Tuple, Dict, List, Callable, Hashable, Any
+
+from math_rep.expr import FormalContent
+from math_rep.expression_types import QualifiedName
+from scenoptic.excel_analyze import cell_formula_shape
+from scenoptic.excel_data import CellType
+from scenoptic.scenoptic_expr import Cell
+from scenoptic.xl_utils import cell_qn_to_components
+
+
+def same_cell_type(type1: Optional[CellType], type2: Optional[CellType]) -> bool:
+    return type1 is type2 or (type(type1) == type(type2) and vars(type1) == vars(type2))
+
+
+class TranslationTemplate:
+    """
+    The translation of a formula in one cell, together with what is known about how each of the cells it refers to
+    moves when the formula is dragged.
+
+    For each cell, and separately for rows and columns, the reference is known to be relative (True), fixed (False),
+    or not known yet (None).  The roles of the cells (see ``TranslationCache``) when the formula was translated are
+    also kept, if known.
+    """
+
+    def __init__(self, origin: QualifiedName, code: FormalContent, predecessors: Sequence[QualifiedName],
+                 cells: Sequence[QualifiedName], roles: Optional[Sequence[Hashable]] = None):
+        self.row, self.col, _ = cell_qn_to_components(origin)
+        self.code = code
+        self.n_predecessors = len(predecessors)
+        self.cells = (*predecessors, *cells)
+        self.coords = [cell_qn_to_components(cell) for cell in self.cells]
+        self.relative_rows: List[Optional[bool]] = [None] * len(self.cells)
+        self.relative_cols: List[Optional[bool]] = [None] * len(self.cells)
+        self.roles = roles
+        self.verified = False
+        self.rejected = False
+
+    def moved_coords(self, row: int, col: int) -> Optional[List[Tuple[int, int, str]]]:
+        """
+        Return the coordinates of the cells referred to by the formula when it is dragged to (row, col), or None if
+        that isn't known yet
+        """
+        drow = row - self.row
+        dcol = col - self.col
+        result = []
+        for (cell_row, cell_col, sheet), relative_row, relative_col in zip(self.coords, self.relative_rows,
+                                                                           self.relative_cols):
+            if (drow and relative_row is None) or (dcol and relative_col is None):
+                return None
+            result.append((cell_row + drow if relative_row else cell_row,
+                           cell_col + dcol if relative_col else cell_col,
+                           sheet))
+        return result
+
+    def learn(self, row: int, col: int, cells: Sequence[QualifiedName]) -> bool:
+        """
+        Learn how references move from the cells referred to by the translation of the same formula in (row, col);
+        return False if they don't move consistently
+        """
+        if len(cells) != len(self.cells):
+            return False
+        drow = row - self.row
+        dcol = col - self.col
+        for index, (cell, (cell_row, cell_col, sheet)) in enumerate(zip(cells, self.coords)):
+            new_row, new_col, new_sheet = cell_qn_to_components(cell)
+            if new_sheet != sheet:
+                return False
+            for delta, old, new, relative in ((drow, cell_row, new_row, self.relative_rows),
+                                              (dcol, cell_col, new_col, self.relative_cols)):
+                if delta == 0:
+                    if new != old:
+                        return False
+                elif new == old and relative[index] is not True:
+                    relative[index] = False
+                elif new == old + delta and relative[index] is not False:
+                    relative[index] = True
+                else:
+                    return False
+        return True
+
+
+class TranslationCache:
+    """
+    Cache of formula translations, keyed by the R1C1 shape of the formula (see ``formula_shape``) and any other
+    information the translation depends on.
+
+    The first cell with a given key is translated in full and kept as a template.  The next cells with the same key are
+    also translated in full until the template has learned how each of its cell references moves (and the
+    instantiated template has been checked against the full translation); after that, each cell is translated by
+    substituting the moved cells into the template, provided that they have the same types as the original ones.
+    Shapes whose translations don't move consistently are rejected and always translated in full.
+
+    The translation of a formula may also depend on the role of the cells it refers to, such as whether they are
+    parameters, constants, or decision variables.  The methods that access the cache can therefore be given a function
+    that returns the role of a cell; the template is used only if the roles of the moved cells are the same as those
+    of the original cells.
+    """
+
+    def __init__(self, name: str, get_type: Callable[[QualifiedName], Optional[CellType]]):
+        self.name = name
+        self.get_type = get_type
+        self.templates: Dict[Hashable, TranslationTemplate] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.templates.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def shape_key(self, scenario, cell: QualifiedName, *extra: Any) -> Optional[Tuple]:
+        """
+        Return the cache key for the formula in the given cell, or None if it doesn't contain a formula
+        """
+        row, col, sheet = cell_qn_to_components(cell)
+        shape = cell_formula_shape(dict(sheet=sheet, row=row, col=col), scenario)
+        if shape is None:
+            return None
+        return shape, sheet, *extra
+
+    def _substitution(self, template: TranslationTemplate, row: int, col: int,
+                      get_role: Callable[[QualifiedName], Hashable] = None) -> Optional[Dict[QualifiedName, Cell]]:
+        moved = template.moved_coords(row, col)
+        if moved is None:
+            return None
+        roles = template.roles if get_role is not None else None
+        substitution = {}
+        for index, (cell, (new_row, new_col, sheet)) in enumerate(zip(template.cells, moved)):
+            new_cell = Cell(new_row, new_col, sheet, ctype=cell.type)
+            if not same_cell_type(self.get_type(new_cell.name), self.get_type(cell)):
+                return None
+            if roles is not None and get_role(new_cell.name) != roles[index]:
+                return None
+            substitution[cell] = new_cell
+        return substitution
+
+    def lookup(self, key: Optional[Hashable], cell: QualifiedName, get_role: Callable[[QualifiedName], Hashable] = None
+               ) -> Optional[Tuple[FormalContent, List[Cell]]]:
+        """
+        Return the translation of the formula in the given cell together with its predecessors, or None if the cell
+        must be translated in full
+        """
+        template = self.templates.get(key) if key is not None else None
+        if template is not None and not template.rejected:
+            row, col, _ = cell_qn_to_components(cell)
+            if ((template.verified or (row, col) == (template.row, template.col))
+                    and (substitution := self._substitution(template, row, col, get_role)) is not None):
+                self.hits += 1
+                return (template.code.substitute(substitution),
+                        [substitution[pred] for pred in template.cells[:template.n_predecessors]])
+        self.misses += 1
+        return None
+
+    def add(self, key: Optional[Hashable], cell: QualifiedName, code: FormalContent,
+            predecessors: Sequence[QualifiedName], cells: Sequence[QualifiedName] = (),
+            get_role: Callable[[QualifiedName], Hashable] = None):
+        """
+        Record the full translation of the formula in the given cell, with its predecessors and any other cells that
+        appear in the code; these must be given in an order that is the same for all cells with this key (such as the
+        order in which they appear in the formula)
+        """
+        if key is None:
+            return
+        template = self.templates.get(key)
+        if template is None:
+            roles = [get_role(c) for c in (*predecessors, *cells)] if get_role is not None else None
+            self.templates[key] = TranslationTemplate(cell, code, predecessors, cells, roles)
+            return
+        if template.rejected:
+            return
+        row, col, _ = cell_qn_to_components(cell)
+        if not template.learn(row, col, (*predecessors, *cells)):
+            template.rejected = True
+            return
+        substitution = self._substitution(template, row, col, get_role)
+        # If the types or roles of the cells differ, the cell can't be used to check the template
+        if substitution is not None:
+            if template.code.substitute(substitution).describe() == code.describe():
+                template.verified = True
+            else:
+                template.rejected = True
+
+    def report(self) -> str:
+        rejected = sum(1 for template in self.templates.values() if template.rejected)
+        return (f'{self.name} translation cache: {self.hits} hits, {self.misses} misses, '
+                f'{len(self.templates)} shapes ({rejected} rejected)')
@@ -18,7 +18,7 @@ from math_rep.expression_types import MType, M_ANY, QualifiedName, as_math_name
 from scenoptic.excel_analyze_variability import VariabilityTree, bind_cell_variability_by_tree
 from scenoptic.excel_data import ExcelData, CellReference
 from scenoptic.excel_symbols import as_excel_name, excel_var_path
-from scenoptic.xl_utils import cell_to_coords, as_cell_qn, cell_as_str
+from scenoptic.xl_utils import cell_to_coords, as_cell_qn, cell_as_str, cell_qn_to_components
 
 COMPARISON_OPERATORS = {'<=': LE_SYMBOL, '>=': GE_SYMBOL, '<>': NOT_EQUALS_SYMBOL,
                         '=': '=', '<': '<', '>': '>'}
@@ -266,6 +266,56 @@ class ExcelFormulaExtractor(ExcelVisitor, metaclass=decorate_method((copy_text,
         raise Exception(f'Invalid named range <{named_range_candidate}>')
 
 
+class ParseTreeCache:
+    """
+    Cache of the parse trees of cell formulas in a workbook, keyed by the cell location and the formula text.
+
+    Parse trees are not modified after parsing, so the same tree can be visited any number of times.  Values derived
+    from a tree (such as its R1C1 shape) can be kept in ``shapes``, keyed by the tree.
+    """
+
+    def __init__(self):
+        self.trees: Dict[Tuple[str, int, int, str], antlr4.ParserRuleContext] = {}
+        self.shapes: Dict[antlr4.ParserRuleContext, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def parse_tree(self, formula: str, sheet: str, row: int, col: int) -> antlr4.ParserRuleContext:
+        key = (sheet, row, col, formula)
+        tree = self.trees.get(key)
+        if tree is None:
+            self.misses += 1
+            tree = get_excel_parser(formula).start()
+            self.trees[key] = tree
+        else:
+            self.hits += 1
+        return tree
+
+    def clear(self):
+        self.trees.clear()
+        self.shapes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Parse trees refer to their parser and can't be pickled; a copy of the cache starts empty
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
+
+def formula_parse_tree(formula: str, scenario: ExcelData, sheet: str = None, row: int = None, col: int = None):
+    """
+    Return the parse tree of the given (stripped) formula, using the parse-tree cache of the scenario if it has one and
+    the location of the formula is known.
+    """
+    cache = getattr(scenario, 'parse_tree_cache', None)
+    if cache is None or row is None or col is None:
+        return get_excel_parser(formula).start()
+    return cache.parse_tree(formula, sheet, row, col)
+
+
 def parse_formula(formula, scenario: ExcelData, current_sheet_name: str):
     if isinstance(formula, str):
         formula = formula.strip()
@@ -288,8 +338,12 @@ def parse_formula_with_variability(formula: str,
     if isinstance(formula, str):
         formula = formula.strip()
         if formula.startswith('='):
-            parser = get_excel_parser(formula)
-            tree = parser.start()
+            if origin_cell_qn is not None:
+                row, col, sheet = cell_qn_to_components(origin_cell_qn, current_sheet_name)
+                tree = formula_parse_tree(formula, scenario, sheet, row, col)
+            else:
+                tree = get_excel_parser(formula).start()
+            node_to_cell = None
             if origin_cell_qn is not None and variability is not None:
                 node_to_cell = bind_cell_variability_by_tree(tree, variability, verbose=False)
             extractor = ExcelFormulaExtractor(scenario, current_sheet_name, origin_cell_qn, node_to_cell)
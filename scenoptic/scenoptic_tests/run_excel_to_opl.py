@@ -11,6 +11,16 @@ def parse_generate_opl(args=None):
     parser.add_argument('-s', '--sheet', type=str, help='name of sheet to analyze')
     parser.add_argument('-c', '--self-contained', default=False, action='store_true',
                         help='all information is in the spreadsheet')
+    parser.add_argument('-v', '--vectorize', default=False, action='store_true',
+                        help='emit dragged formula blocks as indexed arrays with forall constraints')
+    parser.add_argument('-t', '--cache-translations', default=False, action='store_true',
+                        help='reuse the translation of formulas with the same shape')
+    parser.add_argument('-n', '--incremental', default=False, action='store_true',
+                        help='translate only cells that changed since the previous run with the same output file')
+    parser.add_argument('-r', '--read-only', default=False, action='store_true',
+                        help='stream the spreadsheet in read-only mode and report the load time')
+    parser.add_argument('-m', '--trace-memory', default=False, action='store_true',
+                        help='with --read-only, also report the peak memory used to load the spreadsheet')
     parsed = parser.parse_args(args)
     # print(f'Parsed args: {parsed}')
     return parsed
@@ -32,4 +42,5 @@ if __name__ == '__main__':
     print(f'Opl Scenario excel file = {excel_file}')
     print(f'Opl Scenario excel sheet = {sheet}')
     print(f'Opl Scenario generated mod file = {mod_file}')
-    run_excel_test(excel_file, mod_file, sheet)
+    run_excel_test(excel_file, mod_file, sheet, vectorize=args.vectorize, cache_translations=args.cache_translations,
+                   incremental=args.incremental, read_only=args.read_only, trace_memory=args.trace_memory)
@@ -1,13 +1,19 @@
 import numbers
 import re
 import string
-from functools import reduce
-from typing import Tuple, Optional, Generator, Iterable
+from functools import reduce, lru_cache
+from typing import Tuple, Optional, Generator, Iterable, Dict, List
+
+import numpy as np
 
 from math_rep.expression_types import QualifiedName, M_ANY
 from scenoptic.scenoptic_frame_constants import WORKSHEET_FRAME_NAME
 from scenoptic.excel_symbols import worksheet_path
 
+# Bound of the caches of conversions between cell names and coordinates, which are shared by all workbooks; the
+# qualified names of the cells of a workbook are memoized by its ``CellIds``
+CELL_NAME_CACHE_SIZE = 1 << 14
+
 
 def normalize_sheet_special_characters(sheet_name: str) -> str:
     """
@@ -77,6 +83,7 @@ def column_to_index(col) -> int:
                       (ord(ch.upper()) - ord('A') + 1 for ch in col))
 
 
+@lru_cache(maxsize=CELL_NAME_CACHE_SIZE)
 def index_to_column(index: int) -> str:
     """Translate a 1-based column index to a character column name"""
     letters = string.ascii_uppercase
@@ -96,6 +103,7 @@ SHEET_RANGE_RE = re.compile(
     rf'(?:(.*)!)?\s*({CELL_REF_PATTERN_NO_GROUPS})\s*(?::\s*({CELL_REF_PATTERN_NO_GROUPS})\s*)?')
 
 
+@lru_cache(maxsize=CELL_NAME_CACHE_SIZE)
 def cell_name_to_components(cell_name: str, sheet: str = None) -> Tuple[int, int, str]:
     m = SHEET_CELL_RE.fullmatch(cell_name)
     if m is None:
@@ -119,6 +127,7 @@ def range_to_cells(spec: str, sheet: str = None) -> Tuple[int, Optional[int], Op
     return *cells, sheet
 
 
+@lru_cache(maxsize=CELL_NAME_CACHE_SIZE)
 def cell_to_coords(cell: str) -> Tuple[int, int]:
     m1 = CELL_REF_RE.fullmatch(cell.upper())
     # FIXME!! indicate matching error as exception or None
@@ -137,6 +146,80 @@ def normalize_cell(spec) -> str:
     return coords_to_cell(row, col)
 
 
+# Excel supports up to 16,384 columns and 1,048,576 rows
+COL_BITS = 14
+ROW_BITS = 20
+
+
+class CellIds:
+    """
+    Interned integer identifiers for the cells of a workbook.
+
+    The ID of a cell packs the index of its sheet (in order of first use), its row, and its column, so that the IDs of
+    a range can be computed as an array without creating a ``QualifiedName`` for each cell.  The conversions between
+    IDs and qualified names or A1 strings are memoized for the workbook.
+    """
+
+    def __init__(self):
+        self.sheets: List[Optional[str]] = []
+        self.sheet_ids: Dict[Optional[str], int] = {}
+        self._qns: Dict[int, QualifiedName] = {}
+        self._ids: Dict[QualifiedName, Optional[int]] = {}
+
+    def sheet_id(self, sheet: Optional[str]) -> int:
+        result = self.sheet_ids.get(sheet)
+        if result is None:
+            result = self.sheet_ids[sheet] = len(self.sheets)
+            self.sheets.append(sheet)
+        return result
+
+    def cell_id(self, row: int, col: int, sheet: Optional[str]) -> int:
+        if not (0 < row <= 1 << ROW_BITS and 0 < col <= 1 << COL_BITS):
+            raise Exception(f'Cell out of range: {cell_as_str(row, col, sheet)}')
+        return (self.sheet_id(sheet) << (ROW_BITS + COL_BITS)) | ((row - 1) << COL_BITS) | (col - 1)
+
+    def range_ids(self, start_row: int, start_col: int, end_row: int, end_col: int, sheet: Optional[str]
+                  ) -> np.ndarray:
+        """
+        Return the IDs of all cells in the given range, in row-major order
+        """
+        self.cell_id(start_row, start_col, sheet)
+        self.cell_id(end_row, end_col, sheet)
+        rows = np.arange(start_row - 1, end_row, dtype=np.int64) << COL_BITS
+        cols = np.arange(start_col - 1, end_col, dtype=np.int64)
+        return ((self.sheet_id(sheet) << (ROW_BITS + COL_BITS)) | rows[:, np.newaxis] | cols).ravel()
+
+    def components(self, cell_id: int) -> Tuple[int, int, Optional[str]]:
+        return (((cell_id >> COL_BITS) & ((1 << ROW_BITS) - 1)) + 1,
+                (cell_id & ((1 << COL_BITS) - 1)) + 1,
+                self.sheets[cell_id >> (ROW_BITS + COL_BITS)])
+
+    def qn(self, cell_id: int) -> QualifiedName:
+        result = self._qns.get(cell_id)
+        if result is None:
+            result = self._qns[cell_id] = as_cell_qn(*self.components(cell_id))
+        return result
+
+    def a1(self, cell_id: int) -> str:
+        return cell_as_str(*self.components(cell_id))
+
+    def id_of(self, cell: QualifiedName) -> Optional[int]:
+        """
+        Return the ID of the cell with the given qualified name, or None if the name doesn't denote a single cell
+        """
+        try:
+            return self._ids[cell]
+        except KeyError:
+            pass
+        if SHEET_CELL_RE.fullmatch(cell.name) is None:
+            result = None
+        else:
+            row, col, sheet = cell_qn_to_components(cell, get_sheet_in_cell_qn_as_string(cell))
+            result = self.cell_id(row, col, sheet)
+        self._ids[cell] = result
+        return result
+
+
 def normalize_cell_qn(spec, sheet: str) -> QualifiedName:
     row, col = cell_to_coords(spec)
     return as_cell_qn(row, col, sheet)
@@ -198,9 +281,14 @@ CELL_EXPR = r"""
 CELL_RE = re.compile(CELL_EXPR, re.VERBOSE)
 
 
-def get_cell_re_dict(cell):
+@lru_cache(maxsize=CELL_NAME_CACHE_SIZE)
+def _cell_re_groups(cell) -> Tuple[Tuple[str, Optional[str]], ...]:
     m = CELL_RE.match(cell)
-    return m.groupdict()
+    return tuple(m.groupdict().items())
+
+
+def get_cell_re_dict(cell):
+    return dict(_cell_re_groups(cell))
 
 
 def get_full_sheet_re_dict(cell):
@@ -0,0 +1,217 @@
+import random
+import re
+from collections import namedtuple
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+from eco_profiles.parse_profiles import parse_profile_string, ProfileExtractor
+from eco_profiles.profiles_expr import PythonVisitorForProfiles, ColumnarVisitorForProfiles, ColumnarModeUnsupported
+
+
+STATIONS = ['SVO', 'KJA', 'LAX', 'CAI', 'HAV', 'MIA', 'IAD', 'TLV']
+LEG_COLUMNS = {'departure_station': STATIONS, 'arrival_station': STATIONS,
+               'flight_number': [504, 400, 401, 2800, 1370, 1226, 2100, 2118, 203],
+               'type': ['Flight', 'Travel', 'Other-carrier', 'Simulator'], 'activity': ['ALV', 'SBY', 'FLT'],
+               'duration': [1, 2, 3, 4, 5, 6], 'aircraft.type': ['77W', '333', '332', '320']}
+ENTITY_COLUMNS = {'duration': [6, 10, 12, 14]}
+PROFILE_FUNCTIONS = dict(base_station=lambda station: station in ('TLV', 'SVO', 'HAV'),
+                         abroad=lambda leg: leg.departure_station != 'TLV' and leg.arrival_station != 'TLV',
+                         operational=lambda leg: leg.type != 'Travel',
+                         visits=lambda leg, station: station in (leg.departure_station, leg.arrival_station),
+                         quicky=lambda entity: entity.duration < 8,
+                         USA='LAX')
+
+
+def load_profile_function(code, namespace):
+    """
+    Execute generated profile code (without its final sample call) and return the profile function
+    """
+    *definitions, call = code.strip().splitlines()
+    exec('\n'.join(definitions), namespace)
+    return namespace[call[:call.index('(')]]
+
+
+def as_object(record: dict, elements=None):
+    obj = SimpleNamespace()
+    for name, value in record.items():
+        *path, attr = name.split('.')
+        target = obj
+        for step in path:
+            if not hasattr(target, step):
+                setattr(target, step, SimpleNamespace())
+            target = getattr(target, step)
+        setattr(target, attr, value)
+    if elements is not None:
+        obj = type('Entity', (SimpleNamespace,), {'__iter__': lambda self: iter(elements)})(**vars(obj))
+    return obj
+
+
+def random_records(columns, count, rng):
+    return [{name: rng.choice(values) for name, values in columns.items()} for _ in range(count)]
+
+
+def profile_code(profile, line, optimize=False):
+    abst = ProfileExtractor().visit(parse_profile_string(profile)[0])
+    return PythonVisitorForProfiles(f'profile{line}', optimize=optimize).full_code(abst.to_code_rep(), abst.describe())
+
+
+def check_optimized_equivalence(code, optimized_code, count=200, seed=0):
+    """
+    Compare the checkers of a profile generated with and without optimization over random arguments, each of which is
+    an entity containing legs (possibly none); return None if the unoptimized checker could not be evaluated on any of
+    them
+    """
+    rng = random.Random(seed)
+    checker = load_profile_function(code, dict(PROFILE_FUNCTIONS))
+    optimized = load_profile_function(optimized_code, dict(PROFILE_FUNCTIONS))
+    call = code.strip().splitlines()[-1]
+    parameters = [name for name in call[call.index('(') + 1:-1].split(', ') if name]
+    checked = False
+    for _ in range(count):
+        arguments = {}
+        for name in parameters:
+            legs = random_records(LEG_COLUMNS, rng.randint(0, 4), rng)
+            record = {**random_records(LEG_COLUMNS, 1, rng)[0], **random_records(ENTITY_COLUMNS, 1, rng)[0]}
+            arguments[name] = as_object(record, [as_object(leg) for leg in legs])
+        try:
+            expected = bool(checker(**arguments))
+        except (AttributeError, NameError, TypeError, StopIteration):
+            # The profile uses attributes or functions that are not in the synthetic data
+            continue
+        # The optimized checker must not fail where the unoptimized one succeeds
+        if bool(optimized(**arguments)) != expected:
+            return False
+        checked = True
+    return True if checked else None
+
+
+def check_columnar_equivalence(scalar_code, columnar_code, count=200, seed=0):
+    """
+    Compare the scalar and columnar checkers of a profile over random legs, or over random entities containing legs;
+    return None if the profile is not over a single entity with the columns of the synthetic data
+    """
+    rng = random.Random(seed)
+    scalar = load_profile_function(scalar_code, dict(PROFILE_FUNCTIONS))
+    columnar = load_profile_function(columnar_code, dict(PROFILE_FUNCTIONS))
+    frames = [name for name in re.search(r'def \w+\((.*?)\)', columnar_code).group(1).split(', ') if name]
+    entities = [name for name in frames if not name.endswith('_elements')]
+    if len(entities) != 1 or set(frames) - {entities[0], f'{entities[0]}_elements'}:
+        return None
+    entity = entities[0]
+    if f'{entity}_elements' in frames:
+        entity_records = random_records(ENTITY_COLUMNS, count, rng)
+        legs = [random_records(LEG_COLUMNS, rng.randint(0, 4), rng) for _ in entity_records]
+        leg_records = [{**leg, 'owner': i} for i, entity_legs in enumerate(legs) for leg in entity_legs]
+        objects = [as_object(record, [as_object(leg) for leg in entity_legs])
+                   for record, entity_legs in zip(entity_records, legs)]
+        arguments = {entity: pd.DataFrame(entity_records, columns=list(ENTITY_COLUMNS)),
+                     f'{entity}_elements': pd.DataFrame(leg_records, columns=[*LEG_COLUMNS, 'owner'])}
+    else:
+        records = random_records(LEG_COLUMNS, count, rng)
+        objects = [as_object(record) for record in records]
+        arguments = {entity: pd.DataFrame(records)}
+    try:
+        actual = list(columnar(**arguments))
+    except KeyError:
+        # The profile uses attributes that are not in the synthetic data
+        return None
+    expected = [bool(scalar(**{entity: obj})) for obj in objects]
+    return [bool(value) for value in actual] == expected
+
+
+def test_columnar_profiles(silent=False):
+    """
+    Generate columnar checkers for the profiles of the test corpus, and compare them to the scalar checkers
+    """
+    base_dir = (Path(__file__).parent.parent.parent / r'test-output').absolute()
+    results = {}
+    with open(base_dir / r'pygen/input-profiles.txt', 'r', encoding='utf8') as test_file:
+        lines = [line.strip() for line in test_file]
+    for line, profile in enumerate(lines[::3], start=1):
+        abst = ProfileExtractor().visit(parse_profile_string(profile)[0])
+        paraphrase = abst.describe()
+        scalar_code = PythonVisitorForProfiles(f'profile{line}').full_code(abst.to_code_rep(), paraphrase)
+        try:
+            columnar_code = ColumnarVisitorForProfiles(f'profile{line}').full_code(abst.to_code_rep(), paraphrase)
+        except ColumnarModeUnsupported as e:
+            results[line] = f'unsupported: {e}'
+            continue
+        try:
+            equivalent = check_columnar_equivalence(scalar_code, columnar_code)
+        except ImportError:
+            # Runtime modules of the scalar checker are not available
+            equivalent = None
+        results[line] = {True: 'equivalent', False: 'DIFFERENT', None: 'not checked'}[equivalent]
+    if not silent:
+        for line, result in results.items():
+            print(f'profile{line}: {result}')
+    assert 'DIFFERENT' not in results.values()
+    assert 'equivalent' in results.values()
+    return results
+
+
+def test_optimized_profiles(silent=False):
+    """
+    Generate optimized checkers for the profiles of the test corpus, and compare them to the unoptimized checkers
+    """
+    base_dir = (Path(__file__).parent.parent.parent / r'test-output').absolute()
+    results = {}
+    with open(base_dir / r'pygen/input-profiles.txt', 'r', encoding='utf8') as test_file:
+        lines = [line.strip() for line in test_file]
+    for line, profile in enumerate(lines[::3], start=1):
+        code = profile_code(profile, line)
+        optimized_code = profile_code(profile, line, optimize=True)
+        try:
+            equivalent = check_optimized_equivalence(code, optimized_code)
+        except ImportError:
+            # Runtime modules of the checkers are not available
+            equivalent = None
+        results[line] = {True: 'equivalent', False: 'DIFFERENT', None: 'not checked'}[equivalent]
+    if not silent:
+        for line, result in results.items():
+            print(f'profile{line}: {result}')
+    assert 'DIFFERENT' not in results.values()
+    assert 'equivalent' in results.values()
+    return results
+
+
+def test_optimized_empty_universal():
+    """
+    A universal quantifier over an empty container is true even if the conjunct hoisted out of it is false, and the
+    hoisted conjunct is not evaluated at all in that case
+    """
+    profile = 'every Leg l1 of d1 is abroad and the duration of d1 is at most 12'
+    optimized_code = profile_code(profile, 'E', optimize=True)
+    assert 'for l1_values in [list(d1)] if l1_values' in optimized_code
+    checker = load_profile_function(profile_code(profile, 'E'), dict(PROFILE_FUNCTIONS))
+    optimized = load_profile_function(optimized_code, dict(PROFILE_FUNCTIONS))
+    for duration in (6, 14):
+        for legs in ([], [{'departure_station': 'CAI', 'arrival_station': 'LAX'}]):
+            d1 = as_object({'duration': duration}, [as_object(leg) for leg in legs])
+            assert bool(optimized(d1=d1)) == bool(checker(d1=d1))
+    d1 = as_object({'duration': None}, [])
+    assert optimized(d1=d1) and checker(d1=d1)
+
+
+DifferentLeg = namedtuple('DifferentLeg', ['type', 'flight_number'])
+
+
+def test_optimized_different_elements(count=200, seed=0):
+    """
+    The optimized checker for different elements satisfying a condition counts the distinct values of the container,
+    and agrees with the nested quantifiers even if the container has repeated values
+    """
+    profile = ('there are different Legs l1, l2 in d1 such that for each l0 in {l1, l2}, '
+               'l0 is operational and the flight-number of l0 is 504')
+    optimized_code = profile_code(profile, 'D', optimize=True)
+    assert 'len({l0 for l0 in d1 if' in optimized_code
+    checker = load_profile_function(profile_code(profile, 'D'), dict(PROFILE_FUNCTIONS))
+    optimized = load_profile_function(optimized_code, dict(PROFILE_FUNCTIONS))
+    rng = random.Random(seed)
+    for _ in range(count):
+        d1 = [DifferentLeg(rng.choice(['Flight', 'Travel']), rng.choice([504, 400])) for _ in range(rng.randint(0, 4))]
+        assert bool(optimized(d1=d1)) == bool(checker(d1=d1)), d1
+    assert not optimized(d1=[DifferentLeg('Flight', 504)] * 2)
+    assert optimized(d1=[DifferentLeg('Flight', 504), DifferentLeg('Simulator', 504)])
@@ -22,7 +22,7 @@ def abstest():
     #     print(str(imp))
 
 
-def e2etest(profile, line=None, code_dir=None, silent=False):
+def e2etest(profile, line=None, code_dir=None, silent=False, optimize=False):
     if line:
         line_str = f' {line}'
     else:
@@ -39,7 +39,7 @@ def e2etest(profile, line=None, code_dir=None, silent=False):
     if not silent:
         print(f'===Paraphrase{line_str}: {actual_paraphrase}')
     abst_code = abst.to_code_rep()
-    pv = PythonVisitorForProfiles(f'profile{line}')
+    pv = PythonVisitorForProfiles(f'profile{line}', optimize=optimize)
     code = pv.full_code(abst_code, actual_paraphrase)
     if code_dir:
         with open(os.path.join(code_dir, f'profile{line}.py'), 'w', encoding='utf8') as code_file:
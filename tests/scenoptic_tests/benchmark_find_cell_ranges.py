@@ -0,0 +1,43 @@
+import random
+import time
+from argparse import ArgumentParser
+
+from scenoptic.excel_alg_find_cell_ranges import FindCellRanges, FindCellRangesByTuples, FindCellRangesArray
+
+
+def random_matrix(n_rows: int, n_cols: int, density: float, seed: int = 0):
+    rng = random.Random(seed)
+    return [[1 if rng.random() < density else 0 for _ in range(n_cols)] for _ in range(n_rows)]
+
+
+def as_tuples(matrix):
+    return {(i, j) for i, row in enumerate(matrix) for j, value in enumerate(row) if value == 1}
+
+
+def timed(name, make_finder):
+    finder = make_finder()
+    start = time.perf_counter()
+    result = finder.analyze()
+    print(f'  {name:<28} {time.perf_counter() - start:8.3f} s  ({len(result)} ranges)')
+    return result
+
+
+def run_benchmark(n_rows: int, n_cols: int, density: float):
+    print(f'{n_rows}x{n_cols}, density {density}:')
+    matrix = random_matrix(n_rows, n_cols, density)
+    data = as_tuples(matrix)
+    by_matrix = timed('FindCellRanges', lambda: FindCellRanges('bench', [row[:] for row in matrix]))
+    by_array = timed('FindCellRangesArray', lambda: FindCellRangesArray('bench', matrix))
+    by_tuples = timed('FindCellRangesByTuples', lambda: FindCellRangesByTuples('bench', set(data)))
+    by_array_tuples = timed('FindCellRangesArray (tuples)', lambda: FindCellRangesArray.from_tuples('bench', data))
+    assert by_matrix == by_array
+    assert by_tuples == by_array_tuples
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Compare implementations of FindCellRanges')
+    parser.add_argument('-r', '--rows', type=int, default=300, help='number of rows')
+    parser.add_argument('-c', '--columns', type=int, default=100, help='number of columns')
+    args = parser.parse_args()
+    for density in (0.05, 0.5, 0.95):
+        run_benchmark(args.rows, args.columns, density)
@@ -0,0 +1,30 @@
+from scenoptic.xl_utils import CellIds, as_cell_qn, xl_cell_or_range_elements_qn, CELL_NAME_CACHE_SIZE, \
+    cell_name_to_components, cell_to_coords, index_to_column
+
+
+def test_cell_ids():
+    ids = CellIds()
+    a1 = ids.cell_id(1, 1, 'Sheet1')
+    c7 = ids.cell_id(7, 3, 'Sheet1')
+    other = ids.cell_id(7, 3, 'Sheet2')
+    assert len({a1, c7, other}) == 3
+    assert ids.components(c7) == (7, 3, 'Sheet1')
+    assert ids.a1(other) == 'Sheet2!C7'
+    assert ids.qn(c7) == as_cell_qn(7, 3, 'Sheet1')
+    assert ids.qn(c7) is ids.qn(c7)
+    assert ids.id_of(as_cell_qn(7, 3, 'Sheet1')) == c7
+
+
+def test_range_ids():
+    ids = CellIds()
+    range_ids = ids.range_ids(2, 1, 4, 2, 'Sheet1')
+    assert [ids.qn(cell_id) for cell_id in range_ids.tolist()] == list(xl_cell_or_range_elements_qn('Sheet1!A2:B4'))
+
+
+def test_conversion_caches_are_bounded():
+    for conversion in (cell_name_to_components, cell_to_coords, index_to_column):
+        assert conversion.cache_info().maxsize == CELL_NAME_CACHE_SIZE
+    cell_to_coords.cache_clear()
+    for row in range(CELL_NAME_CACHE_SIZE + 10):
+        cell_to_coords(f'A{row + 1}')
+    assert cell_to_coords.cache_info().currsize == CELL_NAME_CACHE_SIZE
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import NewType
+
+from optimistic_client.load.knoweldge_class_generator import DataGenerator
+
+Name = NewType('Name', str)
+Flag = NewType('Flag', bool)
+
+
+@dataclass(frozen=True)
+class Item:
+    name: Name
+    number: int
+    flag: bool
+
+
+def test_load_csv(tmp_path):
+    file = tmp_path / 'items.csv'
+    file.write_text('name, number ,flag,Name\n"a",1,true,a\n\nb,2,0,b\na,1,False,a\n')
+    generator = DataGenerator()
+    verify = generator._verifier(Item, 'items')
+    items = generator.create_objects(Item, file, verify=verify)
+    assert items == (Item('a', 1, True), Item('b', 2, False), Item('a', 1, False))
+    assert [len(chunk) for chunk in generator.iter_objects(Item, file, chunk_size=2)] == [2, 1]
+    assert generator._create_domain_key_mapping((Name,), file) == ('a', 'b', 'a')
+    assert generator._create_total_domain_key_mapping_to_range_value((Name,), (Flag,), file,
+                                                                     value_mapping={'Flag': 'flag'}) == \
+           {'a': False, 'b': False}
+    assert generator.report() == ''
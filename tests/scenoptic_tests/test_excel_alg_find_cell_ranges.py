@@ -1,6 +1,7 @@
 from typing import Tuple
 
-from scenoptic.excel_alg_find_cell_ranges import FindCellRanges, FindCellRangesByTuples, AnalyzeCellRanges
+from scenoptic.excel_alg_find_cell_ranges import FindCellRanges, FindCellRangesByTuples, AnalyzeCellRanges, \
+    FindCellRangesArray
 
 mat0 = [
     # 0  1  2  3  4  5  6  7  8  9  10 11 12 13 14 15 16 17 18 19
@@ -76,6 +77,13 @@ def analyze_tuples(sheet, matrix):
     find.analyze(verbose=True)
 
 
+def same_ranges_as_array(sheet, matrix):
+    expected = FindCellRanges(sheet=sheet, matrix=[row[:] for row in matrix]).analyze()
+    data = {(i, j) for i in range(len(matrix)) for j in range(len(matrix[0])) if matrix[i][j] == 1}
+    return (FindCellRangesArray(sheet=sheet, matrix=matrix).analyze() == expected
+            and FindCellRangesArray.from_tuples(sheet=sheet, data=data).analyze() == expected)
+
+
 def analyze(*predicates):
     mat = {'mat0': mat0, 'mat1': mat1}
     data = set()
@@ -128,5 +136,14 @@ def test_find_cell_ranges_by_matrix():
     """
 
 
+def test_find_cell_ranges_by_array():
+    """
+    >>> same_ranges_as_array(sheet="mat0", matrix=mat0)
+    True
+    >>> same_ranges_as_array(sheet="mat1", matrix=mat1)
+    True
+    """
+
+
 if __name__ == '__main__':
     run_all_find_cell_ranges()
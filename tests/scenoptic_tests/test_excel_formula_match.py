@@ -14,8 +14,8 @@ from scenoptic.xl_utils import as_cell_qn
 
 class ScenarioTest(Scenario):
 
-    def __init__(self, excel_file, sheet: str = None):
-        super().__init__(excel_file, sheet)
+    def __init__(self, excel_file, sheet: str = None, read_only=False, trace_memory=False):
+        super().__init__(excel_file, sheet, read_only=read_only, trace_memory=trace_memory)
 
     def validate_initialization(self):
         pass
@@ -1,6 +1,7 @@
 from argparse import ArgumentParser
 from pathlib import Path
 
+from scenoptic.excel_analyze import r1c1_cell, same_formula_shape
 from scenoptic.excel_analyze_workbook import AnalyzeWorkbook
 from scenoptic.excel_to_math import Scenario
 from tests.scenoptic_tests.test_excel_formula_match import ScenarioTest
@@ -49,6 +50,76 @@ def test_run_workbook_match():
     """
 
 
+def test_workbook_match_parses_each_formula_once():
+    """
+    >>> scenario = ScenarioTest(default_excel_file, default_sheet)
+    >>> _ = run_workbook_match(scenario)
+    WARNING: Unknown argument header: Name
+    WARNING: Unknown argument header: Package
+    >>> cache = scenario.parse_tree_cache
+    >>> misses = cache.misses
+    >>> misses == len(cache.trees)
+    True
+    >>> AnalyzeWorkbook(scenario).analyze()
+    >>> cache.misses == misses
+    True
+    """
+
+
+def test_parallel_workbook_match():
+    """
+    >>> serial = run_workbook_match(default_scenario)
+    WARNING: Unknown argument header: Name
+    WARNING: Unknown argument header: Package
+    >>> parallel = AnalyzeWorkbook(default_scenario)
+    >>> parallel.analyze(workers=2)
+    >>> parallel.describe() == serial.describe()
+    True
+    """
+
+
+def test_read_only_workbook_match():
+    """
+    >>> serial = run_workbook_match(default_scenario)
+    WARNING: Unknown argument header: Name
+    WARNING: Unknown argument header: Package
+    >>> read_only = run_workbook_match(ScenarioTest(default_excel_file, default_sheet, read_only=True))
+    WARNING: Unknown argument header: Name
+    WARNING: Unknown argument header: Package
+    >>> read_only.describe() == serial.describe()
+    True
+    """
+
+
+def test_read_only_load_report():
+    """
+    >>> default_scenario.load_report() is None
+    True
+    >>> scenario = ScenarioTest(default_excel_file, default_sheet, read_only=True, trace_memory=True)
+    >>> scenario.wb.peak_memory > 0
+    True
+    >>> scenario.load_report().startswith(f'Loaded {len(scenario.wb.sheetnames)} sheets')
+    True
+    >>> 'peak memory' in scenario.load_report()
+    True
+    """
+
+
+def test_formula_shapes():
+    """
+    >>> r1c1_cell('B3', 2, 4)
+    'R[1]C[-2]'
+    >>> r1c1_cell('$B3', 2, 4)
+    'R[1]C2'
+    >>> r1c1_cell('$B$3', 2, 4)
+    'R3C2'
+    >>> same_formula_shape('Problem!K2', 'Problem!K3', default_scenario)
+    True
+    >>> same_formula_shape('Problem!J4', 'Problem!K2', default_scenario)
+    False
+    """
+
+
 def parse_scenario_test_args(args=None):
     parser = ArgumentParser(description='Generate Java classes from spreadsheet')
     parser.add_argument('-i', '--input-file', type=Path, help='name of spreadsheet file containing problem description')
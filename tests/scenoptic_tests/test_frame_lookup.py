@@ -0,0 +1,33 @@
+from collections import Counter
+
+from validator2solver.python.symbol_table import Frame, FrameKind, Variable
+
+
+def make_frames():
+    module = Frame(name='module', kind=FrameKind.MODULE, variables={Variable('f'), Variable('x')})
+    function = Frame(name='f', kind=FrameKind.FUNCTION, variables={Variable('y')})
+    module.add_child(function)
+    comprehension = Frame(name='', kind=FrameKind.COMPREHENSION_SET, variables={Variable('z')})
+    function.add_child(comprehension)
+    return module, function, comprehension
+
+
+def test_indexed_variables_and_children():
+    module, function, comprehension = make_frames()
+    module.add_variables([Variable('x', 'int'), Variable('w')])
+    assert module.find_variable('x') == Variable('x')
+    assert len(module.variables) == 3
+    assert Variable('w') in module.variables and Variable('x', 'int') not in module.variables
+    assert module.contains_child(Frame(name='f', kind=FrameKind.FUNCTION)) is function
+    assert function.parent is module and comprehension.parent is function
+
+
+def test_lookup_cache():
+    module, function, comprehension = make_frames()
+    stats = Counter()
+    assert comprehension.lookup('x', stats) is module
+    assert comprehension.lookup('x', stats) is module
+    assert comprehension.lookup('q', stats) is None
+    assert stats == Counter(lookups=3, cache_hits=1, frames_searched=6)
+    function.add_variables([Variable('x')])
+    assert comprehension.lookup('x', stats) is function
@@ -0,0 +1,134 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Collection
+
+from optimistic_client.meta.utils import grouped_count, grouped_sum, count, AttributeKey, GROUPED_COUNTS_ATTR, \
+    GROUPED_COUNTS_MAXSIZE
+from optimistic_client.optimization import OptimizationProblem
+from validator2solver.opt_to_opl import OptimizationModelOplImplementer
+from validator2solver.optimistic_factory import get_target_module_json
+from validator2solver.optimization_analyzer import OptimizationProblemAnalyzer
+from validator2solver.python.symbol_default_imports import add_import_frame
+
+
+@dataclass(frozen=True)
+class Employee:
+    number: int
+    type: str
+    team: int
+
+
+calls = []
+
+
+class Problem(OptimizationProblem):
+    employees: Collection[Employee]
+
+    def floor_of(self, e: Employee):
+        calls.append(e.number)
+        return e.team % 2
+
+
+employees = [Employee(i, 'ab'[i % 2], i % 3) for i in range(12)]
+
+
+def test_grouped_count_by_attributes():
+    problem = Problem(employees)
+    assert grouped_count(problem, employees, 'type', 'a') == 6
+    assert grouped_count(problem, employees, ('type', 'team'), ('b', 1)) == count(e for e in employees
+                                                                                   if e.type == 'b' and e.team == 1)
+    assert grouped_count(problem, employees, 'team', 5) == 0
+    # the counts are kept by the problem, and are not memoized for objects without an instance dictionary
+    assert len(vars(problem)[GROUPED_COUNTS_ATTR]) == 3
+    assert grouped_count(None, employees, 'type', 'b') == 6
+
+
+def test_grouped_count_by_method():
+    calls.clear()
+    problem = Problem(employees)
+    for t in 'ab':
+        for f in range(2):
+            assert (grouped_count(problem, problem.employees, ('type', problem.floor_of), (t, f))
+                    == count(e for e in employees if e.type == t and e.team % 2 == f))
+    # one pass over the employees for all four calls
+    assert len(calls) == len(employees)
+    # a method bound to another problem is a different key
+    other = Problem([*employees])
+    grouped_count(other, other.employees, other.floor_of, 0)
+    grouped_count(other, other.employees, other.floor_of, 1)
+    assert len(calls) == 2 * len(employees)
+
+
+def test_grouped_sum():
+    problem = Problem(employees)
+    for t in 'ab':
+        assert grouped_sum(problem, employees, 'number', 'type', t) == sum(e.number for e in employees if e.type == t)
+        assert (grouped_sum(problem, employees, AttributeKey(abs, 'team'), ('type', AttributeKey(str, 'team')),
+                            (t, '1')) == sum(e.team for e in employees if e.type == t and e.team == 1))
+    assert grouped_sum(problem, employees, 'number', 'type', 'c') == 0
+    # sums and counts by the same keys are kept separately
+    assert grouped_count(problem, employees, 'type', 'a') == 6
+    assert len(vars(problem)[GROUPED_COUNTS_ATTR]) == 3
+
+
+def test_grouped_count_store_is_bounded():
+    problem = Problem(employees)
+    assert grouped_count(problem, (e for e in employees), 'type', 'a') == 6
+    assert GROUPED_COUNTS_ATTR not in vars(problem), 'Counts over an iterator were memoized'
+    for _ in range(2 * GROUPED_COUNTS_MAXSIZE):
+        assert grouped_count(problem, list(employees), 'type', 'a') == 6
+        assert grouped_count(problem, employees, 'type', 'b') == 6
+    store = vars(problem)[GROUPED_COUNTS_ATTR]
+    assert len(store) == GROUPED_COUNTS_MAXSIZE
+    # the collection used in every call is never removed
+    assert any(elements is employees for elements, _ in store.values())
+
+
+room_allocation_6 = (Path(__file__).parent.parent.parent / 'optimistic_examples' / 'room_allocation' /
+                     'room_allocation_bom_6_all_in_one.py')
+
+TEAM_LEADS = """
+
+    def team_leads(self, area: Area):
+        return {}
+
+    @constraint
+    def constraint4(self):
+        return all(self.team_leads(a1) >= 1 for a1 in self.all_areas())
+"""
+
+
+def opl_with_team_leads(directory: Path, team_leads: str) -> str:
+    """
+    Return the OPL translation of RoomAllocationProblem6 with an additional constraint on the number of team leads in
+    each area, computed by the given expression
+    """
+    directory.mkdir()
+    code = room_allocation_6.read_text()
+    problem_file = directory / room_allocation_6.name
+    problem_file.write_text(code.rstrip() + TEAM_LEADS.format(team_leads))
+    config = {
+        'symbol_table_config': {
+            'enable_code_testing': False,
+            'disable_imports_mockup': True,
+            'enable_attribute_analysis': False,
+            'debug': False,
+        },
+        'target_module': get_target_module_json(directory, problem_file, module_name=problem_file.stem)[
+            'target_module']
+    }
+    analyzer = OptimizationProblemAnalyzer()
+    analyzer.from_python_file(config=config, builtin_frame=add_import_frame(do_examples=True), with_imports=False)
+    return OptimizationModelOplImplementer(analyzer, use_type_heuristic=True).full_implementation_to_opl()
+
+
+def test_grouped_count_to_opl(tmp_path):
+    expected = opl_with_team_leads(tmp_path / 'count',
+                                   'count(e1 for e1 in self.employees if e1.is_team_lead == True and e1.area == area)')
+    actual = opl_with_team_leads(tmp_path / 'grouped',
+                                 "grouped_count(self, self.employees, ('is_team_lead', 'area'), (True, area))")
+    assert 'team_leads' in expected
+    assert 'grouped_count' not in actual
+    # the element variables of translated grouped counts are named element
+    assert re.sub(r'\belement\b', 'e1', actual) == re.sub(r'\belement\b', 'e1', expected)
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+
+from optimistic_client.meta.utils import memoize_method
+
+calls = []
+
+
+@dataclass(frozen=True)
+class Problem:
+    x: int
+
+    @memoize_method
+    def nothing(self):
+        calls.append('nothing')
+        return None
+
+    @memoize_method(maxsize=2)
+    def plus(self, y):
+        calls.append(y)
+        return self.x + y
+
+
+def test_memoize_none_results():
+    calls.clear()
+    p = Problem(1)
+    assert p.nothing() is None
+    assert p.nothing() is None
+    assert calls == ['nothing']
+    Problem.nothing.cache_clear(p)
+    p.nothing()
+    assert calls == ['nothing', 'nothing']
+
+
+def test_memoize_per_instance_lru():
+    calls.clear()
+    p1 = Problem(1)
+    p2 = Problem(2)
+    assert [p1.plus(1), p1.plus(2), p1.plus(1), p1.plus(3), p1.plus(2)] == [2, 3, 2, 4, 3]
+    assert calls == [1, 2, 3, 2]
+    assert p2.plus(1) == 3
+    info = Problem.plus.cache_info()
+    assert info.maxsize == 2
+    assert info.hits >= 1 and info.misses >= 5
@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import Tuple, Collection
+
+import numpy as np
+import pytest
+
+from optimistic_client.meta.utils import constraint, minimize, maximize, metadata
+from optimistic_client.optimization import OptimizationProblem, evaluate_many
+
+
+class Knapsack(OptimizationProblem):
+    weights: Tuple[int, ...]
+    solution: Tuple[int, ...]
+
+    @constraint
+    def within_capacity(self):
+        return self.total_weight() <= 10
+
+    @constraint
+    def not_empty(self):
+        return sum(self.solution) > 0
+
+    def total_weight(self):
+        return sum(w * s for w, s in zip(self.weights, self.solution))
+
+    @maximize
+    def weight(self):
+        return self.total_weight()
+
+    @minimize(weight=2)
+    def items(self):
+        return sum(self.solution)
+
+
+problems = [Knapsack((3, 4, 5), solution) for solution in ((1, 1, 0), (1, 1, 1), (0, 0, 0))]
+
+
+def test_cached_methods():
+    assert Knapsack._constraint_methods == ('not_empty', 'within_capacity')
+    assert Knapsack._objective_methods == (('items', 2), ('weight', -1))
+    assert problems[1].check_constraints() == ['within_capacity']
+    assert problems[0].compute_objective() == -3
+
+
+def test_evaluate_many():
+    for workers in (None, 2):
+        evaluations = evaluate_many(problems, workers=workers)
+        assert evaluations.violations == [[], ['within_capacity'], ['not_empty']]
+        assert isinstance(evaluations.objectives, np.ndarray) and evaluations.objectives.dtype == float
+        assert evaluations.objectives.tolist() == [-3, -6, 0]
+        assert evaluations.feasible.tolist() == [True, False, False]
+
+
+@dataclass(frozen=True)
+class Employee:
+    name: str
+    number: int = metadata(primary_key=True)
+
+
+@dataclass(frozen=True)
+class Office:
+    floor: int = metadata(primary_key=True)
+    room: int = metadata(primary_key=True)
+    size: int
+
+
+class Allocation(OptimizationProblem):
+    employees: Collection[Employee]
+    offices: Collection[Office]
+    names: Collection[str]
+
+
+def test_lookup():
+    problem = Allocation([Employee('a', 1), Employee('b', 2)], [Office(1, 10, 3), Office(2, 10, 4)], ['a'])
+    assert Allocation._primary_keys == {'employees': ('number',), 'offices': ('floor', 'room')}
+    assert problem.lookup('employees', 2) == Employee('b', 2)
+    assert problem.lookup('offices', 2, 10).size == 4
+    with pytest.raises(KeyError):
+        problem.lookup('employees', 3)
+    with pytest.raises(KeyError):
+        problem.lookup('names', 'a')
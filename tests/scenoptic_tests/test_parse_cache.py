@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from validator2solver.optimistic_factory import generate_ast_from_string, get_code, parse_module
+from validator2solver.python.parse_cache import ParseCache
+from validator2solver.python.parse_python_ast import python_ast_imports
+
+sample = Path(__file__).parent.parent.parent / 'optimistic_examples' / 'room_allocation' / 'resource_allocation_bom.py'
+
+
+def test_imports_from_tree():
+    code = get_code(sample)
+    _, imports = parse_module(code, python_parser='ast')
+    assert imports.describe() == python_ast_imports(code).describe()
+
+
+def test_parse_cache(tmp_path):
+    code = get_code(sample)
+    expected = generate_ast_from_string(code, python_parser='ast').describe()
+
+    cache = ParseCache(tmp_path)
+    tree, imports = parse_module(code, python_parser='ast', parse_cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert tree.describe() == expected
+
+    # A new process finds the tree on disk
+    other_cache = ParseCache(tmp_path)
+    cached_tree, cached_imports = parse_module(code, python_parser='ast', parse_cache=other_cache)
+    assert (other_cache.hits, other_cache.misses) == (1, 0)
+    assert cached_tree is not tree
+    assert cached_tree.describe() == expected
+    assert cached_imports.describe() == imports.describe()
+
+    # Different code or a different front end are not found
+    assert other_cache.get(code + '\nx = 1\n', 'ast') is None
+    assert other_cache.get(code, 'antlr') is None
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from validator2solver.optimistic_factory import generate_ast_from_string, get_code, create_ast_from_string
+from validator2solver.python.parse_python_ast import python_ast_imports
+from validator2solver.python.symbol_table_package_visitor import PythonImportExtractor
+
+samples_dir = Path(__file__).parent.parent.parent / 'optimistic_examples' / 'room_allocation'
+samples = ['facilities_bom.py', 'resource_allocation_bom.py', 'resource_allocation_bom_2.py', 'room_allocation_bom.py',
+           'room_allocation_bom_2.py', 'room_allocation_bom_3.py', 'room_allocation_bom_4.py',
+           'room_allocation_bom_5_all_in_one.py', 'room_allocation_bom_6_all_in_one.py', 'room_allocation_bom_7.py',
+           'room_allocation_bom_8.py', 'room_allocation_bom_8_a.py', 'room_allocation_bom_9.py',
+           'room_allocation_bom_sc.py']
+
+
+def elements_with_lines(element, result=None):
+    if result is None:
+        result = []
+    if isinstance(element, (list, tuple)):
+        for e in element:
+            elements_with_lines(e, result)
+    elif hasattr(element, 'describe'):
+        result.append(element)
+        for name, value in vars(element).items():
+            if not name.startswith('_') and name != 'frame':
+                elements_with_lines(value, result)
+    return result
+
+
+def test_same_trees_as_antlr():
+    for sample in samples:
+        code = get_code(samples_dir / sample)
+        antlr_tree = generate_ast_from_string(code, python_parser='antlr')
+        ast_tree = generate_ast_from_string(code, python_parser='ast')
+        assert ast_tree.describe() == antlr_tree.describe(), f'Different trees for {sample}'
+        for antlr_element, ast_element in zip(elements_with_lines(antlr_tree), elements_with_lines(ast_tree)):
+            assert antlr_element.starts_on_line in (None, ast_element.starts_on_line), \
+                f'Different lines for {antlr_element} in {sample}'
+
+
+def test_same_imports_as_antlr():
+    for sample in samples:
+        code = get_code(samples_dir / sample)
+        tree, _ = create_ast_from_string(code)
+        assert python_ast_imports(code).describe() == PythonImportExtractor().visit(tree).describe()
+
+
+def test_constructs():
+    code = '''
+def f(a, b: int = 1, *args, c, d=2, **kw) -> int:
+    x = [1, (2, 3)]; y, z = g(*args, k=4)
+    return a | b | (c | d), lambda v: v + 1
+'''
+    assert generate_ast_from_string(code, python_parser='ast').describe() == \
+           generate_ast_from_string(code, python_parser='antlr').describe()
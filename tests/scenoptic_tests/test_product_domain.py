@@ -0,0 +1,19 @@
+import itertools
+
+from optimistic_client.load.analyze_total_mapping import ProductDomain
+
+
+def test_missing_keys():
+    domain = ProductDomain([[3, 1, 2], ['b', 'a'], [0, 1]])
+    assert len(domain) == 12
+    assert list(domain) == sorted(itertools.product([1, 2, 3], 'ab', [0, 1]))
+    assert (1, 'a', 0) in domain and (1, 'c', 0) not in domain and (1, 'a') not in domain
+    keys = {key for key in domain if key[0] != 2 and key != (3, 'a', 1)}
+    assert list(domain.missing(keys)) == sorted(set(domain) - keys)
+    assert list(domain.missing(set(domain))) == []
+
+
+def test_missing_keys_are_lazy():
+    domain = ProductDomain([range(1000), range(1000), range(1000)])
+    keys = {(0, j, k) for j in range(1000) for k in range(10)}
+    assert list(itertools.islice(domain.missing(keys), 2)) == [(0, 0, 10), (0, 0, 11)]
@@ -0,0 +1,53 @@
+from scenoptic.excel_to_optaplanner import PredecessorsDescriptor, RelativePredecessors
+from scenoptic.xl_utils import as_cell_qn
+
+descriptor = PredecessorsDescriptor(fixed_cells=(('Sheet1', 2, 1), ('Params', 1, 4)),
+                                    cells_category=(('Sheet1', 0, -1), ('Sheet1', -1, 0), ('Other', 3, 2)),
+                                    range_category=(('Sheet1', -2, 0, -3, -2), ('Other', 1, 1, 0, 3)))
+
+
+def expand_cell_info(row, col):
+    """
+    The predecessors of the cell at the given coordinates, in the order they were expanded before descriptors were
+    introduced
+    """
+    fixed_cells_qn = [as_cell_qn(pred_row, pred_col, sheet) for sheet, pred_row, pred_col in descriptor.fixed_cells]
+    cells_by_distance_qn = [as_cell_qn(row + row_dist, col + col_dist, sheet)
+                            for sheet, row_dist, col_dist in descriptor.cells_category]
+    range_by_distance_qn = [as_cell_qn(pred_row, pred_col, sheet)
+                            for sheet, first_row_dist, end_row_dist, first_col_dist, end_col_dist
+                            in descriptor.range_category
+                            for pred_row in range(row + first_row_dist, row + end_row_dist + 1)
+                            for pred_col in range(col + first_col_dist, col + end_col_dist + 1)]
+    return [*fixed_cells_qn, *cells_by_distance_qn, *range_by_distance_qn]
+
+
+def test_relative_predecessors():
+    for row, col in ((5, 6), (12, 4)):
+        expected = expand_cell_info(row, col)
+        predecessors = RelativePredecessors(descriptor, row, col, as_cell_qn)
+        assert len(predecessors) == len(descriptor) == len(expected) == 2 + 3 + 6 + 4
+        assert list(predecessors) == expected
+        assert [predecessors[i] for i in range(len(expected))] == expected
+        assert [predecessors[i] for i in range(-len(expected), 0)] == expected
+        assert predecessors[1:-1] == expected[1:-1]
+        assert predecessors == expected
+        for index in (len(expected), -len(expected) - 1):
+            try:
+                predecessors[index]
+            except IndexError:
+                pass
+            else:
+                assert False, f'No IndexError for index {index}'
+
+
+def test_relative_predecessors_index_of():
+    for row, col in ((5, 6), (12, 4)):
+        expected = expand_cell_info(row, col)
+        predecessors = RelativePredecessors(descriptor, row, col, as_cell_qn)
+        for cell in expected:
+            assert predecessors.index_of(cell) == max(i for i, c in enumerate(expected) if c == cell)
+            assert predecessors[predecessors.index_of(cell)] == cell
+        for cell in (as_cell_qn(row, col, 'Sheet1'), as_cell_qn(row + 3, col + 2, 'Sheet1'),
+                     as_cell_qn(2, 1, 'Other')):
+            assert predecessors.index_of(cell) is None, cell
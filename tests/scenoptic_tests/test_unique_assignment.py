@@ -28,3 +28,5 @@ assert s.has_unique_assignment(wrt=('w1', 'w2'))
 assert s.unique_assignment(r1, 1, 2, wrt=('w1', 'w2')) is a1
 assert s.unique_assignment(r1, 1, 3, wrt=('w1', 'w2')) is a2
 assert s.unique_assignment(r2, 10, wrt=('w1',)) is a2
+assert not s.has_unique_assignment()
+assert s.non_unique_assignment(wrt=('w1', 'w2')) == set()
@@ -0,0 +1,71 @@
+from io import StringIO
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import pandas as pd
+
+from optimistic_process.artifacts import OptimizationModelOPLArtifactsFileSystem
+from optimistic_process.knowledge_driven_optimization_model import KnowledgeDrivenOptimizationModel
+from optimistic_process.knowledge_driven_optimization_solver import KnowledgeOptimizationModelSolver
+from optimistic_process.models import OptimizationInput
+
+DATA_TYPES = {'employees': {'name': 'str', 'number': 'int', 'team': 'string', 'salary': 'float'},
+              'offices': {'floor': 'int', 'rooms': 'int', 'area': 'float'}}
+
+
+def iterrows_input(input: OptimizationInput, data_types) -> str:
+    """
+    The OPL tuple set for the given input, as formatted row by row before inputs were written in chunks
+    """
+    results = f'{input.name} = {{ \n'
+    for index, row in input.table.iterrows():
+        s = []
+        for col, val in row.items():
+            if data_types[col] in ('str', 'string'):
+                v = str(val).strip()
+                s.append(v if v.startswith('"') and v.endswith('"') else f'"{v}"')
+            else:
+                s.append(f'{val}')
+        results += f'\t<{" ".join(s)}>\n'
+    results += f'}};\n'
+    return results
+
+
+def sample_inputs(rows=10):
+    employees = pd.DataFrame({'name': [f' Employee {i} ' if i % 3 else f'"Employee {i}"' for i in range(rows)],
+                              'number': range(rows),
+                              'team': [f'team{i % 4}' for i in range(rows)],
+                              'salary': [1000.5 * i for i in range(rows)]})
+    # All columns are numeric, so that iterrows() gives float values for the int columns
+    offices = pd.DataFrame({'floor': [i % 3 for i in range(rows)],
+                            'rooms': range(rows),
+                            'area': [12.25 * i for i in range(rows)]})
+    return [OptimizationInput('employees', employees), OptimizationInput('offices', offices)]
+
+
+def model_for_inputs():
+    model = KnowledgeDrivenOptimizationModel('test', {})
+    model._opl_model = SimpleNamespace(get_input_fields_types=DATA_TYPES.get)
+    return model
+
+
+def test_write_input_matches_iterrows():
+    model = model_for_inputs()
+    for input in sample_inputs():
+        for chunk_size in (3, 10, 100):
+            with StringIO() as buffer:
+                model.write_input(input, buffer, chunk_size=chunk_size)
+                assert buffer.getvalue() == iterrows_input(input, DATA_TYPES[input.name]), (input.name, chunk_size)
+
+
+def test_solver_writes_dat_file():
+    model = model_for_inputs()
+    inputs = sample_inputs()
+    with TemporaryDirectory() as working_dir:
+        solver = KnowledgeOptimizationModelSolver(
+            model, OptimizationModelOPLArtifactsFileSystem({'name': 'test', 'working_dir': working_dir}))
+        solver.set_input(*inputs)
+        with solver.artifacts.open_opl_dat() as file:
+            solver.write_input(file)
+        expected = ''.join(f'{iterrows_input(input, DATA_TYPES[input.name])}\n' for input in inputs)
+        assert solver.artifacts.id_opl_dat().read_text(encoding='utf-8') == expected
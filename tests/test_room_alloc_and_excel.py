@@ -1,11 +1,50 @@
 import filecmp
+import re
 from pathlib import Path
 from unittest import TestCase
 
+from openpyxl import load_workbook
+
 from scenoptic import excel_to_opl
 from tests.profiles.tpygen import test_all_profiles
 from tests.test_room_alloc_to_opl import run_opl_tests, room_allocation_tests
 
+FORALL_RE = re.compile(r'forall \((\w+) in (\d+)\.\.(\d+)\) (.*)')
+SUBSCRIPT_RE = re.compile(r'(\w+)\[(\d+)(?: ([+-]) (\d+))?\]')
+
+
+def opl_constraints(mod_file):
+    """
+    Return the constraints in the given OPL model, one per line
+    """
+    lines = Path(mod_file).read_text().splitlines()
+    start = lines.index('subject to {') + 1
+    return [line.strip().rstrip(';') for line in lines[start:lines.index('}', start)]]
+
+
+def expand_vectorized_constraints(scenario, mod_file):
+    """
+    Return the constraints of a vectorized OPL model with each forall expanded into one constraint per row, and each
+    array element replaced by the name of its cell
+    """
+    arrays = {array.name.to_c_identifier(): array for array in scenario.opl_arrays}
+
+    def element(match):
+        name, row, sign, offset = match.groups()
+        row = int(row) + (0 if sign is None else int(offset) if sign == '+' else -int(offset))
+        array = arrays[name]
+        return array.cells[row - array.start_row].to_c_identifier()
+
+    result = []
+    for constraint in opl_constraints(mod_file):
+        if match := FORALL_RE.fullmatch(constraint):
+            row_var, start, end, body = match.groups()
+            rows = [re.sub(rf'\b{row_var}\b', str(row), body) for row in range(int(start), int(end) + 1)]
+        else:
+            rows = [constraint]
+        result.extend(SUBSCRIPT_RE.sub(element, row) for row in rows)
+    return result
+
 
 class TestRoomAllocationAndExcel(TestCase):
     def test_room_alloc8(self, base_folder: Path = None):
@@ -27,6 +66,101 @@ class TestRoomAllocationAndExcel(TestCase):
         assert filecmp.cmp(excel_to_opl.default_mod_file, excel_to_opl.default_ref_file, shallow=False), \
             'Generated OPL file different for RoomAllocation8'
 
+    def test_excel_to_opl_cached_translations(self):
+        mod_file = Path(excel_to_opl.default_mod_file).with_name('gen-opl-cached.mod')
+        excel_to_opl.run_excel_test(excel_to_opl.default_excel_file, mod_file, cache_translations=True)
+        assert filecmp.cmp(mod_file, excel_to_opl.default_ref_file, shallow=False), \
+            'Generated OPL file with cached translations different from reference'
+
+    def test_excel_to_opl_cached_translations_domains(self):
+        def dvars(cache_translations):
+            s = excel_to_opl.ScenarioForOPL(excel_to_opl.default_excel_file, sheet=excel_to_opl.default_sheet,
+                                            cache_translations=cache_translations)
+            s.build()
+            return {var for var, info in s.domain_table.var_table.items() if info.is_dvar()}, s.translation_cache
+
+        expected, _ = dvars(False)
+        actual, cache = dvars(True)
+        assert cache.hits > 0, 'No formula translated by the cache'
+        assert actual == expected, 'Decision variables different with cached translations'
+
+    def test_excel_to_opl_vectorized(self):
+        mod_file = Path(excel_to_opl.default_mod_file).with_name('gen-opl-vectorized.mod')
+        # Keep all aggregates expanded, as in the scalar build
+        s = excel_to_opl.ScenarioForOPL(excel_to_opl.default_excel_file, sheet=excel_to_opl.default_sheet,
+                                        vectorize=True, min_symbolic_range=1000)
+        s.build()
+        s.to_opl(mod_file)
+        assert any(constraint.startswith('forall') for constraint in opl_constraints(mod_file)), \
+            'No dragged blocks in vectorized OPL file'
+        assert sorted(expand_vectorized_constraints(s, mod_file)) == \
+               sorted(opl_constraints(excel_to_opl.default_ref_file)), \
+            'Vectorized OPL constraints different from reference'
+
+    def test_excel_to_opl_symbolic_aggregate(self):
+        mod_file = Path(excel_to_opl.default_mod_file).with_name('gen-opl-symbolic.mod')
+        s = excel_to_opl.ScenarioForOPL(excel_to_opl.default_excel_file, sheet=excel_to_opl.default_sheet,
+                                        vectorize=True)
+        s.build()
+        s.to_opl(mod_file)
+        # E16 is =SUM(E3:E15)
+        sums = [match for constraint in opl_constraints(mod_file)
+                if (match := re.search(r'sum \((\w+) in 3\.\.15\) \(?(\w+)\[\1\]', constraint))]
+        assert len(sums) == 1, 'Sum over E3:E15 not kept symbolic'
+        array = next(array for array in s.opl_arrays if array.name.to_c_identifier() == sums[0].group(2))
+        assert array.start_row <= 3 and array.end_row >= 15 and \
+               array.cells[0].to_c_identifier().endswith(f'_E{array.start_row}'), \
+            'Sum over E3:E15 uses the wrong array'
+
+    def test_excel_to_opl_incremental(self):
+        mod_file = Path(excel_to_opl.default_mod_file).with_name('gen-opl-incremental.mod')
+        Path(f'{mod_file}{excel_to_opl.BUILD_STATE_SUFFIX}').unlink(missing_ok=True)
+        for _ in range(2):
+            excel_to_opl.run_excel_test(excel_to_opl.default_excel_file, mod_file, incremental=True)
+            assert filecmp.cmp(mod_file, excel_to_opl.default_ref_file, shallow=False), \
+                'Generated OPL file with incremental build different from reference'
+
+    def test_excel_to_opl_incremental_change(self):
+        actual_dir = Path(excel_to_opl.default_mod_file).parent
+        excel_file = actual_dir / 'incremental-change.xlsx'
+        mod_file = actual_dir / 'gen-opl-incremental-change.mod'
+        state_file = f'{mod_file}{excel_to_opl.BUILD_STATE_SUFFIX}'
+        Path(state_file).unlink(missing_ok=True)
+        # Save the workbook with openpyxl before the first build, so that only the changed formula differs
+        wb = load_workbook(excel_to_opl.default_excel_file)
+        wb.save(excel_file)
+        first = excel_to_opl.ScenarioForOPL(excel_file, sheet=excel_to_opl.default_sheet)
+        first.build(state_file=state_file)
+        first.to_opl(mod_file)
+        assert first.build_state.translated == len(first.constraints)
+
+        # E16 is =SUM(E3:E15)
+        wb[excel_to_opl.default_sheet]['E16'] = '=E3+SUM(E4:E15)'
+        wb.save(excel_file)
+        full = excel_to_opl.ScenarioForOPL(excel_file, sheet=excel_to_opl.default_sheet)
+        full.build()
+        full.to_opl(actual_dir / 'gen-opl-incremental-full.mod')
+        changed = next(cell for cell in full.constraints if cell.to_c_identifier().endswith('_E16'))
+        dependents = {changed}
+        agenda = [changed]
+        while agenda:
+            cell = agenda.pop()
+            for dependent, predecessors in full.constraint_predecessors.items():
+                if cell in predecessors and dependent not in dependents:
+                    dependents.add(dependent)
+                    agenda.append(dependent)
+
+        incremental = excel_to_opl.ScenarioForOPL(excel_file, sheet=excel_to_opl.default_sheet)
+        incremental.build(state_file=state_file)
+        incremental.to_opl(mod_file)
+        translated = {cell for cell, c in incremental.constraints.items()
+                      if not isinstance(c, excel_to_opl.CellEntry)}
+        assert translated == dependents, 'Incremental build translated cells that did not change'
+        assert incremental.build_state.translated == len(dependents)
+        assert incremental.build_state.reused == len(incremental.constraints) - len(dependents)
+        assert filecmp.cmp(mod_file, actual_dir / 'gen-opl-incremental-full.mod', shallow=False), \
+            'Generated OPL file with incremental build different from full build'
+
     def test_eco_profiles(self):
         output_dir = test_all_profiles(silent=True).resolve().absolute()
         expected_dir = (output_dir / '../expected').resolve().absolute()
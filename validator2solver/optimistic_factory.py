@@ -13,14 +13,16 @@ from validator2solver.codegen.opl.opl_generator import OplVisitor
 from generated.Python3Lexer import Python3Lexer
 from generated.Python3Parser import Python3Parser
 from optimistic_client.config import configuration
+from validator2solver.python.parse_cache import ParseCache
+from validator2solver.python.parse_python_ast import PythonAstExtractor
 from validator2solver.python.parse_python_spec import PythonSpecExtractor
 from validator2solver.python.python_generator import PythonVisitor
-from validator2solver.python.python_rep import PythonElement
+from validator2solver.python.python_rep import PythonElement, PythonFile, PythonImport, PythonImportFrom
 from validator2solver.python.python_to_expr import PythonToExpr
 from validator2solver.python.python_builtins import PYTHON_BUILTIN_FRAME
 from validator2solver.python.symbol_table import Frame
 from validator2solver.python.symbol_table_import_visitor import SymbolTableImportVisitor, add_frame as visitor_add_frame
-from validator2solver.python.symbol_table_package_visitor import SymbolTablePackageVisitor, PythonImportExtractor
+from validator2solver.python.symbol_table_package_visitor import SymbolTablePackageVisitor
 
 
 #####
@@ -72,6 +74,35 @@ def get_project_root() -> Path:
     return Path(__file__).parent.parent
 
 
+PYTHON_PARSERS = ('antlr', 'ast')
+DEFAULT_PYTHON_PARSER = 'antlr'
+
+
+def get_python_parser(config=None):
+    """
+    Return the front end for Python modules, given by 'python_parser' in the symbol-table configuration: 'antlr' for
+    the ANTLR Python3 grammar, or 'ast' for the standard ``ast`` module, which produces the same trees and is much
+    faster
+    """
+    aconfig = config.get('symbol_table_config') if config else None
+    parser = aconfig.get('python_parser', DEFAULT_PYTHON_PARSER) if aconfig else DEFAULT_PYTHON_PARSER
+    if parser not in PYTHON_PARSERS:
+        raise Exception(f'Unknown Python parser {parser}; should be one of {", ".join(PYTHON_PARSERS)}')
+    return parser
+
+
+def get_parse_cache(config=None):
+    """
+    Return the cache of parsed modules given by the symbol-table configuration: 'parse_cache' keeps the trees of
+    modules for the rest of the process, and 'parse_cache_dir' also keeps them in that directory for later processes;
+    return None if neither is set
+    """
+    aconfig = config.get('symbol_table_config') if config else None
+    if not aconfig or not (aconfig.get('parse_cache') or aconfig.get('parse_cache_dir')):
+        return None
+    return ParseCache.for_directory(aconfig.get('parse_cache_dir'))
+
+
 def suggest_module_name(file_path):
     filename = os.path.basename(file_path)
     if filename.endswith(".py"):
@@ -117,6 +148,8 @@ def create_registry(config=None, builtin_frame=PYTHON_BUILTIN_FRAME, print_trans
         print('Frame Imports:')
         for akey, avalue in symbol_visitor.imports.items():
             print(f'   {akey} -> {avalue}')
+        if (parse_cache := get_parse_cache(config)) is not None:
+            print(parse_cache.report())
 
     return symbol_registry
 
@@ -138,17 +171,23 @@ def create_ast_from_string(spec):
     return tree, parser
 
 
-def generate_ast_from_file(file_path, print_translations=False, print_result=False):
+def generate_ast_from_file(file_path, print_translations=False, print_result=False,
+                           python_parser=DEFAULT_PYTHON_PARSER):
     spec = get_code(file_path)
-    return generate_ast_from_string(spec, print_translations, print_result)
+    return generate_ast_from_string(spec, print_translations, print_result, python_parser)
 
 
-def generate_ast_from_string(spec, print_translations=False, print_result=False):
-    tree, parser = create_ast_from_string(spec)
-    if print_result:
-        print(f'Result: {tree.toStringTree(recog=parser).strip()}')
-    extractor = PythonSpecExtractor()
-    result = extractor.visit(tree)
+def generate_ast_from_string(spec, print_translations=False, print_result=False, python_parser=DEFAULT_PYTHON_PARSER):
+    if python_parser == 'ast':
+        result, extractor = PythonAstExtractor.from_string(spec, keep_mapping=print_translations)
+        if print_result:
+            print(f'Result: {result.describe()}')
+    else:
+        tree, parser = create_ast_from_string(spec)
+        if print_result:
+            print(f'Result: {tree.toStringTree(recog=parser).strip()}')
+        extractor = PythonSpecExtractor()
+        result = extractor.visit(tree)
     # print(result)
     if print_translations:
         for text, trans in extractor.mapping:
@@ -159,6 +198,20 @@ def generate_ast_from_string(spec, print_translations=False, print_result=False)
     return result
 
 
+def parse_module(code, python_parser=DEFAULT_PYTHON_PARSER, parse_cache: ParseCache = None):
+    """
+    Return the tree of the module with the given code, together with a file containing only its top-level import
+    statements; use the cache if given
+    """
+    if parse_cache is not None and (parsed := parse_cache.get(code, python_parser)) is not None:
+        return parsed
+    ast_module = generate_ast_from_string(code, python_parser=python_parser)
+    imports = PythonFile([stmt for stmt in ast_module.contents if isinstance(stmt, (PythonImport, PythonImportFrom))])
+    if parse_cache is not None:
+        parse_cache.put(code, python_parser, ast_module, imports)
+    return ast_module, imports
+
+
 #####
 ##
 # Factories for analyzing package structure for creating the Symbol Table from the Python AST
@@ -175,7 +228,9 @@ def generate_symbol_table_package(planned_registry, config=None, builtin_frame=P
         for module_name in module:
             file_path = str(Path(module[module_name]['location']).joinpath(module[module_name]['file']))
 
+            # The tree was created when analyzing the imports of the module
             ast_module, symbol_visitor = generate_symbol_table_from_file(file_path, module_name=module_name,
+                                                                         ast_module=module[module_name].get('ast'),
                                                                          config=config,
                                                                          print_translations=False,
                                                                          builtin_frame=root)
@@ -234,14 +289,17 @@ def analyze_symbol_table_from_file(config=None,
     candidate = {module_name: {'location': file.parent, 'file': file.name}}
 
     registry, existing, priority = _analyze_symbol_table_from_string(candidate=candidate, root_path=root_path,
-                                                                     print_translations=print_translations)
+                                                                     print_translations=print_translations,
+                                                                     python_parser=get_python_parser(config),
+                                                                     parse_cache=get_parse_cache(config))
 
     return registry, existing, priority
 
 
 def _analyze_symbol_table_from_string(candidate, root_path,
                                       module_registry={}, existing_modules=set(), module_priority=[],
-                                      print_translations=False):
+                                      print_translations=False, python_parser=DEFAULT_PYTHON_PARSER,
+                                      parse_cache: ParseCache = None):
     registry = module_registry if module_registry else {}
     existing = existing_modules if existing_modules else set()
     priority = module_priority if module_priority else []
@@ -250,16 +308,12 @@ def _analyze_symbol_table_from_string(candidate, root_path,
     file_path = candidate[module_name]['location'].joinpath(candidate[module_name]['file'])
     code = get_code(str(file_path))
 
-    # ast_module = generate_ast_from_string(code)
-
-    # Replacing the above line with simple Python parser
-    # we drop everything in the generated AST , besides the Import statements
-    tree, parser = create_ast_from_string(code)
-    extractor = PythonImportExtractor()
-    ast_module = extractor.visit(tree)
+    # The whole module is parsed here, and the tree is kept in the registry for creating the symbol table, so that each
+    # module is parsed only once
+    ast_module, imports = parse_module(code, python_parser, parse_cache)
 
     visitor = SymbolTablePackageVisitor(root_path)
-    visitor.visit(ast_module)
+    visitor.visit(imports)
 
     keep_candidate = deepcopy(candidate)
     keep_candidate[module_name]['ast'] = ast_module
@@ -275,7 +329,8 @@ def _analyze_symbol_table_from_string(candidate, root_path,
 
     for e in new_registry:
         registry, existing, priority = _analyze_symbol_table_from_string(e, root_path, registry, existing, priority,
-                                                                         print_translations)
+                                                                         print_translations, python_parser,
+                                                                         parse_cache)
 
     return registry, existing, priority
 
@@ -321,7 +376,10 @@ DEFAULT_SYMBOL_VISITOR_CONFIG = {
         'enable_code_testing': False,
         'disable_imports_mockup': True,
         'enable_attribute_analysis': False,
-        'debug': False
+        'debug': False,
+        'python_parser': DEFAULT_PYTHON_PARSER,
+        'parse_cache': False,
+        'parse_cache_dir': None
     }
 }
 
@@ -341,7 +399,7 @@ def generate_symbol_table_from_string(code, module_name=None, ast_module=None, c
                DEFAULT_SYMBOL_VISITOR_CONFIG['symbol_table_config'])
     symbol_table = create_system_symbol_table_from_string(code, 'any')
     if ast_module is None:
-        ast_module = generate_ast_from_string(code)
+        ast_module = generate_ast_from_string(code, python_parser=get_python_parser(config))
 
     visitor = SymbolTableImportVisitor(module_name, symbol_table, builtin_frame=builtin_frame,
                                        debug=aconfig.get('debug', False),
@@ -377,7 +435,7 @@ def generate_expr_from_file(file_path, module_name=None, config=None, print_tran
 def generate_expr_from_string(spec, module_name=None, config=None, print_translations=False,
                               builtin_frame=PYTHON_BUILTIN_FRAME,
                               print_all=False):
-    ast_tree = generate_ast_from_string(spec, print_result=False)
+    ast_tree = generate_ast_from_string(spec, print_result=False, python_parser=get_python_parser(config))
     ast, symbol_visitor = generate_symbol_table_from_string(spec, module_name, ast_module=ast_tree,
                                                             config=config,
                                                             print_translations=print_translations,
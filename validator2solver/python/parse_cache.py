@@ -0,0 +1,124 @@
+import hashlib
+import io
+import os
+import pickle
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from codegen import parameters
+from codegen.parameters import ParmKind
+from validator2solver.python import parse_python_ast, parse_python_spec, python_rep
+from validator2solver.python.python_rep import PythonFile
+
+PARSE_CACHE_VERSION = 1
+PARSE_CACHE_SUFFIX = '.parse'
+
+# Modules whose code determines the trees kept in the cache
+FRONT_END_MODULES = (python_rep, parse_python_spec, parse_python_ast)
+
+# Parameter kinds are compared by identity, so they are pickled by name
+SHARED_OBJECTS = {name: value for name, value in vars(parameters).items() if isinstance(value, ParmKind)}
+SHARED_OBJECT_NAMES = {id(value): name for name, value in SHARED_OBJECTS.items()}
+
+
+@lru_cache(maxsize=None)
+def tool_version() -> str:
+    """
+    Return a hash of the code of the front end, so that trees created by other versions are not used
+    """
+    digest = hashlib.sha256(f'{PARSE_CACHE_VERSION} {sys.version_info[:2]}'.encode('utf8'))
+    for module in FRONT_END_MODULES:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+class _TreePickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return SHARED_OBJECT_NAMES.get(id(obj))
+
+
+class _TreeUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return SHARED_OBJECTS[pid]
+
+
+class ParseCache:
+    """
+    Cache of the python_rep trees of modules together with their top-level imports, keyed by the hash of the code, the
+    front end used to parse it, and the version of the tool (see ``tool_version``).
+
+    Trees are kept pickled, and each lookup returns a fresh copy, since the symbol-table visitors modify the trees they
+    visit.  If a directory is given, the trees are also kept there for use by later processes.
+    """
+
+    _caches: Dict[Optional[str], 'ParseCache'] = {}
+
+    def __init__(self, directory: Union[str, Path, None] = None):
+        self.directory = Path(directory) if directory is not None else None
+        self.trees: Dict[str, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_directory(cls, directory: Union[str, Path, None] = None) -> 'ParseCache':
+        """
+        Return the cache of this process for the given directory (or the one kept only in memory, if None)
+        """
+        key = str(Path(directory).resolve()) if directory is not None else None
+        if (cache := cls._caches.get(key)) is None:
+            cache = cls._caches[key] = cls(directory)
+        return cache
+
+    def key(self, code: str, python_parser: str) -> str:
+        return hashlib.sha256(f'{tool_version()}\0{python_parser}\0{code}'.encode('utf8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{key}{PARSE_CACHE_SUFFIX}'
+
+    def get(self, code: str, python_parser: str) -> Optional[Tuple[PythonFile, PythonFile]]:
+        """
+        Return the tree of the module with the given code and its imports, or None if it isn't in the cache
+        """
+        key = self.key(code, python_parser)
+        data = self.trees.get(key)
+        if data is None and self.directory is not None:
+            try:
+                data = self._path(key).read_bytes()
+            except OSError:
+                pass
+        if data is not None:
+            try:
+                result = _TreeUnpickler(io.BytesIO(data)).load()
+            except (EOFError, ValueError, AttributeError, KeyError, pickle.PickleError):
+                result = None
+            if result is not None:
+                self.trees[key] = data
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, code: str, python_parser: str, tree: PythonFile, imports: PythonFile):
+        """
+        Add the tree of the module with the given code and its imports; these must not have been visited yet
+        """
+        key = self.key(code, python_parser)
+        buffer = io.BytesIO()
+        try:
+            _TreePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump((tree, imports))
+        except RecursionError:
+            # Very deeply nested trees are not cached
+            return
+        data = self.trees[key] = buffer.getvalue()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            # Write to a temporary file first, so that other processes never see a partial file
+            temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+
+    def report(self) -> str:
+        return f'Parse cache: {self.hits} hits, {self.misses} misses'
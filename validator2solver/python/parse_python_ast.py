@@ -0,0 +1,601 @@
+"""
+Front end for validator modules based on the standard ``ast`` module.
+
+``PythonAstExtractor`` produces the same ``python_rep`` tree as ``PythonSpecExtractor`` does on the ANTLR parse tree,
+but is much faster, since it relies on the Python parser instead of the generated pure-Python ANTLR parser.  This
+includes the treatment of constructs that ``PythonSpecExtractor`` has no specific translation for, where the tree
+mirrors the default ANTLR visitor (for example, lambda expressions are represented by their bodies).  The only known
+difference is that keyword-only parameters following a bare ``*`` are paired with their own default values, which the
+ANTLR extractor pairs by position.
+"""
+
+import ast
+import io
+import keyword
+import tokenize
+from ast import literal_eval
+from re import compile
+from typing import List, Optional, Sequence, Tuple
+
+from codegen.parameters import ONLY_KW
+from validator2solver.python.python_rep import PythonElement, PythonFile, PythonStatements, PythonReturn, \
+    PythonExpressions, PythonIFTE, PythonOp, PythonComparison, PythonCall, PythonSubscripted, PythonAttribute, \
+    PythonTupleCons, PythonListCons, PythonDictCons, PythonVariable, PythonConstant, PythonDictCompr, PythonSetCompr, \
+    PythonSetCons, PythonIncDict, PythonDictPair, PythonForComprehension, PythonIfComprehension, PythonNotImplemented, \
+    PythonPass, PythonSlice, PythonFuncDef, PythonParmlist, PythonKeywordParm, PythonParm, PythonRestParm, \
+    PythonGenExpr, PythonUnpack, PythonClass, PythonDecorated, PythonDestructure, PythonAssignment, PythonTypedExpr, \
+    PythonImport, PythonImportFrom, PythonImportAll, PythonImportAs, PythonAssert, PythonKeywordArg, \
+    PythonIfStatement, PythonListCompr
+
+
+class OptimisticPythonParserException(Exception):
+    pass
+
+
+STR_START = compile(r'["\']')
+
+
+def string_literal_value(string: str):
+    """
+    Return the value of a single string literal as written in the source; formatted strings are kept with their prefix
+    """
+    string_start = STR_START.search(string).start()
+    if string[:string_start].lower().find('f') >= 0:
+        return f'{string[:string_start]}"{literal_eval(string[string_start:])}"'
+    else:
+        return literal_eval(string)
+
+
+BOOLEAN_OPS = {ast.And: 'and', ast.Or: 'or'}
+UNARY_OPS = {ast.Not: 'not', ast.UAdd: '+', ast.USub: '-', ast.Invert: '~'}
+BINARY_OPS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.MatMult: '@', ast.Div: '/', ast.Mod: '%',
+              ast.FloorDiv: '//', ast.Pow: '**', ast.LShift: '<<', ast.RShift: '>>', ast.BitOr: '|', ast.BitXor: '^',
+              ast.BitAnd: '&'}
+# Operators whose chains are represented by a single operation on all operands
+FLAT_BINARY_OPS = (ast.BitOr, ast.BitXor, ast.BitAnd)
+# The ANTLR extractor uses the text of the comparison operator without spaces
+COMPARISON_OPS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=',
+                  ast.Is: 'is', ast.IsNot: 'isnot', ast.In: 'in', ast.NotIn: 'notin'}
+
+LAYOUT_TOKENS = frozenset({tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT,
+                           tokenize.ENDMARKER})
+STRING_END_TOKENS = frozenset({tokenize.STRING, getattr(tokenize, 'FSTRING_END', tokenize.STRING)})
+
+
+class SourceTokens:
+    """
+    The tokens of the source code (without comments and layout), used to find the parentheses around expressions,
+    which are not represented in the ``ast`` tree
+    """
+
+    def __init__(self, code: str):
+        self.lines = io.StringIO(code).readlines()
+        self.tokens = [t for t in tokenize.generate_tokens(io.StringIO(code).readline) if t.type not in LAYOUT_TOKENS]
+        self.starts = {t.start: i for i, t in enumerate(self.tokens)}
+        self.ends = {t.end: i for i, t in enumerate(self.tokens)}
+        self.matching = {}
+        stack = []
+        for i, t in enumerate(self.tokens):
+            if t.type == tokenize.OP:
+                if t.string in '([{':
+                    stack.append(i)
+                elif t.string in ')]}' and stack:
+                    self.matching[stack.pop()] = i
+
+    def position(self, lineno: int, col_offset: int) -> Tuple[int, int]:
+        """
+        Convert an ``ast`` position, whose column is an offset in bytes, to a token position
+        """
+        line = self.lines[lineno - 1] if lineno <= len(self.lines) else ''
+        if line.isascii():
+            return lineno, col_offset
+        return lineno, len(line.encode('utf-8')[:col_offset].decode('utf-8', errors='ignore'))
+
+    def span(self, node: ast.AST) -> Optional[Tuple[int, int]]:
+        start = self.starts.get(self.position(node.lineno, node.col_offset))
+        end = self.ends.get(self.position(node.end_lineno, node.end_col_offset))
+        if start is None or end is None:
+            return None
+        return start, end
+
+    def is_open_paren(self, index: int) -> bool:
+        """
+        Return whether the token at the given index is an opening parenthesis that doesn't start a call
+        """
+        token = self.tokens[index]
+        if token.type != tokenize.OP or token.string != '(':
+            return False
+        if index == 0:
+            return True
+        previous = self.tokens[index - 1]
+        return not ((previous.type == tokenize.NAME and not keyword.iskeyword(previous.string))
+                    or previous.string in (')', ']', '}') or previous.type in STRING_END_TOKENS)
+
+    def parenthesized_span(self, node: ast.AST) -> Optional[Tuple[int, int]]:
+        """
+        Return the span of the node including all parentheses around it
+        """
+        if (span := self.span(node)) is None:
+            return None
+        start, end = span
+        while start > 0 and self.is_open_paren(start - 1) and self.matching.get(start - 1) == end + 1:
+            start -= 1
+            end += 1
+        return start, end
+
+    def is_parenthesized(self, node: ast.AST) -> bool:
+        return (span := self.span(node)) is not None and span != self.parenthesized_span(node)
+
+    def has_own_parentheses(self, node: ast.AST) -> bool:
+        """
+        Return whether the node starts and ends with a matching pair of parentheses, as parenthesized tuples do
+        """
+        return (span := self.span(node)) is not None and self.matching.get(span[0]) == span[1]
+
+    def starts_line(self, node: ast.AST) -> bool:
+        lineno, col = self.position(node.lineno, node.col_offset)
+        return not self.lines[lineno - 1][:col].strip()
+
+    def line_before(self, node: ast.AST) -> int:
+        """
+        Return the line of the token that precedes the node (including any parentheses around it)
+        """
+        if (span := self.parenthesized_span(node)) is None or span[0] == 0:
+            return node.lineno
+        return self.tokens[span[0] - 1].start[0]
+
+    def line_after_start(self, node: ast.AST, offset: int) -> int:
+        """
+        Return the line of the token that follows the first token of the node by the given offset
+        """
+        start = self.starts.get(self.position(node.lineno, node.col_offset))
+        if start is None or start + offset >= len(self.tokens):
+            return node.lineno
+        return self.tokens[start + offset].start[0]
+
+
+class PythonAstExtractor(ast.NodeVisitor):
+    """
+    Convert an ``ast`` tree of a validator module to the ``python_rep`` tree
+
+    Like ``PythonSpecExtractor``, every element is marked with the line on which it starts (including any parentheses
+    around it), and if ``keep_mapping`` is true the text of each translated node is kept with its translation in
+    ``mapping``.
+    """
+
+    def __init__(self, code: str, keep_mapping=False):
+        self.code = code
+        self.source = SourceTokens(code)
+        self.mapping = [] if keep_mapping else None
+
+    @classmethod
+    def from_string(cls, code: str, keep_mapping=False) -> Tuple[PythonFile, 'PythonAstExtractor']:
+        extractor = cls(code, keep_mapping=keep_mapping)
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            raise OptimisticPythonParserException(f'Syntax error on line {e.lineno}: {e.msg}') from e
+        return extractor.visit(tree), extractor
+
+    def visit(self, node: ast.AST):
+        result = super().visit(node)
+        if isinstance(result, PythonElement):
+            result._starts_on_line = self.starts_on_line(node)
+        if self.mapping is not None and hasattr(node, 'lineno'):
+            next_item = (ast.get_source_segment(self.code, node), result)
+            if not self.mapping or self.mapping[-1] != next_item:
+                self.mapping.append(next_item)
+        return result
+
+    def generic_visit(self, node: ast.AST):
+        raise OptimisticPythonParserException(f'{type(node).__name__} not supported!')
+
+    def starts_on_line(self, node: ast.AST) -> Optional[int]:
+        if isinstance(node, ast.Module):
+            return self.starts_on_line(node.body[0]) if node.body else 1
+        if not hasattr(node, 'lineno'):
+            return None
+        if isinstance(node, ast.expr) and (span := self.source.parenthesized_span(node)) is not None:
+            return self.source.tokens[span[0]].start[0]
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.decorator_list:
+            return node.decorator_list[0].lineno
+        return node.lineno
+
+    def with_line(self, element: PythonElement, line: int) -> PythonElement:
+        element._starts_on_line = line
+        return element
+
+    # Statements
+
+    def statement_lines(self, body: Sequence[ast.stmt]) -> List[List[ast.stmt]]:
+        """
+        Group statements by the line they appear on (statements separated by semicolons are on the same line)
+        """
+        lines = []
+        for stmt in body:
+            if lines and not self.source.starts_line(stmt):
+                lines[-1].append(stmt)
+            else:
+                lines.append([stmt])
+        return lines
+
+    def simple_statements(self, line: List[ast.stmt]) -> PythonElement:
+        if len(line) == 1:
+            return self.visit(line[0])
+        return self.with_line(PythonStatements([self.visit(stmt) for stmt in line]), line[0].lineno)
+
+    def suite(self, body: Sequence[ast.stmt]) -> PythonElement:
+        if not self.source.starts_line(body[0]):
+            # all statements are on the same line as the header
+            return self.simple_statements(list(body))
+        return self.with_line(PythonStatements([self.simple_statements(line) for line in self.statement_lines(body)]),
+                              self.starts_on_line(body[0]))
+
+    def visit_Module(self, node: ast.Module):
+        return PythonFile([self.simple_statements(line) for line in self.statement_lines(node.body)])
+
+    def visit_Expr(self, node: ast.Expr):
+        if isinstance(node.value, (ast.Yield, ast.YieldFrom)):
+            return self.yield_statement(node.value)
+        return self.star_expressions(node.value)
+
+    def yield_statement(self, node):
+        if node.value is None:
+            return PythonNotImplemented()
+        if isinstance(node, ast.YieldFrom):
+            return self.visit(node.value)
+        return self.expressions(node.value)
+
+    def star_expressions(self, node: ast.expr) -> PythonElement:
+        """
+        Translate an unparenthesized list of expressions, which is destructured if it has more than one element
+        """
+        if isinstance(node, (ast.Yield, ast.YieldFrom)):
+            raise OptimisticPythonParserException('yield expressions not supported!')
+        if isinstance(node, ast.Tuple) and not self.source.has_own_parentheses(node):
+            if len(node.elts) == 1:
+                return self.visit(node.elts[0])
+            return self.with_line(PythonDestructure([self.visit(e) for e in node.elts]), self.starts_on_line(node))
+        return self.visit(node)
+
+    def expressions(self, node: ast.expr) -> PythonExpressions:
+        if isinstance(node, ast.Tuple) and not self.source.has_own_parentheses(node):
+            elements = node.elts
+        else:
+            elements = [node]
+        return self.with_line(PythonExpressions([self.visit(e) for e in elements]), self.starts_on_line(node))
+
+    def visit_Assign(self, node: ast.Assign):
+        result = self.star_expressions(node.value)
+        for target in reversed(node.targets):
+            result = self.with_line(PythonAssignment(self.star_expressions(target), '=', result), node.lineno)
+        return result
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        lhs = self.star_expressions(node.target)
+        type_decl = self.visit(node.annotation)
+        if node.value is not None:
+            typed = self.with_line(PythonTypedExpr(lhs, type_decl), node.lineno)
+            return PythonAssignment(typed, '=', self.visit(node.value))
+        return PythonTypedExpr(lhs, type_decl)
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        raise OptimisticPythonParserException('Augmented assignment not supported!')
+
+    def visit_Return(self, node: ast.Return):
+        return PythonReturn(self.expressions(node.value) if node.value is not None else None)
+
+    def visit_Pass(self, node: ast.Pass):
+        return PythonPass()
+
+    def visit_Assert(self, node: ast.Assert):
+        return PythonAssert(self.visit(node.test), self.visit(node.msg) if node.msg is not None else None)
+
+    def visit_Import(self, node: ast.Import):
+        return PythonImport([self.with_line(PythonImportAs(alias.name, alias.asname) if alias.asname is not None
+                                            else PythonVariable(alias.name), getattr(alias, 'lineno', node.lineno))
+                             for alias in node.names])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.level:
+            raise OptimisticPythonParserException('Relative imports not supported!')
+        from_pkg = self.dotted_name(node.module.split('.'), node.lineno)
+        if len(node.names) == 1 and node.names[0].name == '*':
+            return PythonImportFrom(from_pkg, [PythonImportAll()])
+        return PythonImportFrom(from_pkg, [self.with_line(PythonImportAs(alias.name, alias.asname)
+                                                          if alias.asname is not None else PythonVariable(alias.name),
+                                                          getattr(alias, 'lineno', node.lineno))
+                                           for alias in node.names])
+
+    def dotted_name(self, names: Sequence[str], line: int) -> PythonElement:
+        result = self.with_line(PythonVariable(names[0]), line)
+        for attr in names[1:]:
+            result = self.with_line(PythonAttribute(result, attr), line)
+        return result
+
+    def visit_If(self, node: ast.If):
+        conditions = []
+        blocks = []
+        else_block = None
+        while True:
+            conditions.append(self.visit(node.test))
+            blocks.append(self.suite(node.body))
+            orelse = node.orelse
+            if len(orelse) == 1 and isinstance(orelse[0], ast.If) and self.is_elif(orelse[0]):
+                node = orelse[0]
+                continue
+            if orelse:
+                else_block = self.suite(orelse)
+            break
+        return PythonIfStatement(conditions, blocks, else_block)
+
+    def is_elif(self, node: ast.If) -> bool:
+        return (span := self.source.span(node)) is not None and self.source.tokens[span[0]].string == 'elif'
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        if node.args.posonlyargs:
+            raise OptimisticPythonParserException('Positional-only parameters not supported!')
+        res_type = self.visit(node.returns) if node.returns is not None else None
+        # the parameters start after the def keyword (preceded by async, if any) and the name
+        parameters_line = self.source.line_after_start(node, 3 if isinstance(node, ast.AsyncFunctionDef) else 2)
+        pars = self.with_line(self.parameters(node.args), parameters_line)
+        funcdef = PythonFuncDef(node.name, pars, res_type, self.suite(node.body))
+        return self.decorated(node, funcdef)
+
+    # The ANTLR extractor ignores the async keyword
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def parameters(self, args: ast.arguments) -> PythonParmlist:
+        parms = []
+        for name, default in zip(args.args, [None] * (len(args.args) - len(args.defaults)) + args.defaults):
+            parm = self.visit(name)
+            parms.append(parm.with_init(self.visit(default)) if default is not None else parm)
+        if args.vararg is not None:
+            parms.append(PythonRestParm(self.visit(args.vararg)))
+        for name, default in zip(args.kwonlyargs, args.kw_defaults):
+            parm = self.visit(name).with_kind(ONLY_KW)
+            parms.append(parm.with_init(self.visit(default)) if default is not None else parm)
+        if args.kwarg is not None:
+            parms.append(PythonKeywordParm(self.visit(args.kwarg)))
+        return PythonParmlist(parms)
+
+    def visit_arg(self, node: ast.arg):
+        if node.annotation is not None:
+            return PythonParm(node.arg, ptype=self.visit(node.annotation))
+        return PythonParm(node.arg)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        classdef = PythonClass(node.name, self.arguments(node.bases, node.keywords), self.suite(node.body))
+        return self.decorated(node, classdef)
+
+    def decorated(self, node, definition: PythonElement) -> PythonElement:
+        if not node.decorator_list:
+            return definition
+        definition._starts_on_line = node.lineno
+        decorators = [self.with_line(self.decorator(d), d.lineno) for d in node.decorator_list]
+        return self.with_line(PythonDecorated(decorators, definition), node.decorator_list[0].lineno)
+
+    def decorator(self, node: ast.expr) -> PythonElement:
+        if isinstance(node, ast.Call):
+            base = self.decorator_name(node.func)
+            if node.args or node.keywords:
+                return PythonCall(base, self.arguments(node.args, node.keywords))
+            return base
+        return self.decorator_name(node)
+
+    def decorator_name(self, node: ast.expr) -> PythonElement:
+        names = []
+        while isinstance(node, ast.Attribute):
+            names.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            raise OptimisticPythonParserException('Only dotted names supported as decorators!')
+        names.append(node.id)
+        return self.dotted_name(names[::-1], node.lineno)
+
+    # Statements the ANTLR extractor doesn't translate are represented by their last part
+
+    def last_suite(self, *suites: Sequence[ast.stmt]) -> PythonElement:
+        return self.suite(next(suite for suite in reversed(suites) if suite))
+
+    def visit_While(self, node: ast.While):
+        return self.last_suite(node.body, node.orelse)
+
+    def visit_For(self, node: ast.For):
+        return self.last_suite(node.body, node.orelse)
+
+    visit_AsyncFor = visit_For
+
+    def visit_Try(self, node: ast.Try):
+        return self.last_suite(*(handler.body for handler in node.handlers), node.orelse, node.finalbody)
+
+    def visit_With(self, node: ast.With):
+        return self.suite(node.body)
+
+    visit_AsyncWith = visit_With
+
+    def visit_Raise(self, node: ast.Raise):
+        if (last := node.cause or node.exc) is not None:
+            return self.visit(last)
+        return PythonNotImplemented()
+
+    def not_implemented(self, node: ast.stmt):
+        return PythonNotImplemented()
+
+    visit_Delete = visit_Global = visit_Nonlocal = visit_Break = visit_Continue = not_implemented
+
+    # Expressions
+
+    def visit_BoolOp(self, node: ast.BoolOp):
+        return PythonOp(BOOLEAN_OPS[type(node.op)], [self.visit(v) for v in node.values])
+
+    def visit_UnaryOp(self, node: ast.UnaryOp):
+        return PythonOp(UNARY_OPS[type(node.op)], [self.visit(node.operand)])
+
+    def visit_BinOp(self, node: ast.BinOp):
+        op = BINARY_OPS[type(node.op)]
+        if not isinstance(node.op, FLAT_BINARY_OPS):
+            return PythonOp(op, [self.visit(node.left), self.visit(node.right)])
+        operands = [node.right]
+        left = node.left
+        while (isinstance(left, ast.BinOp) and type(left.op) is type(node.op)
+               and not self.source.is_parenthesized(left)):
+            operands.append(left.right)
+            left = left.left
+        operands.append(left)
+        return PythonOp(op, [self.visit(operand) for operand in reversed(operands)])
+
+    def visit_Compare(self, node: ast.Compare):
+        return PythonComparison([COMPARISON_OPS[type(op)] for op in node.ops],
+                                [self.visit(e) for e in (node.left, *node.comparators)])
+
+    def visit_IfExp(self, node: ast.IfExp):
+        return PythonIFTE(self.visit(node.test), self.visit(node.body), self.visit(node.orelse))
+
+    def visit_Lambda(self, node: ast.Lambda):
+        # The ANTLR extractor represents lambda expressions by their bodies
+        return self.visit(node.body)
+
+    def visit_Await(self, node: ast.Await):
+        return self.visit(node.value)
+
+    def visit_Yield(self, node: ast.Yield):
+        raise OptimisticPythonParserException('yield expressions not supported!')
+
+    visit_YieldFrom = visit_Yield
+
+    def visit_Call(self, node: ast.Call):
+        args = self.arguments(node.args, node.keywords)
+        if len(node.args) == 1 and not node.keywords and isinstance(node.args[0], ast.GeneratorExp):
+            generator = node.args[0]
+            if (span := self.source.span(generator)) is not None and not self.source.is_open_paren(span[0]):
+                # The generator expression shares the parentheses of the call, and starts where its element starts
+                args[0]._starts_on_line = self.starts_on_line(generator.elt)
+        return PythonCall(self.visit(node.func), args)
+
+    def arguments(self, args: Sequence[ast.expr], keywords: Sequence[ast.keyword]) -> List[PythonElement]:
+        """
+        Translate the arguments of a call in the order they appear in the source; starred arguments are represented by
+        their values, as in the ANTLR extractor
+        """
+        all_args = sorted([*args, *keywords], key=lambda a: (a.lineno, a.col_offset))
+        result = []
+        for arg in all_args:
+            if isinstance(arg, ast.keyword):
+                if arg.arg is None:
+                    result.append(self.visit(arg.value))
+                else:
+                    result.append(self.with_line(PythonKeywordArg(arg.arg, self.visit(arg.value)), arg.lineno))
+            elif isinstance(arg, ast.Starred):
+                result.append(self.visit(arg.value))
+            else:
+                result.append(self.visit(arg))
+        return result
+
+    def visit_Attribute(self, node: ast.Attribute):
+        return PythonAttribute(self.visit(node.value), node.attr)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        subscript = node.slice
+        if isinstance(subscript, ast.Tuple) and not self.source.has_own_parentheses(subscript):
+            subscripts = subscript.elts
+        else:
+            subscripts = [subscript]
+        return PythonSubscripted(self.visit(node.value), [self.visit(s) for s in subscripts])
+
+    def visit_Slice(self, node: ast.Slice):
+        return PythonSlice(*(self.visit(e) if e is not None else None for e in (node.lower, node.upper, node.step)))
+
+    def visit_Starred(self, node: ast.Starred):
+        return PythonUnpack(self.visit(node.value))
+
+    def visit_Name(self, node: ast.Name):
+        return PythonVariable(node.id)
+
+    def visit_Constant(self, node: ast.Constant):
+        return PythonConstant(node.value)
+
+    def visit_JoinedStr(self, node: ast.JoinedStr):
+        # Formatted strings are kept as written, together with any strings they are concatenated with
+        span = self.source.span(node)
+        if span is None:
+            raise OptimisticPythonParserException('Nested formatted strings not supported!')
+        strings = []
+        start = None
+        depth = 0
+        for token in self.source.tokens[span[0]:span[1] + 1]:
+            if token.type == tokenize.STRING and depth == 0:
+                strings.append(token.string)
+            elif token.type == getattr(tokenize, 'FSTRING_START', None):
+                if depth == 0:
+                    start = token.start
+                depth += 1
+            elif token.type == getattr(tokenize, 'FSTRING_END', None):
+                depth -= 1
+                if depth == 0:
+                    strings.append(self.source_text(start, token.end))
+        return PythonConstant(''.join(string_literal_value(s) for s in strings))
+
+    def source_text(self, start: Tuple[int, int], end: Tuple[int, int]) -> str:
+        lines = self.source.lines[start[0] - 1:end[0]]
+        if len(lines) == 1:
+            return lines[0][start[1]:end[1]]
+        return ''.join((lines[0][start[1]:], *lines[1:-1], lines[-1][:end[1]]))
+
+    def visit_Tuple(self, node: ast.Tuple):
+        return PythonTupleCons([self.visit(e) for e in node.elts])
+
+    def visit_List(self, node: ast.List):
+        return PythonListCons([self.visit(e) for e in node.elts])
+
+    def visit_Set(self, node: ast.Set):
+        return PythonSetCons([self.visit(e) for e in node.elts])
+
+    def visit_Dict(self, node: ast.Dict):
+        return PythonDictCons([self.with_line(PythonIncDict(self.visit(value)), self.source.line_before(value))
+                               if key is None
+                               else self.with_line(PythonDictPair(self.visit(key), self.visit(value)),
+                                                   self.starts_on_line(key))
+                               for key, value in zip(node.keys, node.values)])
+
+    def comprehension(self, generators: Sequence[ast.comprehension]) -> PythonForComprehension:
+        rest = None
+        for generator in reversed(generators):
+            for condition in reversed(generator.ifs):
+                rest = self.with_line(PythonIfComprehension(self.visit(condition), rest),
+                                      self.source.line_before(condition))
+            target = generator.target
+            if isinstance(target, ast.Tuple) and not self.source.has_own_parentheses(target):
+                targets = [self.visit(e) for e in target.elts]
+            else:
+                targets = [self.visit(target)]
+            rest = self.with_line(PythonForComprehension(targets, self.visit(generator.iter), rest),
+                                  self.source.line_before(target))
+        return rest
+
+    def visit_ListComp(self, node: ast.ListComp):
+        return PythonListCompr(self.visit(node.elt), self.comprehension(node.generators))
+
+    def visit_SetComp(self, node: ast.SetComp):
+        return PythonSetCompr(self.visit(node.elt), self.comprehension(node.generators))
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp):
+        return PythonGenExpr(self.visit(node.elt), self.comprehension(node.generators))
+
+    def visit_DictComp(self, node: ast.DictComp):
+        return PythonDictCompr(self.visit(node.key), self.visit(node.value), self.comprehension(node.generators))
+
+
+def python_ast_imports(code: str) -> PythonFile:
+    """
+    Return the import statements at the top level of the module, each on its own line, as ``PythonImportExtractor``
+    does; the rest of the module is not translated
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        raise OptimisticPythonParserException(f'Syntax error on line {e.lineno}: {e.msg}') from e
+    extractor = PythonAstExtractor(code)
+    return PythonFile([extractor.visit(line[0])
+                       for line in extractor.statement_lines(tree.body)
+                       if len(line) == 1 and isinstance(line[0], (ast.Import, ast.ImportFrom))])
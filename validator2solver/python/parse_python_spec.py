@@ -1,7 +1,5 @@
-from ast import literal_eval
 from functools import wraps
 from typing import Sequence
-from re import compile
 import itertools
 
 
@@ -14,12 +12,9 @@ from validator2solver.python.python_rep import PythonElement, PythonFile, Python
     EmptyContents, PythonDictCompr, PythonSetCompr, PythonSetCons, PythonIncDict, PythonDictPair, PythonForComprehension, PythonIfComprehension, PythonNotImplemented, PythonPass, PythonSlice, PythonFuncDef, \
     PythonParmlist, PythonKeywordParm, PythonParm, PythonRestParm, PythonGenExpr, PythonUnpack, PythonClass, \
     PythonDecorated, PythonDestructure, PythonAssignment, PythonTypedExpr, PythonImport, PythonImportFrom, \
-    PythonImportAll, PythonImportAs, PythonAssert, PythonKeywordArg, PythonIfStatement, PythonContainerCons
+    PythonImportAll, PythonImportAs, PythonAssert, PythonKeywordArg, PythonIfStatement
 from codegen.parameters import ONLY_KW
-
-
-class OptimisticPythonParserException(Exception):
-    pass
+from validator2solver.python.parse_python_ast import OptimisticPythonParserException, string_literal_value
 
 
 def zip_right(s1: Sequence, s2: Sequence, padding=None) -> Sequence:
@@ -376,9 +371,9 @@ class PythonSpecExtractor(Python3Visitor,
         contents = self.visit(ctx.testlist_comp())
         if isinstance(contents, Comprehension):
             return contents.as_list()
-        if not isinstance(contents, PythonContainerCons):
-            return PythonListCons([contents])
-        return PythonListCons(contents.components)
+        if isinstance(contents, Components):
+            return PythonListCons(contents.components)
+        return PythonListCons([contents])
 
     def visitAtom_dict_or_set(self, ctx: Python3Parser.Atom_dict_or_setContext):
         if (contents := ctx.dictorsetmaker()) is not None:
@@ -401,19 +396,10 @@ class PythonSpecExtractor(Python3Visitor,
             return complex(imagval.getText())
         raise Exception('Unknown number type')
 
-    STR_START = compile(r'["\']')
-
     def visitAtom_strings(self, ctx: Python3Parser.Atom_stringsContext):
-        def safe_eval(string):
-            string_start = self.STR_START.search(string).start()
-            if string[:string_start].lower().find('f') >= 0:
-                return f'{string[:string_start]}"{literal_eval(string[string_start:])}"'
-            else:
-                return literal_eval(string)
-
         if len(strings := ctx.STRING()) == 1:
-            return PythonConstant(safe_eval(strings[0].getText()))
-        return PythonConstant(''.join(safe_eval(s.getText()) for s in strings))
+            return PythonConstant(string_literal_value(strings[0].getText()))
+        return PythonConstant(''.join(string_literal_value(s.getText()) for s in strings))
 
     def visitAtom_ellipsis(self, ctx: Python3Parser.Atom_ellipsisContext):
         return PythonConstant(Ellipsis)
@@ -24,10 +24,13 @@ from validator2solver.python.python_rep import PythonElement, PythonVariable, Py
 from validator2solver.python.python_builtins import PYTHON_OPERATORS, is_python_operator, is_python_builtin, \
     PYTHON_LOGICAL_OPERATORS
 from validator2solver.python.symbol_default_modules import METADATA_QN, NEW_TYPE_QN, CLASSMETHOD_QN, \
-    STATICMETHOD_QN, DATA_RECORD_QN_GROUP, SOLUTION_VARIABLE_QN
+    STATICMETHOD_QN, DATA_RECORD_QN_GROUP, SOLUTION_VARIABLE_QN, GROUPED_COUNT_QN, GROUPED_SUM_QN, ATTRIBUTE_KEY_QN, \
+    COUNT_QN
 from validator2solver.python.symbol_table import environment_path_from_frame
 
 METHOD_CALL_INDICATOR = '**method-call**'
+GROUPED_ELEMENT_NAME = 'element'
+LOOKUP_METHOD_NAME = 'lookup'
 
 PYTHON_COMP_OPS_REV1 = {v: k for k, v in PYTHON_COMP_OPS.items()}
 PYTHON_COMP_OPS_REV = {**PYTHON_COMP_OPS_REV1, 'in': ELEMENT_OF_SYMBOL, 'notin': NOT_ELEMENT_OF_SYMBOL,
@@ -161,6 +164,12 @@ class PythonToExpr(AbstractPythonElementVisitor):
     def __init__(self, symbol_table_visitor):
         self.enclosing_context = []
         self.symbol_table_visitor = symbol_table_visitor
+        # names of the primary-key fields of the dataclasses defined so far, by class name
+        self.primary_keys = {}
+        # for each enclosing class, the names of the element classes of its collection fields, by field name
+        self.collection_fields = []
+        # number of calls to grouped_count and grouped_sum translated so far
+        self.grouped_serial = 0
 
     def visit_python_file(self, file: PythonFile):
         self.enclosing_context.append('file')
@@ -281,7 +290,8 @@ class PythonToExpr(AbstractPythonElementVisitor):
                     return MathVariable(QualifiedName(attr.attr,
                                                       lexical_path=self.symbol_table_visitor.environment_path_of_var(
                                                           pseudo, True)))
-        # if isinstance(attr.obj, PythonCall):
+        if isinstance(attr.obj, PythonCall) and (result := self.lookup_to_next(attr.obj, attr.attr)) is not None:
+            return result
         return Attribute(Atom(MFunctionType([], M_ANY, arity='?'), [attr.attr]), self.visit(attr.obj))
 
     def visit_python_call(self, call: PythonCall):
@@ -290,6 +300,8 @@ class PythonToExpr(AbstractPythonElementVisitor):
             name = func.name
             if is_python_operator(name):
                 name = translate_python_operator(name.name)
+            if name in (GROUPED_COUNT_QN, GROUPED_SUM_QN):
+                return self.grouped_to_aggregate(call, name == GROUPED_SUM_QN)
             if is_python_builtin(name):
                 trans = translate_python_builtin(name.name)
                 if isinstance(trans, PythonBuiltinTransformer):
@@ -302,6 +314,8 @@ class PythonToExpr(AbstractPythonElementVisitor):
                 return Aggregate(aggregative_op, stream.term, stream.container)
             return FunctionApplication(name, [self.visit(arg) for arg in call.arglist])
         elif isinstance(func, Attribute):
+            if (result := self.lookup_to_next(call)) is not None:
+                return result
             attr_name = func.attribute.words[0]
             result = FunctionApplication(
                 QualifiedName(attr_name, type=func.attribute.type, lexical_path=(METHOD_CALL_INDICATOR,)),
@@ -311,6 +325,94 @@ class PythonToExpr(AbstractPythonElementVisitor):
             # TODO: do we need to support function expressions (change PythonCall accordingly)?
             raise Exception('Expressions as functions not yet supported!')
 
+    def grouped_to_aggregate(self, call: PythonCall, summed: bool) -> Union[FunctionApplication, Aggregate]:
+        """
+        Translate ``grouped_count(obj, elements, by, values)`` into the equivalent
+        ``count(e for e in elements if ...)``, or ``grouped_sum(obj, elements, term, by, values)`` into the equivalent
+        ``sum(term(e) for e in elements if ...)``
+
+        The first argument only holds the counts at runtime, and is ignored.
+        """
+        function = 'grouped_sum' if summed else 'grouped_count'
+        args = call.arglist
+        if len(args) != 4 + summed or any(isinstance(arg, PythonKeywordArg) for arg in args):
+            raise Exception(f'{function} must be called with {4 + summed} positional arguments')
+        if summed:
+            _, elements, term, by, values = args
+        else:
+            _, elements, by, values = args
+        keys = by.components if isinstance(by, PythonTupleCons) else [by]
+        key_values = values.components if isinstance(values, PythonTupleCons) else [values]
+        if len(keys) != len(key_values):
+            raise Exception(f'Arguments by and values of {function} must have the same length')
+        # A fresh variable for each call, which is named element in the generated code
+        self.grouped_serial += 1
+        var = QualifiedName(GROUPED_ELEMENT_NAME, lexical_path=(f'{function} {self.grouped_serial}',))
+        element = MathVariable(var)
+        conditions = [Comparison(self.grouped_key(key, element), PYTHON_COMP_OPS_REV['=='], self.visit(value))
+                      for key, value in zip(keys, key_values)]
+        condition = conditions[0] if len(conditions) == 1 else LogicalOperator(AND_SYMBOL, conditions)
+        container = ComprehensionContainer([var], self.visit(elements), ComprehensionCondition(condition))
+        if summed:
+            return Aggregate(PYTHON_AGGREGATIVE_FUNCTIONS[as_math_name('sum')], self.grouped_key(term, element),
+                             container)
+        return FunctionApplication(COUNT_QN, [Stream(element, container)])
+
+    def grouped_key(self, key: PythonElement, element: MathVariable) -> Term:
+        """
+        Return the value of a key (or the summed term) of ``grouped_count`` or ``grouped_sum`` for the given element;
+        this is an attribute name, an ``AttributeKey``, or a function
+        """
+        if isinstance(key, PythonConstant) and isinstance(key.value, str):
+            return Attribute(Atom(MFunctionType([], M_ANY, arity='?'), [key.value]), element)
+        if (isinstance(key, PythonCall) and len(key.arglist) == 2 and isinstance(attr := key.arglist[1], PythonConstant)
+                and isinstance(func := self.visit(key.func), MathVariable) and func.name == ATTRIBUTE_KEY_QN):
+            element = Attribute(Atom(MFunctionType([], M_ANY, arity='?'), [attr.value]), element)
+            key = key.arglist[0]
+        func = self.visit(key)
+        if isinstance(func, Attribute):
+            return FunctionApplication(
+                QualifiedName(func.attribute.words[0], type=func.attribute.type, lexical_path=(METHOD_CALL_INDICATOR,)),
+                [element], method_target=func.container)
+        if isinstance(func, MathVariable):
+            return FunctionApplication(func.name, [element])
+        raise Exception(f'Unsupported key: {key}')
+
+    def lookup_to_next(self, call: PythonCall, attribute: str = None) -> Optional[FunctionApplication]:
+        """
+        Translate ``self.lookup(collection, *key)`` (see ``OptimizationProblem.lookup``) into the equivalent
+        ``next(e for e in self.collection if e.key1 == key1 and ...)``, or into ``next(e.attribute for e in ...)`` if
+        an attribute of the result is given.
+
+        Return None if the call is not a lookup in a collection field of the enclosing class.
+        """
+        func = call.func
+        if not (isinstance(func, PythonAttribute) and func.attr == LOOKUP_METHOD_NAME and self.collection_fields
+                and call.arglist and isinstance(collection := call.arglist[0], PythonConstant)
+                and (element_class := self.collection_fields[-1].get(collection.value)) is not None):
+            return None
+        keys = self.primary_keys.get(element_class)
+        if not keys:
+            raise Exception(f'Elements of {collection.value} have no primary key (or their class {element_class} '
+                            f'is not defined in this module)')
+        key_values = call.arglist[1:]
+        if len(keys) != len(key_values) or any(isinstance(arg, PythonKeywordArg) for arg in key_values):
+            raise Exception(f'Lookup in {collection.value} must be given the {len(keys)} values of the primary key')
+        # one element variable per collection, so that lookups in different collections don't share its domain
+        element_qn = QualifiedName('element', lexical_path=(f'{LOOKUP_METHOD_NAME} {collection.value}',))
+        element = MathVariable(element_qn)
+        conditions = [Comparison(Attribute(Atom(MFunctionType([], M_ANY, arity='?'), [key]), element),
+                                 PYTHON_COMP_OPS_REV['=='], self.visit(value))
+                      for key, value in zip(keys, key_values)]
+        condition = (conditions[0] if len(conditions) == 1
+                     else LogicalOperator(translate_python_operator('and'), conditions))
+        term = element if attribute is None else Attribute(Atom(MFunctionType([], M_ANY, arity='?'), [attribute]),
+                                                           element)
+        container = Attribute(Atom(MFunctionType([], M_ANY, arity='?'), [collection.value]), self.visit(func.obj))
+        return FunctionApplication(translate_python_builtin('next'),
+                                   [Stream(term, ComprehensionContainer([element_qn], container,
+                                                                        ComprehensionCondition(condition)))])
+
     def visit_python_statements(self, stmts: PythonStatements):
         exprs = tuple(e for e in map(self.visit, stmts.statements) if e is not IGNORE_ELEMENT)
         if not exprs:
@@ -442,9 +544,11 @@ class PythonToExpr(AbstractPythonElementVisitor):
 
     def visit_python_class(self, cls: PythonClass):
         self.enclosing_context.append('class')
+        self.collection_fields.append({})
         supers = [self.visit(s) for s in cls.superclasses]
         # members = [self.visit(m) for m in cls.members.statements]
         members = self.visit(cls.members)
+        self.collection_fields.pop()
         if members is IGNORE_ELEMENT:
             members = []
         frame = cls.frame
@@ -456,6 +560,9 @@ class PythonToExpr(AbstractPythonElementVisitor):
 
     def visit_python_typed_expr(self, te: PythonTypedExpr):
         assert isinstance(te.expr, PythonVariable)
+        if (self.enclosing_context[-1] == 'class' and isinstance(decl := te.type_decl, PythonSubscripted)
+                and len(decl.subscripts) == 1 and isinstance(element := decl.subscripts[0], PythonVariable)):
+            self.collection_fields[-1][te.expr.name.name] = element.name.name
         return MathTypeDeclaration(te.expr.name.name, python_type_to_abstract(te.type_decl))
 
     def visit_python_assignment(self, assignment: PythonAssignment):
@@ -529,6 +636,8 @@ class PythonToExpr(AbstractPythonElementVisitor):
             decorated = decorated.as_dataclass(
                 [self.convert_field(d) for d in defs if isinstance(d, (MathTypeDeclaration, InitializedVariable))],
                 removed_defs=[d for d in defs if isinstance(d, (MathTypeDeclaration, InitializedVariable))])
+            self.primary_keys[decorated.name.name] = tuple(f.var for f in decorated.fields
+                                                           if isinstance(f, MathTypeDeclaration) and f.primary_key)
         return decorated
 
     def visit_python_keyword_arg(self, kwarg: PythonKeywordArg):
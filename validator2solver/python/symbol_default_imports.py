@@ -135,6 +135,9 @@ def add_optimistic_frames(builtin=None):
                                                                          Variable('infrastructure')}))
     module_frame = add_frame(module_second_frame, Frame(name=f'utils', kind=FrameKind.MODULE,
                                                         variables={Variable('count'),
+                                                                   Variable('grouped_count'),
+                                                                   Variable('grouped_sum'),
+                                                                   Variable('AttributeKey'),
                                                                    Variable('memoize_method'),
                                                                    Variable('metadata'),
                                                                    Variable('builtin'),
@@ -144,6 +147,9 @@ def add_optimistic_frames(builtin=None):
                                                                    Variable('record'),
                                                                    Variable('solution_variable')}))
     add_frame(module_frame, Frame(name='count', kind=FrameKind.FUNCTION))
+    add_frame(module_frame, Frame(name='grouped_count', kind=FrameKind.FUNCTION))
+    add_frame(module_frame, Frame(name='grouped_sum', kind=FrameKind.FUNCTION))
+    add_frame(module_frame, Frame(name='AttributeKey', kind=FrameKind.CLASS))
     add_frame(module_frame, Frame(name='memoize_method', kind=FrameKind.FUNCTION))
     add_frame(module_frame, Frame(name='metadata', kind=FrameKind.FUNCTION))
     add_frame(module_frame, Frame(name='builtin', kind=FrameKind.FUNCTION))
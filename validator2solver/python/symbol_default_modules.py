@@ -52,3 +52,9 @@ UNIQUE_ASSIGNMENT_METHOD_QN = QualifiedName('unique_assignment',
                                                           'optimistic_client', PYTHON_BUILTIN_FRAME_NAME))
 COUNT_QN = QualifiedName('count', MFunctionType([MStreamType(M_ANY)], M_INT),
                          lexical_path=('utils', 'meta', 'optimistic_client', PYTHON_BUILTIN_FRAME_NAME))
+GROUPED_COUNT_QN = QualifiedName('grouped_count',
+                                 lexical_path=('utils', 'meta', 'optimistic_client', PYTHON_BUILTIN_FRAME_NAME))
+GROUPED_SUM_QN = QualifiedName('grouped_sum',
+                               lexical_path=('utils', 'meta', 'optimistic_client', PYTHON_BUILTIN_FRAME_NAME))
+ATTRIBUTE_KEY_QN = QualifiedName('AttributeKey',
+                                 lexical_path=('utils', 'meta', 'optimistic_client', PYTHON_BUILTIN_FRAME_NAME))
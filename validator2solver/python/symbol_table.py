@@ -1,8 +1,9 @@
+from collections.abc import MutableSet
 from dataclasses import dataclass, field
 from enum import Enum
 from itertools import dropwhile, chain, product
 from symtable import SymbolTable
-from typing import Optional, Set, List
+from typing import Optional, Iterable, Dict
 
 # File top-level frame
 
@@ -66,16 +67,92 @@ class Variable:
         return f'{self.name}'
 
 
+# Incremented whenever a variable or child frame is added anywhere, invalidating the lookup caches of all frames
+_frames_generation = 0
+
+
+def _frames_changed():
+    global _frames_generation
+    _frames_generation += 1
+
+
+class FrameVariables(MutableSet):
+    """
+    Set of variables of a frame, indexed by name; the first variable added with a given name is kept
+    """
+
+    def __init__(self, variables: Iterable[Variable] = ()):
+        self.by_name: Dict[str, Variable] = {}
+        for var in variables:
+            self.add(var)
+
+    def __contains__(self, var):
+        return isinstance(var, Variable) and self.by_name.get(var.name) == var
+
+    def __iter__(self):
+        return iter(self.by_name.values())
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def __repr__(self):
+        return f'{{{", ".join(repr(var) for var in self)}}}'
+
+    def add(self, var: Variable):
+        if var.name not in self.by_name:
+            self.by_name[var.name] = var
+            _frames_changed()
+
+    def discard(self, var: Variable):
+        if var in self:
+            del self.by_name[var.name]
+            _frames_changed()
+
+    def get(self, name) -> Optional[Variable]:
+        return self.by_name.get(name)
+
+
+class FrameChildren(list):
+    """
+    List of child frames, indexed by name; lookup by name returns the first child added with that name
+    """
+
+    def __init__(self, children: Iterable['Frame'] = ()):
+        super().__init__()
+        self.by_name: Dict[str, 'Frame'] = {}
+        self.extend(children)
+
+    def append(self, child: 'Frame'):
+        super().append(child)
+        self.by_name.setdefault(child.name, child)
+        _frames_changed()
+
+    def extend(self, children: Iterable['Frame']):
+        for child in children:
+            self.append(child)
+
+    def get(self, name) -> Optional['Frame']:
+        return self.by_name.get(name)
+
+
 @dataclass
 class Frame:
     name: str
     kind: FrameKind
-    variables: Set[Variable] = field(default_factory=set)
+    variables: FrameVariables = field(default_factory=FrameVariables)
     parent: 'Frame' = None
-    children: List['Frame'] = field(default_factory=list)
+    children: FrameChildren = field(default_factory=FrameChildren)
     table: SymbolTable = None
     mockup: bool = False
 
+    def __post_init__(self):
+        if not isinstance(self.variables, FrameVariables):
+            self.variables = FrameVariables(self.variables)
+        if not isinstance(self.children, FrameChildren):
+            self.children = FrameChildren(self.children)
+        self._lookup_cache = {}
+        self._lookup_generation = _frames_generation
+
     def __hash__(self):
         return hash((self.name, self.parent))
 
@@ -93,24 +170,51 @@ class Frame:
         return f'Frame-{suffix} [{self.name}] - Parent [{is_parent}] : ({", ".join(sorted(v.describe() for v in list(self.variables)))})'
 
     def contains_variable(self, variable_name):
-        return any(var.name == variable_name for var in self.variables)
+        return self.variables.get(variable_name) is not None
 
     def contains_child(self, child):
-        for ch in self.children:
-            if ch.name == child.name:
-                return ch
-        return None
+        return self.children.get(child.name)
+
+    def add_child(self, child: 'Frame'):
+        self.children.append(child)
+        child.parent = self
 
     def add_variables(self, variables):
-        new_candidate = []
         for var in variables:
-            if not self.contains_variable(var.name):
-                new_candidate.append(var)
-        self.variables = {*self.variables, *new_candidate}
+            self.variables.add(var)
 
     def find_variable(self, variable_name):
-        return next((var for var in self.variables if var.name == variable_name),
-                    None)
+        return self.variables.get(variable_name)
+
+    def lookup(self, variable_name, stats=None) -> Optional['Frame']:
+        """
+        Return the nearest frame on the parent chain of this frame (including itself) that defines the given name, or
+        None if there is none.
+
+        Results are cached until a variable or frame is added anywhere; if `stats` is given (a `Counter`), it
+        accumulates the number of lookups, cache hits, and frames searched.
+        """
+        if stats is not None:
+            stats['lookups'] += 1
+        if self._lookup_generation != _frames_generation:
+            self._lookup_cache.clear()
+            self._lookup_generation = _frames_generation
+        try:
+            result = self._lookup_cache[variable_name]
+            if stats is not None:
+                stats['cache_hits'] += 1
+            return result
+        except KeyError:
+            pass
+        frame = self
+        while frame is not None:
+            if stats is not None:
+                stats['frames_searched'] += 1
+            if frame.contains_variable(variable_name):
+                break
+            frame = frame.parent
+        self._lookup_cache[variable_name] = frame
+        return frame
 
     def qualified_name(self):
         # if self.is_file():
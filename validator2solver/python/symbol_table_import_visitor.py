@@ -1,4 +1,4 @@
-from collections import deque
+from collections import deque, Counter
 from typing import MutableMapping, Mapping
 
 from codegen.utils import visitor_for
@@ -26,8 +26,7 @@ class FrameStack:
         if not self.empty() and add_parent:
             parent = self.stack[len(self.stack) - 1]
             if parent:
-                parent.children.append(frame)
-                frame.parent = parent
+                parent.add_child(frame)
         self.stack.append(frame)
 
     def empty(self):
@@ -104,10 +103,8 @@ def add_frame(parent: Frame, child: Frame):
         target_child = ch
         ch.add_variables(child.variables)
     else:
-        if not parent.contains_variable(target_child.name):
-            parent.variables = {*parent.variables, Variable(child.name)}
-        parent.children.append(target_child)
-        target_child.parent = parent
+        parent.add_variables([Variable(child.name)])
+        parent.add_child(target_child)
     return target_child
 
 
@@ -128,6 +125,8 @@ class SymbolTableImportVisitor(AbstractVisitor):
         self.TESTING_FRAME = None
         self.debug = debug
         self.exceptions = []
+        # Counts of variable lookups, lookup cache hits, and frames searched while resolving scopes
+        self.resolution_stats = Counter()
 
     def visit_python_file(self, obj):
         # variables = choose_variables_for_frame(self.symbol_table)
@@ -157,6 +156,8 @@ class SymbolTableImportVisitor(AbstractVisitor):
 
         super().visit_python_file(obj)
         self.stack.remove()
+        if self.debug:
+            print(f'Scope resolution for {self.module_name}: {dict(self.resolution_stats)}')
 
     def visit_python_class(self, obj):
         frame = self.create_frame(obj, f'{obj.name}', kind=FrameKind.CLASS)
@@ -323,9 +324,8 @@ class SymbolTableImportVisitor(AbstractVisitor):
             return defining_ast_frame, True
         if builtin_frame.mockup and not self.disable_imports_mockup:
             mockup_frame = Frame(name=f'{var.name}', kind=FrameKind.UNKNOWN, mockup=True)
-            builtin_frame.children.append(mockup_frame)
-            mockup_frame.parent = builtin_frame
-            builtin_frame.variables_by_role = {Variable(var.name), *builtin_frame.variables_by_role}
+            builtin_frame.add_child(mockup_frame)
+            builtin_frame.add_variables([Variable(var.name)])
             # return mockup_frame, True
             return builtin_frame, True
         elif frame == builtin_frame:
@@ -333,13 +333,12 @@ class SymbolTableImportVisitor(AbstractVisitor):
         elif self.enable_code_testing:
             if not self.TESTING_FRAME:
                 self.TESTING_FRAME = Frame(name=f'*testing*', kind=FrameKind.MODULE, mockup=True)
-                builtin_frame.children.append(self.TESTING_FRAME)
-                self.TESTING_FRAME.parent = builtin_frame
+                builtin_frame.add_child(self.TESTING_FRAME)
             if not self.TESTING_FRAME.contains_variable(var.name):
                 symbol_name = var.name
                 if isinstance(var.name, QualifiedName):
                     symbol_name = var.name.name
-                self.TESTING_FRAME.variables = {Variable(symbol_name), *self.TESTING_FRAME.variables}
+                self.TESTING_FRAME.add_variables([Variable(symbol_name)])
             return self.TESTING_FRAME, False
         else:
             defining_ast_frame, is_import = self.find_import_frame(var, frame, self.builtin_frame, builtin_frame)
@@ -357,21 +356,18 @@ class SymbolTableImportVisitor(AbstractVisitor):
     def find_ast_variable_in_frame(self, obj, frame):
         if not frame:
             return None
-        if frame.contains_variable(obj.name):
-            return frame
-        else:
-            return self.find_ast_variable_in_frame(obj, frame.parent)
+        return frame.lookup(obj.name, self.resolution_stats)
 
     def find_variable_in_import_frame(self, obj, frame):
         if not frame:
             return None
 
+        self.resolution_stats['import_frames_searched'] += 1
         if PYTHON_BUILTIN_FRAME_NAME == frame.name:
             # The obj is member of the builtin frame
             # it must be a module, so we return the module frame
-            for ch in frame.children:
-                if ch.qualified_name() == obj.name:
-                    return ch if ch.is_file() else frame
+            if ch := frame.children.get(obj.name):
+                return ch if ch.is_file() else frame
         if frame.contains_variable(obj.name):
             return frame
 
@@ -440,13 +436,11 @@ class SymbolTableImportVisitor(AbstractVisitor):
             target_names = module_name.split('.')
             for i, name in enumerate(target_names):
                 found = False
-                for ch in frame.children:
-                    if ch.qualified_name() == name:
-                        target_alias = alias if i == len(target_names) - 1 else None
-                        frame = ch
-                        self.register_import_symbol(name, frame, target_alias)
-                        found = True
-                        break
+                if ch := frame.children.get(name):
+                    target_alias = alias if i == len(target_names) - 1 else None
+                    frame = ch
+                    self.register_import_symbol(name, frame, target_alias)
+                    found = True
             if not found:
                 self.exceptions.append({'name': module_name, 'is_symbol': False})
                 raise Exception(f'Missing Import Frame {module_name}')
@@ -476,12 +470,10 @@ class SymbolTableImportVisitor(AbstractVisitor):
         frame = None
         for module_name, alias in import_name_stack:
             frame = Frame(name=f'{module_name}', kind=FrameKind.MODULE, mockup=True)
-            parent.children.append(frame)
-            frame.parent = parent
+            parent.add_child(frame)
             self.register_import_symbol(module_name, frame, alias)
             if not parent.is_builtin():
-                variables = [Variable(frame.name)]
-                parent.variables = {*variables, *parent.variables}
+                parent.add_variables([Variable(frame.name)])
             parent = frame
         variables = []
         for symbol in symbols:
@@ -496,7 +488,7 @@ class SymbolTableImportVisitor(AbstractVisitor):
                 symbol_name = symbol.name.name
             variables.append(Variable(symbol_name))
             self.register_import_symbol(symbol_name, frame, alias)
-        frame.variables = {*frame.variables, *variables}
+        frame.add_variables(variables)
 
     def create_frame(self, obj, frame_name, kind):
         table = self.stack.current().table
@@ -6,6 +6,7 @@ from generated.Python3Parser import Python3Parser
 from generated.Python3Visitor import Python3Visitor
 from validator2solver.python.python_rep import PythonElement, PythonFile, PythonStatements, PythonVariable, PythonAttribute, \
     PythonImport, PythonImportFrom, PythonImportAll, PythonImportAs
+from validator2solver.python.parse_python_ast import OptimisticPythonParserException
 
 OPTIMISTIC_CLIENT_PACKAGE = 'optimistic_client'
 